@@ -0,0 +1,177 @@
+# Bitboard representation of the Connect 4 board, used by the A.I. to search faster
+# than it can with the list of lists board that the client uses
+#
+# Each color's pieces are stored in a single integer. Every column takes up
+# NUM_ROWS + 1 bits, with the extra bit acting as a buffer so that the shifts used
+# in win detection never wrap around from the top of one column to the next:
+#
+#    6 13 20 27 34 41 48   <- buffer row (always empty)
+#    5 12 19 26 33 40 47   <- top row
+#    4 11 18 25 32 39 46
+#    3 10 17 24 31 38 45
+#    2  9 16 23 30 37 44
+#    1  8 15 22 29 36 43
+#    0  7 14 21 28 35 42   <- bottom row
+
+EMPTY, RED, YELLOW = '.', 'o', '@'
+NUM_ROWS, NUM_COLS = 6, 7
+COLUMN_HEIGHT = NUM_ROWS + 1  # number of bits used per column, including the buffer bit
+
+# Amount to shift by to move one spot in each direction
+VERTICAL_SHIFT = 1
+HORIZONTAL_SHIFT = COLUMN_HEIGHT
+DIAGONAL_UP_SHIFT = COLUMN_HEIGHT + 1     # bottom left to top right
+DIAGONAL_DOWN_SHIFT = COLUMN_HEIGHT - 1   # top left to bottom right
+DIRECTION_SHIFTS = [VERTICAL_SHIFT, HORIZONTAL_SHIFT, DIAGONAL_UP_SHIFT, DIAGONAL_DOWN_SHIFT]
+
+
+def bitIndex(row, col):
+	"""Gets the index of the bit that represents the given spot on the board"""
+	return col * COLUMN_HEIGHT + row
+
+
+def bitOf(row, col):
+	"""Gets the single bit mask for the given spot on the board"""
+	return 1 << bitIndex(row, col)
+
+
+def hasFourInARow(pieces):
+	"""Checks if the given bitboard contains four pieces in a row in any direction"""
+	for shift in DIRECTION_SHIFTS:
+		pairs = pieces & (pieces >> shift)
+		if pairs & (pairs >> (2 * shift)):
+			return True
+	return False
+
+
+def createWindowMasks():
+	"""
+	Creates a mask for every length 4 section of the board,
+	in the same order that connect4_strategy.scoreBoard visits them
+	"""
+	windows = []
+	# horizontal
+	for c in range(NUM_COLS - 3):
+		for r in range(NUM_ROWS):
+			windows.append([(r, c + i) for i in range(4)])
+	# vertical
+	for c in range(NUM_COLS):
+		for r in range(NUM_ROWS - 3):
+			windows.append([(r + i, c) for i in range(4)])
+	# diagonal from bottom left to top right
+	for c in range(NUM_COLS - 3):
+		for r in range(NUM_ROWS - 3):
+			windows.append([(r + i, c + i) for i in range(4)])
+	# diagonal from bottom right to top left
+	for c in range(NUM_COLS - 3):
+		for r in range(3, NUM_ROWS):
+			windows.append([(r - i, c + i) for i in range(4)])
+
+	masks = []
+	for window in windows:
+		mask = 0
+		for row, col in window:
+			mask |= bitOf(row, col)
+		masks.append(mask)
+	return masks
+
+
+BOTTOM_ROW_MASK = sum(bitOf(0, c) for c in range(NUM_COLS))
+FULL_BOARD_MASK = BOTTOM_ROW_MASK * ((1 << NUM_ROWS) - 1)  # every playable spot
+CENTER_COLUMN_MASK = sum(bitOf(r, NUM_COLS // 2) for r in range(NUM_ROWS))
+# distance in bits from each column to the column it is swapped with when the board is mirrored
+MIRROR_SHIFTS = [(NUM_COLS - 1 - 2 * c) * COLUMN_HEIGHT for c in range(NUM_COLS)]
+WINDOW_MASKS = createWindowMasks()  # all 69 length 4 sections
+# for each bit index, the indices of the sections in WINDOW_MASKS that contain that spot
+WINDOWS_THROUGH_SPOT = [[w for w, mask in enumerate(WINDOW_MASKS) if mask >> i & 1] for i in range(NUM_COLS * COLUMN_HEIGHT)]
+
+
+class Connect4Bitboard:
+	"""
+	Stores the board as one integer per color, and the next open bit in each column.
+	Moves are played and undone in place, so no copying is needed during a search.
+
+	Also keeps a key for the position, and for its mirror image, up to date with every move.
+	The key is the RED pieces plus the mask of all filled spots. Within a column, the filled
+	spots are always a run of 1s starting at the bottom, so the sum is unique for every position.
+	"""
+
+	def __init__(self, board=None):
+		"""Creates the bitboard from the list of lists board (bottom row first) used by the client"""
+		self.pieces = {RED: 0, YELLOW: 0}
+		self.heights = [bitIndex(0, c) for c in range(NUM_COLS)]  # next open bit in each column
+		self.numMoves = 0
+		self.key = 0
+		self.mirroredKey = 0
+		if board is not None:
+			for col in range(NUM_COLS):
+				for row in range(NUM_ROWS):
+					piece = board[row][col]
+					if piece == EMPTY:
+						break
+					self.performMove(col, piece)
+
+	def isValidMove(self, col):
+		"""Checks if the column is full"""
+		return self.heights[col] != bitIndex(NUM_ROWS, col)
+
+	def getValidMoves(self):
+		"""Returns a list of valid moves"""
+		return [c for c in range(NUM_COLS) if self.heights[c] != bitIndex(NUM_ROWS, c)]
+
+	def performMove(self, col, color):
+		"""Drops a piece of the given color in the given column"""
+		bitPos = self.heights[col]
+		self.pieces[color] |= 1 << bitPos
+		self.heights[col] += 1
+		self.numMoves += 1
+		keyIncrement = 2 if color == RED else 1
+		self.key += keyIncrement << bitPos
+		self.mirroredKey += keyIncrement << (bitPos + MIRROR_SHIFTS[col])
+
+	def undoMove(self, col, color):
+		"""Removes the top piece from the given column, which must belong to the given color"""
+		self.heights[col] -= 1
+		bitPos = self.heights[col]
+		self.pieces[color] ^= 1 << bitPos
+		self.numMoves -= 1
+		keyIncrement = 2 if color == RED else 1
+		self.key -= keyIncrement << bitPos
+		self.mirroredKey -= keyIncrement << (bitPos + MIRROR_SHIFTS[col])
+
+	def canonicalKey(self):
+		"""
+		Gets the key shared by this position and its mirror image
+		Returns the key in [0] and whether it is the key of the mirror image in [1]
+		"""
+		if self.mirroredKey < self.key:
+			return self.mirroredKey, True
+		return self.key, False
+
+	def isWinner(self, color):
+		"""Checks if the given color has four in a row"""
+		return hasFourInARow(self.pieces[color])
+
+	def isFull(self):
+		"""Checks if every spot on the board has been played"""
+		return self.numMoves == NUM_ROWS * NUM_COLS
+
+	def filledMask(self):
+		"""Gets the mask of all the spots that contain a piece"""
+		return self.pieces[RED] | self.pieces[YELLOW]
+
+	def toBoard(self):
+		"""Converts the bitboard back into the list of lists board used by the client"""
+		board = []
+		for row in range(NUM_ROWS):
+			boardRow = []
+			for col in range(NUM_COLS):
+				bit = bitOf(row, col)
+				if self.pieces[RED] & bit:
+					boardRow.append(RED)
+				elif self.pieces[YELLOW] & bit:
+					boardRow.append(YELLOW)
+				else:
+					boardRow.append(EMPTY)
+			board.append(boardRow)
+		return board
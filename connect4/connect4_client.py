@@ -12,7 +12,10 @@ from util.aiduel.dueling import get_dueling_ai_class
 from datetime import datetime
 from connect4.connect4_player import Connect4Player
 from connect4.connect4_strategy import Connect4Strategy, opponentOf, performMove, checkIfGameOver, isValidMove, \
-    copyOfBoard
+    copyOfBoard, SOLVER_MAX_EMPTY_SPOTS, WIN_SCORE
+from connect4.connect4_bitboard import Connect4Bitboard
+from connect4.connect4_solver import Connect4Solver, movesUntilGameOver
+from connect4.connect4_mcts import Connect4MCTSStrategy
 
 BOARD_OUTPUT_HEIGHT = 9
 
@@ -28,6 +31,8 @@ gameBoard = [[EMPTY, EMPTY, EMPTY, EMPTY, EMPTY, EMPTY, EMPTY],  # bottom row
              [EMPTY, EMPTY, EMPTY, EMPTY, EMPTY, EMPTY, EMPTY]]  # top row
 userPiece = YELLOW
 TIME_TAKEN_PER_PLAYER = {}
+SOLVER = None  # only created in solve mode
+SCORING_STRATEGIES = None  # {color: Connect4Strategy}, only created in score mode
 
 
 # class for the Human player
@@ -71,10 +76,16 @@ def getHighlightColorForPiece(piece):
         return NO_COLOR
 
 
-def printBoard(board, recentMove=None):
-    """Prints the given game board"""
+def printBoard(board, recentMove=None, columnScores=None):
+    """
+    Prints the given game board. In score mode, the scores from Connect4Strategy.getColumnScores
+    are printed above the column numbers (or a blank line, if no scores are given)
+    """
     columnColor = NO_COLOR
-    print("\n   ", end='')
+    print()
+    if SCORING_STRATEGIES is not None:
+        print(columnScoresDescription(columnScores) if columnScores is not None else "")
+    print("   ", end='')
     for i in range(7):
         if i == recentMove:
             columnColor = GREEN_COLOR
@@ -92,6 +103,41 @@ def printBoard(board, recentMove=None):
     print(" " + f"{BLUE_COLOR}%s{NO_COLOR}" % "-" * 17)
 
 
+def columnScoresDescription(columnScores):
+    """Describes the score of each column for the player to move, e.g. 1:+4 2:-12 3:WIN"""
+    descriptions = []
+    for col in sorted(columnScores):
+        score = columnScores[col][0]
+        if score >= WIN_SCORE:
+            scoreText = f"{GREEN_COLOR}WIN{NO_COLOR}"
+        elif score <= -WIN_SCORE:
+            scoreText = f"{RED_COLOR}LOSS{NO_COLOR}"
+        else:
+            scoreText = f"{score:+d}"
+        descriptions.append(f"{col + 1}:{scoreText}")
+    return " " + " ".join(descriptions)
+
+
+def getColumnScores(board, turn):
+    """Scores every column for the player whose turn it is"""
+    return SCORING_STRATEGIES[turn].getColumnScores(board)
+
+
+def solvedPositionDescription(board, turn):
+    """Uses the solver to describe who wins the given board with perfect play, if it is late enough in the game"""
+    bitboard = Connect4Bitboard(board)
+    numEmptySpots = len(board) * len(board[0]) - bitboard.numMoves
+    if numEmptySpots > SOLVER_MAX_EMPTY_SPOTS:
+        return f"solvable once {SOLVER_MAX_EMPTY_SPOTS} spots are left"
+    score = SOLVER.solve(bitboard, turn)
+    if score == 0:
+        return "draw with perfect play"
+    winner = turn if score > 0 else opponentOf(turn)
+    winnerName = f"{RED_COLOR}RED{NO_COLOR}" if winner == RED else f"{YELLOW_COLOR}YELLOW{NO_COLOR}"
+    numMoves = movesUntilGameOver(score, bitboard.numMoves)
+    return f"{winnerName} wins in {numMoves} move{'s' if numMoves != 1 else ''} with perfect play"
+
+
 def printMoveHistory(numMovesPrevious):
     """Prints the move history of the current game"""
     while True:
@@ -244,7 +290,7 @@ def printAsciiTitleArt():
 
 def run():
     """main method that prompts the user for input"""
-    global userPiece, TIME_TAKEN_PER_PLAYER
+    global userPiece, TIME_TAKEN_PER_PLAYER, SOLVER, SCORING_STRATEGIES, BOARD_OUTPUT_HEIGHT
     if "-d" in sys.argv or "-aiDuel" in sys.argv:
         UserPlayerClass = get_dueling_ai_class(Connect4Player, "Connect4Strategy")
         print(f"\n{INFO_SYMBOL} You are in AI Duel Mode!")
@@ -252,6 +298,18 @@ def run():
     else:
         UserPlayerClass = HumanPlayer
         AI_DUEL_MODE = False
+    if "--solve" in sys.argv:
+        SOLVER = Connect4Solver()
+        print(f"\n{INFO_SYMBOL} You are in Solve Mode!")
+    if "--scores" in sys.argv:
+        SCORING_STRATEGIES = {RED: Connect4Strategy(RED), YELLOW: Connect4Strategy(YELLOW)}
+        BOARD_OUTPUT_HEIGHT += 1  # for the line of scores
+        print(f"\n{INFO_SYMBOL} You are in Score Mode!")
+    if "-mcts" in sys.argv:
+        AIStrategyClass = Connect4MCTSStrategy
+        print(f"\n{INFO_SYMBOL} You are playing against the Monte Carlo Tree Search AI!")
+    else:
+        AIStrategyClass = Connect4Strategy
     print("\nWelcome to Kyle's Connect 4 AI!")
     printAsciiTitleArt()
     userPlayerName = "Your AI" if AI_DUEL_MODE else "You"
@@ -291,13 +349,13 @@ def run():
     opponentHighlightColor = getHighlightColorForPiece(opponentPiece)
     print(f"{userPlayerName}: {userHighlightColor}{userPiece}{NO_COLOR}\t{aiPlayerName}: {opponentHighlightColor}{opponentPiece}{NO_COLOR}")
     playerNames = {opponentPiece: aiPlayerName, userPiece: userPlayerName}
-    players = {opponentPiece: Connect4Strategy(opponentPiece), userPiece: UserPlayerClass(userPiece)}
+    players = {opponentPiece: AIStrategyClass(opponentPiece), userPiece: UserPlayerClass(userPiece)}
     gameOver = False
     winningPiece = None
     print("Type 's' at any prompt to save the game.")
     print("Type 'h' to see previous moves.")
     print("Type 'q' at any prompt to quit.")
-    printBoard(gameBoard)
+    printBoard(gameBoard, columnScores=getColumnScores(gameBoard, turn) if SCORING_STRATEGIES is not None else None)
     print()
     firstTurn = True
     while not gameOver:
@@ -325,12 +383,14 @@ def run():
         TIME_TAKEN_PER_PLAYER[turn][2] += 1
         performMove(gameBoard, column, turn)
         BOARD_HISTORY.append([copyOfBoard(gameBoard), column])
-        erasePreviousLines(BOARD_OUTPUT_HEIGHT + (0 if firstTurn else 1))
-        printBoard(gameBoard, column)
-        print(f"{nameOfCurrentPlayer} played in spot {column + 1}\n")
         turn = opponentOf(turn)  # switch the turn
-        firstTurn = False
         gameOver, winningPiece = checkIfGameOver(gameBoard)
+        columnScores = getColumnScores(gameBoard, turn) if SCORING_STRATEGIES is not None and not gameOver else None
+        erasePreviousLines(BOARD_OUTPUT_HEIGHT + (0 if firstTurn else 1))
+        printBoard(gameBoard, column, columnScores)
+        firstTurn = False
+        solveModeOutput = f"  ({solvedPositionDescription(gameBoard, turn)})" if SOLVER is not None and not gameOver else ""
+        print(f"{nameOfCurrentPlayer} played in spot {column + 1}{solveModeOutput}\n")
 
     if winningPiece is None:
         print("The game ended in a tie!\n")
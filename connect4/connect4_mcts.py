@@ -0,0 +1,232 @@
+# Monte Carlo Tree Search A.I. for Connect 4, an alternative to the alpha-beta search in connect4_strategy.py
+# Instead of searching to a fixed depth, it plays random games from the most promising positions
+# for as long as its time budget allows, and picks the move that was explored the most.
+# Works on any board size, so it can also be used on wider boards where alpha-beta slows down quickly
+import math  # for UCT exploration term
+import random  # for random rollouts
+import time  # for the per-move time budget
+from connect4.connect4_player import Connect4Player  # super class
+
+EMPTY, RED, YELLOW = '.', 'o', '@'
+MCTS_TIME_PER_MOVE = 2.0  # seconds the A.I. may spend on each move
+ROLLOUTS_PER_BATCH = 16  # random games played from each newly expanded node
+EXPLORATION_CONSTANT = math.sqrt(2)  # higher values explore less visited moves more often
+WIN, DRAW, LOSS = 1.0, 0.5, 0.0  # rollout rewards
+
+
+class BoardLayout:
+	"""
+	Masks for a bitboard of the given size. Like Connect4Bitboard, every column takes up
+	numRows + 1 bits, so that shifting never wraps from one column into the next
+	"""
+
+	def __init__(self, numRows, numCols):
+		self.numRows = numRows
+		self.numCols = numCols
+		self.numSpots = numRows * numCols
+		columnHeight = numRows + 1
+		self.bottomMask = sum(1 << (c * columnHeight) for c in range(numCols))
+		self.fullMask = self.bottomMask * ((1 << numRows) - 1)
+		self.columnMasks = [((1 << numRows) - 1) << (c * columnHeight) for c in range(numCols)]
+		self.shifts = [1, columnHeight, columnHeight - 1, columnHeight + 1]
+		# a batch of ROLLOUTS_PER_BATCH games is kept in one integer, with each game in its own lane of bits.
+		# Lanes are 2 empty columns apart, more than the biggest shift, so a four in a row can't span two lanes
+		self.laneWidth = (numCols + 2) * columnHeight
+		self.laneOffsets = [lane * self.laneWidth for lane in range(ROLLOUTS_PER_BATCH)]
+		self.laneRepeat = sum(1 << offset for offset in self.laneOffsets)  # multiplying by this copies a board into every lane
+		self.batchBottomMask = self.bottomMask * self.laneRepeat
+		self.batchFullMask = self.fullMask * self.laneRepeat
+
+	def hasFourInARow(self, pieces):
+		"""Checks if the given pieces contain four in a row in any direction"""
+		for shift in self.shifts:
+			pairs = pieces & (pieces >> shift)
+			if pairs & (pairs >> (2 * shift)):
+				return True
+		return False
+
+	def fourInARowSpots(self, pieces):
+		"""Gets the mask of the spots that start a four in a row of the given pieces, in any direction"""
+		spots = 0
+		for shift in self.shifts:
+			pairs = pieces & (pieces >> shift)
+			spots |= pairs & (pairs >> (2 * shift))
+		return spots
+
+	def possibleMoves(self, mask):
+		"""Gets the list of single bit masks of the lowest empty spot in each column that isn't full"""
+		possible = (mask + self.bottomMask) & self.fullMask
+		return [possible & columnMask for columnMask in self.columnMasks if possible & columnMask]
+
+	def columnOf(self, move):
+		"""Gets the column index of a single bit move"""
+		return (move.bit_length() - 1) // (self.numRows + 1)
+
+	def fromBoard(self, board, colorToMove):
+		"""
+		Converts the list of lists board (bottom row first) used by the client into
+		the pieces of the player to move in [0], and the mask of all pieces in [1]
+		"""
+		position, mask = 0, 0
+		for row in range(self.numRows):
+			for col in range(self.numCols):
+				piece = board[row][col]
+				if piece != EMPTY:
+					bit = 1 << (col * (self.numRows + 1) + row)
+					mask |= bit
+					if piece == colorToMove:
+						position |= bit
+		return position, mask
+
+
+class MCTSNode:
+	"""A position in the search tree. Stores the results from the point of view of the player who just moved"""
+	__slots__ = ['position', 'mask', 'numMoves', 'parent', 'children', 'untriedMoves', 'visits', 'reward', 'isWin']
+
+	def __init__(self, layout, position, mask, numMoves, parent=None, isWin=False):
+		self.position = position  # pieces of the player to move
+		self.mask = mask  # all pieces on the board
+		self.numMoves = numMoves
+		self.parent = parent
+		self.children = {}  # column -> MCTSNode
+		self.isWin = isWin  # whether the player who just moved won
+		isTerminal = isWin or numMoves == layout.numSpots
+		self.untriedMoves = [] if isTerminal else layout.possibleMoves(mask)
+		random.shuffle(self.untriedMoves)
+		self.visits = 0
+		self.reward = 0.0
+
+
+class Connect4MCTSStrategy(Connect4Player):
+	"""Monte Carlo Tree Search A.I. using UCT selection and batched random rollouts"""
+
+	def __init__(self, color, timePerMove=MCTS_TIME_PER_MOVE):
+		super().__init__(color)
+		self.AI_COLOR = color
+		self.HUMAN_COLOR = RED if color == YELLOW else YELLOW
+		self.timePerMove = timePerMove
+		self.layout = None
+		self.root = None  # kept between moves so the tree can be reused
+		self.numRolloutsPlayed = 0
+
+	def getMove(self, board):
+		"""Calculates the best move for the AI for the given board, within the time budget"""
+		deadline = time.time() + self.timePerMove
+		self.numRolloutsPlayed = 0
+		if self.layout is None or self.layout.numRows != len(board) or self.layout.numCols != len(board[0]):
+			self.layout = BoardLayout(len(board), len(board[0]))
+			self.root = None
+		position, mask = self.layout.fromBoard(board, self.AI_COLOR)
+		self.root = self.findReusableRoot(position, mask)
+		if self.root is None:
+			self.root = MCTSNode(self.layout, position, mask, mask.bit_count())
+		self.root.parent = None
+
+		while True:
+			node = self.selectAndExpand(self.root)
+			reward = self.rollout(node)
+			self.backpropagate(node, reward)
+			if time.time() >= deadline:
+				break
+			if len(self.root.untriedMoves) == 0 and len(self.root.children) == 1:
+				break  # only one move to choose from
+
+		bestMove, bestChild = max(self.root.children.items(), key=lambda child: child[1].visits)
+		self.root = bestChild  # the opponent will move from here next
+		return bestMove
+
+	def findReusableRoot(self, position, mask):
+		"""
+		Looks for the given position in the tree kept from the previous move. The kept root is the
+		position after the AI's last move, so the position is normally one of the opponent's replies
+		"""
+		if self.root is None:
+			return None
+		if self.root.position == position and self.root.mask == mask:
+			return self.root
+		for child in self.root.children.values():
+			if child.position == position and child.mask == mask:
+				return child
+		return None
+
+	def selectAndExpand(self, node):
+		"""Follows the UCT policy down the tree until reaching a node with an untried move, and expands it"""
+		layout = self.layout
+		while not node.untriedMoves and node.children:
+			logVisits = math.log(node.visits)
+			bestScore, bestChild = -math.inf, None
+			for child in node.children.values():
+				uctScore = child.reward / child.visits + EXPLORATION_CONSTANT * math.sqrt(logVisits / child.visits)
+				if uctScore > bestScore:
+					bestScore, bestChild = uctScore, child
+			node = bestChild
+		if node.untriedMoves:
+			move = node.untriedMoves.pop()
+			moverPieces = node.position | move
+			newMask = node.mask | move
+			child = MCTSNode(layout, moverPieces ^ newMask, newMask, node.numMoves + 1, node,
+							 layout.hasFourInARow(moverPieces))
+			node.children[layout.columnOf(move)] = child
+			node = child
+		return node
+
+	def rollout(self, node):
+		"""
+		Plays ROLLOUTS_PER_BATCH random games from the given node
+		Returns the total reward for the player who moved into the node
+		"""
+		if node.isWin:
+			return WIN * ROLLOUTS_PER_BATCH
+		if node.numMoves == self.layout.numSpots:
+			return DRAW * ROLLOUTS_PER_BATCH
+		self.numRolloutsPlayed += ROLLOUTS_PER_BATCH
+		return self.randomGames(node.position, node.mask, node.numMoves)
+
+	def randomGames(self, position, mask, numMoves):
+		"""
+		Plays ROLLOUTS_PER_BATCH random games at once, each in its own lane of the batch bitboard. Every step plays
+		one move in each game that hasn't ended, and the pieces are updated and checked for wins in all games together
+		Returns the total reward for the player who is not to move
+		"""
+		layout = self.layout
+		columnMasks, laneOffsets, fullMask = layout.columnMasks, layout.laneOffsets, layout.fullMask
+		batchBottomMask, batchFullMask = layout.batchBottomMask, layout.batchFullMask
+		fourInARowSpots = layout.fourInARowSpots
+		position *= layout.laneRepeat
+		mask *= layout.laneRepeat
+		activeOffsets = laneOffsets  # the lanes of the games that haven't ended
+		totalReward = 0.0
+		playerToMoveIsOpponent = True  # whether the player to move is the opponent of the player we score for
+		while numMoves < layout.numSpots:
+			possible = (mask + batchBottomMask) & batchFullMask
+			moves = 0
+			for offset in activeOffsets:
+				lanePossible = (possible >> offset) & fullMask
+				moves |= random.choice([lanePossible & columnMask for columnMask in columnMasks
+										if lanePossible & columnMask]) << offset
+			position |= moves
+			winSpots = fourInARowSpots(position)
+			if winSpots:
+				endedOffsets = [offset for offset in activeOffsets if (winSpots >> offset) & fullMask]
+				totalReward += (LOSS if playerToMoveIsOpponent else WIN) * len(endedOffsets)
+				activeOffsets = [offset for offset in activeOffsets if offset not in endedOffsets]
+				if not activeOffsets:
+					return totalReward
+				# clear the ended games, so they aren't played any further
+				activeMask = sum(fullMask << offset for offset in activeOffsets)
+				position &= activeMask
+				mask &= activeMask
+				moves &= activeMask
+			mask |= moves
+			position ^= mask  # switch to the other player's pieces
+			numMoves += 1
+			playerToMoveIsOpponent = not playerToMoveIsOpponent
+		return totalReward + DRAW * len(activeOffsets)
+
+	def backpropagate(self, node, reward):
+		"""Adds the results of a batch of rollouts to every node from the given node up to the root"""
+		while node is not None:
+			node.visits += ROLLOUTS_PER_BATCH
+			node.reward += reward
+			reward = ROLLOUTS_PER_BATCH - reward  # the parent's mover is the other player
+			node = node.parent
@@ -0,0 +1,52 @@
+# Opening book for the Connect 4 A.I.
+# The book is a file of fixed-size records sorted by position key (see Connect4Bitboard.canonicalKey).
+# It is memory-mapped and binary searched, so nothing has to be loaded when the A.I. starts up.
+# The book is built by connect4_opening_book_generator.py
+import mmap
+import os
+import struct
+
+RECORD_FORMAT = '<QBi'  # position key, best move, score for the player to move
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+OPENING_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "connect4_opening_book.bin")
+NUM_COLS = 7
+
+
+class Connect4OpeningBook:
+	"""Looks up positions in an opening book file. If the file doesn't exist, the book is just empty"""
+
+	def __init__(self, path=OPENING_BOOK_PATH):
+		self.numRecords = 0
+		self.bookMap = None
+		if os.path.exists(path) and os.path.getsize(path) >= RECORD_SIZE:
+			with open(path, 'rb') as bookFile:
+				# the mapping stays valid after the file is closed
+				self.bookMap = mmap.mmap(bookFile.fileno(), 0, access=mmap.ACCESS_READ)
+			self.numRecords = len(self.bookMap) // RECORD_SIZE
+
+	def lookup(self, bitboard):
+		"""
+		Finds the given Connect4Bitboard (or its mirror image) in the book
+		Returns the best move in [0] and its score in [1], or None if the position isn't in the book
+		"""
+		key, isMirrored = bitboard.canonicalKey()
+		low, high = 0, self.numRecords - 1
+		while low <= high:
+			middle = (low + high) // 2
+			recordKey, move, score = struct.unpack_from(RECORD_FORMAT, self.bookMap, middle * RECORD_SIZE)
+			if recordKey < key:
+				low = middle + 1
+			elif recordKey > key:
+				high = middle - 1
+			else:
+				if isMirrored:
+					move = NUM_COLS - 1 - move
+				return move, score
+		return None
+
+
+def writeOpeningBook(records, path=OPENING_BOOK_PATH):
+	"""Writes the given (key, move, score) records to an opening book file, sorted by key"""
+	with open(path, 'wb') as bookFile:
+		for key, move, score in sorted(records):
+			bookFile.write(struct.pack(RECORD_FORMAT, key, move, score))
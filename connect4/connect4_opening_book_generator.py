@@ -0,0 +1,60 @@
+# Builds the opening book for the Connect 4 A.I.
+# Every position with up to maxPly pieces played is searched searchDepth moves ahead,
+# and the best move for the player to move is saved. To rebuild the book, run this from the root of the project:
+#   > python3 -m connect4.connect4_opening_book_generator [maxPly] [searchDepth]
+import sys
+import time
+from connect4.connect4_bitboard import Connect4Bitboard, RED, YELLOW, NUM_COLS
+from connect4.connect4_strategy import Connect4Strategy, opponentOf, BITBOARD_MAX_DEPTH
+from connect4.connect4_opening_book import writeOpeningBook, OPENING_BOOK_PATH
+
+DEFAULT_MAX_PLY = 4
+DEFAULT_SEARCH_DEPTH = BITBOARD_MAX_DEPTH + 1
+
+
+def findBookPositions(maxPly):
+	"""
+	Finds every position with at most maxPly pieces played, keeping only one of each mirror image pair.
+	Returns a dictionary mapping the position key to the bitboard and the color to move
+	"""
+	positions = {}
+
+	def addPositions(bitboard, colorToMove):
+		"""Adds this position, and all positions reachable from it within maxPly pieces played"""
+		key = bitboard.canonicalKey()[0]
+		if key in positions:
+			return
+		positions[key] = (Connect4Bitboard(bitboard.toBoard()), colorToMove)
+		if bitboard.numMoves == maxPly:
+			return
+		for move in bitboard.getValidMoves():
+			bitboard.performMove(move, colorToMove)
+			if not bitboard.isWinner(colorToMove):
+				addPositions(bitboard, opponentOf(colorToMove))
+			bitboard.undoMove(move, colorToMove)
+
+	addPositions(Connect4Bitboard(), YELLOW)  # yellow goes first
+	return positions
+
+
+def generateOpeningBook(maxPly=DEFAULT_MAX_PLY, searchDepth=DEFAULT_SEARCH_DEPTH, path=OPENING_BOOK_PATH):
+	"""Searches all the book positions and writes them to the opening book file"""
+	positions = findBookPositions(maxPly)
+	# one A.I. per color, since transposition table scores are from the point of view of the A.I.
+	strategies = {RED: Connect4Strategy(RED, randomSeed=0), YELLOW: Connect4Strategy(YELLOW, randomSeed=0)}
+	records = []
+	startTime = time.time()
+	for key, (bitboard, colorToMove) in positions.items():
+		print('\r%d/%d positions searched (%ds)' % (len(records), len(positions), time.time() - startTime), end='')
+		move, score = strategies[colorToMove].searchBitboard(bitboard, searchDepth)
+		if bitboard.canonicalKey()[1]:
+			move = NUM_COLS - 1 - move  # the book stores the move for the position whose key is used
+		records.append((key, move, score))
+	writeOpeningBook(records, path)
+	print('\r%d positions written to %s (%ds)' % (len(records), path, time.time() - startTime))
+
+
+if __name__ == '__main__':
+	maxPlyArg = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MAX_PLY
+	searchDepthArg = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SEARCH_DEPTH
+	generateOpeningBook(maxPlyArg, searchDepthArg)
@@ -0,0 +1,187 @@
+# Perfect play solver for Connect 4
+# Finds the game-theoretic value of a position instead of a heuristic score. The search is a
+# negamax that is only ever run with null windows (beta = alpha + 1), narrowing down the range
+# the true score can be in until it is known, the same way MTD(f) does.
+#
+# Scores are from the point of view of the player to move:
+#   positive: the player to move wins; the score is 1 + the number of their pieces left unplayed
+#             after their winning move (so faster wins score higher)
+#   zero:     the game is a draw with perfect play
+#   negative: the opponent wins; the score is minus the opponent's score after it is their turn
+from array import array
+from connect4.connect4_bitboard import NUM_ROWS, NUM_COLS, COLUMN_HEIGHT, BOTTOM_ROW_MASK, FULL_BOARD_MASK, \
+	bitIndex
+
+NUM_SPOTS = NUM_ROWS * NUM_COLS
+MIN_SCORE = -NUM_SPOTS // 2 + 3
+MAX_SCORE = (NUM_SPOTS + 1) // 2 - 3
+TABLE_SIZE = (1 << 23) + 9  # prime, so the keys spread evenly over the table. Takes up about 72 MB
+CENTER_OUT_COLUMNS = sorted(range(NUM_COLS), key=lambda c: abs(c - NUM_COLS // 2))
+COLUMN_MASKS = [((1 << NUM_ROWS) - 1) << bitIndex(0, c) for c in range(NUM_COLS)]
+
+
+def winningSpots(position, mask):
+	"""Gets the mask of the empty spots that would give the player with the given pieces four in a row"""
+	# vertical
+	spots = (position << 1) & (position << 2) & (position << 3)
+
+	for shift in [COLUMN_HEIGHT, COLUMN_HEIGHT - 1, COLUMN_HEIGHT + 1]:
+		# horizontal and both diagonals: the empty spot can be at either end of the four, or in the middle
+		pair = (position << shift) & (position << 2 * shift)
+		spots |= pair & (position << 3 * shift)
+		spots |= pair & (position >> shift)
+		pair = (position >> shift) & (position >> 2 * shift)
+		spots |= pair & (position << shift)
+		spots |= pair & (position >> 3 * shift)
+
+	return spots & (FULL_BOARD_MASK ^ mask)
+
+
+def possibleMoves(mask):
+	"""Gets the mask of the lowest empty spot in every column that is not full"""
+	return (mask + BOTTOM_ROW_MASK) & FULL_BOARD_MASK
+
+
+def nonLosingMoves(position, mask):
+	"""
+	Gets the mask of the moves that don't let the opponent win on their next move.
+	Assumes the player to move cannot win right away
+	"""
+	possible = possibleMoves(mask)
+	opponentWins = winningSpots(position ^ mask, mask)
+	forcedMoves = possible & opponentWins
+	if forcedMoves:
+		if forcedMoves & (forcedMoves - 1):
+			# the opponent has two ways to win, so we can't block both
+			return 0
+		possible = forcedMoves  # have to block the opponent
+	return possible & ~(opponentWins >> 1)  # don't play right below a spot the opponent wins with
+
+
+class Connect4Solver:
+	"""
+	Solves Connect 4 positions. The transposition table is kept in two fixed-size arrays (the full
+	keys and the stored bounds), so it never grows, and newer entries simply replace older ones.
+	"""
+
+	def __init__(self):
+		self.tableKeys = array('Q', [0]) * TABLE_SIZE
+		self.tableValues = array('b', [0]) * TABLE_SIZE
+		self.numNodesSearched = 0
+
+	def solve(self, bitboard, colorToMove):
+		"""
+		Gets the score (see the top of this file) of the given Connect4Bitboard
+		with the given color to move
+		"""
+		position = bitboard.pieces[colorToMove]
+		mask = bitboard.filledMask()
+		return self.solvePosition(position, mask, bitboard.numMoves)
+
+	def solveMove(self, bitboard, colorToMove, col):
+		"""Gets the score for the player to move, if they play in the given column"""
+		position = bitboard.pieces[colorToMove]
+		mask = bitboard.filledMask()
+		move = (mask + (1 << bitIndex(0, col))) & COLUMN_MASKS[col]
+		if winningSpots(position, mask) & move:
+			return (NUM_SPOTS + 1 - bitboard.numMoves) // 2
+		return -self.solvePosition(position ^ mask, mask | move, bitboard.numMoves + 1)
+
+	def solvePosition(self, position, mask, numMoves):
+		"""
+		Gets the score of the position where the player to move has the pieces in position,
+		all played pieces are in mask, and numMoves pieces have been played
+		"""
+		if winningSpots(position, mask) & possibleMoves(mask):
+			return (NUM_SPOTS + 1 - numMoves) // 2
+		low = -((NUM_SPOTS - numMoves) // 2)
+		high = (NUM_SPOTS + 1 - numMoves) // 2
+		while low < high:
+			# null window searches tell us if the score is above or below the guess
+			guess = low + (high - low) // 2
+			if guess <= 0 and int(low / 2) < guess:
+				guess = int(low / 2)
+			elif guess >= 0 and high // 2 > guess:
+				guess = high // 2
+			score = self.negamax(position, mask, numMoves, guess, guess + 1)
+			if score <= guess:
+				high = score
+			else:
+				low = score
+		return low
+
+	def negamax(self, position, mask, numMoves, alpha, beta):
+		"""
+		Recursively finds the score of the position, if it is within (alpha, beta).
+		If the true score is <= alpha, returns an upper bound <= alpha.
+		If the true score is >= beta, returns a lower bound >= beta.
+		Assumes the player to move cannot win right away
+		"""
+		self.numNodesSearched += 1
+		nextMoves = nonLosingMoves(position, mask)
+		if nextMoves == 0:
+			# every move lets the opponent win
+			return -((NUM_SPOTS - numMoves) // 2)
+		if numMoves >= NUM_SPOTS - 2:
+			# neither player can win with the last two pieces
+			return 0
+
+		low = -((NUM_SPOTS - 2 - numMoves) // 2)  # the opponent can't win on their next move
+		if alpha < low:
+			alpha = low
+			if alpha >= beta:
+				return alpha
+
+		key = position + mask
+		index = key % TABLE_SIZE
+		high = (NUM_SPOTS - 1 - numMoves) // 2  # we can't win on this move
+		if self.tableKeys[index] == key:
+			value = self.tableValues[index]
+			if value > MAX_SCORE - MIN_SCORE + 1:
+				# lower bound
+				low = value + 2 * MIN_SCORE - MAX_SCORE - 2
+				if alpha < low:
+					alpha = low
+					if alpha >= beta:
+						return alpha
+			else:
+				# upper bound
+				high = value + MIN_SCORE - 1
+		if beta > high:
+			beta = high
+			if alpha >= beta:
+				return beta
+
+		# search the moves that create the most ways to win first, with ties going to the center
+		orderedMoves = []
+		for col in CENTER_OUT_COLUMNS:
+			move = nextMoves & COLUMN_MASKS[col]
+			if move:
+				orderedMoves.append((-winningSpots(position | move, mask).bit_count(), len(orderedMoves), move))
+		orderedMoves.sort()
+
+		for _, __, move in orderedMoves:
+			score = -self.negamax(position ^ mask, mask | move, numMoves + 1, -beta, -alpha)
+			if score >= beta:
+				self.tableKeys[index] = key
+				self.tableValues[index] = score + MAX_SCORE - 2 * MIN_SCORE + 2
+				return score
+			if score > alpha:
+				alpha = score
+
+		self.tableKeys[index] = key
+		self.tableValues[index] = alpha - MIN_SCORE + 1
+		return alpha
+
+
+def movesUntilGameOver(score, numMoves):
+	"""
+	Converts a solver score for the player to move after numMoves pieces have been played
+	into the number of moves (by both players) until the winning piece is played.
+	Returns None for a draw
+	"""
+	if score > 0:
+		return 2 * ((NUM_SPOTS + 1 - numMoves) // 2 - score) + 1
+	elif score < 0:
+		return 2 * ((NUM_SPOTS - numMoves) // 2 + score) + 2
+	return None
@@ -3,26 +3,72 @@
 # Contains AI strategy and board manipulation methods
 
 import math  # for infinities
-import random  # for randomizing valid moves list in minimax
+import random  # for randomizing the order of the moves at the top of the search
 from connect4.connect4_player import Connect4Player  # super class
+from connect4.connect4_bitboard import Connect4Bitboard, WINDOW_MASKS, CENTER_COLUMN_MASK, WINDOWS_THROUGH_SPOT
+from connect4.connect4_solver import Connect4Solver
+from connect4.connect4_opening_book import Connect4OpeningBook
 
 EMPTY, RED, YELLOW = '.', 'o', '@'
 NUM_ROWS, NUM_COLS = 6, 7
 MAX_DEPTH = 6  # max number of moves ahead to calculate
+USE_BITBOARD = True  # search on a bitboard instead of the list of lists board
+BITBOARD_MAX_DEPTH = 11  # max number of moves ahead to calculate when searching on the bitboard
+TRANSPOSITION_TABLE_MAX_SIZE = 2000000  # the table is cleared if it grows past this many positions
+USE_OPENING_BOOK = True  # play the move stored in the opening book, if the position is in it
+USE_SOLVER = True  # play perfectly once there are few enough empty spots left
+SOLVER_MAX_EMPTY_SPOTS = 24  # most empty spots for which the solver is used instead of the heuristic search
+ASPIRATION_WINDOW = 40  # how far from the previous depth's score a column's score is first searched for
+RANDOMIZE_ROOT_MOVES = True  # shuffle the moves at the top of the search, so equally good moves are picked at random
 MAX, MIN = True, False  # to be used in minimax
 WIN_SCORE = 1000000  # large enough to always be the preferred outcome
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2  # how a score stored in the transposition table relates to the true score
+CENTER_OUT_COLUMNS = sorted(range(NUM_COLS), key=lambda c: abs(c - NUM_COLS // 2))  # 3, 2, 4, 1, 5, 0, 6
 
 
 # class for the A.I.
 class Connect4Strategy(Connect4Player):
 
-	def __init__(self, color):
+	def __init__(self, color, randomSeed=None):
 		super().__init__(color)
 		self.AI_COLOR = color
 		self.HUMAN_COLOR = opponentOf(color)
+		# only used to shuffle the moves at the top of the search, so that node counts are
+		# reproducible when RANDOMIZE_ROOT_MOVES is off or a seed is given
+		self.rootRandom = random.Random(randomSeed) if RANDOMIZE_ROOT_MOVES else None
+		self.numNodesSearched = 0
+		# TRANSPOSITION_TABLE maps the key of a bitboard (see Connect4Bitboard.canonicalKey) to a tuple of
+		# (depth searched below it, bound type, score, best move). Scores are always from the AI's point
+		# of view, so the table is kept between depth searches and between turns of the same game.
+		# A position and its mirror image share an entry, with the best move stored for the one whose key is used.
+		self.TRANSPOSITION_TABLE = {}
+		# KILLER_MOVES holds, for each depth, the last two moves that caused pruning at that depth.
+		# HISTORY_SCORES holds, for each color, how much pruning playing in each spot (bit index) has
+		# caused so far in this search. Both are reset at the start of every search.
+		self.KILLER_MOVES = []
+		self.HISTORY_SCORES = {}
+		self.resetMoveOrderingTables()
+		self.evaluator = None  # Connect4Evaluator for the bitboard being searched
+		self.solver = None  # Connect4Solver, created the first time it is needed since its table is large
+		self.openingBook = None  # Connect4OpeningBook, opened the first time it is needed
+
+	def resetMoveOrderingTables(self, maxDepth=BITBOARD_MAX_DEPTH):
+		"""Clears the killer moves and history scores"""
+		self.KILLER_MOVES = [[] for _ in range(maxDepth + 1)]
+		self.HISTORY_SCORES = {RED: [0] * (NUM_COLS * (NUM_ROWS + 1)), YELLOW: [0] * (NUM_COLS * (NUM_ROWS + 1))}
 
 	def getMove(self, board):
 		"""Calculates the best move for the AI for the given board"""
+		self.numNodesSearched = 0
+		if USE_BITBOARD:
+			bitboard = Connect4Bitboard(board)
+			if USE_OPENING_BOOK:
+				bookMove = self.getOpeningBookMove(bitboard)
+				if bookMove is not None:
+					return bookMove
+			if USE_SOLVER and NUM_ROWS * NUM_COLS - bitboard.numMoves <= SOLVER_MAX_EMPTY_SPOTS:
+				return self.getSolvedMove(bitboard)
+			return self.getMoveFromBitboard(bitboard)
 		move, score = -123, -123  # placeholders
 		for i in range(1, MAX_DEPTH + 1):  # iterative deepening
 			# this will prioritize game winning move sequences that finish in less moves
@@ -36,8 +82,8 @@ class Connect4Strategy(Connect4Player):
 		Recursively finds the best move for a given board
 		Returns the column in [0] and score of the board in [1]
 		"""
-		validMoves = getValidMoves(board)
-		random.shuffle(validMoves)
+		self.numNodesSearched += 1
+		validMoves = [c for c in CENTER_OUT_COLUMNS if isValidMove(board, c)]
 		gameOver, winner = checkIfGameOver(board)
 		if gameOver:
 			if winner == self.AI_COLOR:
@@ -82,6 +128,302 @@ class Connect4Strategy(Connect4Player):
 					break  # pruning
 			return bestMoveForHuman, score
 
+	def getSolvedMove(self, bitboard):
+		"""Finds the move with the best game-theoretic score, using the perfect play solver"""
+		if self.solver is None:
+			self.solver = Connect4Solver()
+		self.solver.numNodesSearched = 0
+		bestMove, bestScore = None, -math.inf
+		for move in CENTER_OUT_COLUMNS:
+			if bitboard.isValidMove(move):
+				score = self.solver.solveMove(bitboard, self.AI_COLOR, move)
+				if score > bestScore:
+					bestMove, bestScore = move, score
+		self.numNodesSearched = self.solver.numNodesSearched
+		return bestMove
+
+	def getOpeningBookMove(self, bitboard):
+		"""Gets the move stored in the opening book for the given bitboard, or None if it isn't in the book"""
+		if self.openingBook is None:
+			self.openingBook = Connect4OpeningBook()
+		bookEntry = self.openingBook.lookup(bitboard)
+		if bookEntry is None:
+			return None
+		return bookEntry[0]
+
+	def getMoveFromBitboard(self, bitboard):
+		"""Calculates the best move for the AI for the given bitboard"""
+		return self.searchBitboard(bitboard, BITBOARD_MAX_DEPTH)[0]
+
+	def searchBitboard(self, bitboard, maxDepth):
+		"""
+		Searches the given bitboard up to maxDepth moves ahead
+		Returns the column in [0] and score of the board in [1]
+		"""
+		if len(self.TRANSPOSITION_TABLE) > TRANSPOSITION_TABLE_MAX_SIZE:
+			self.TRANSPOSITION_TABLE.clear()
+		self.resetMoveOrderingTables(maxDepth)
+		self.evaluator = Connect4Evaluator(bitboard, self.AI_COLOR)
+		move, score = -123, -123  # placeholders
+		for i in range(1, maxDepth + 1):  # iterative deepening
+			# this will prioritize game winning move sequences that finish in less moves
+			move, score = self.bitboardMinimax(bitboard, 0, MAX, -math.inf, math.inf, i)
+			if score == WIN_SCORE:
+				break
+		return move, score
+
+	def getColumnScores(self, board, maxDepth=BITBOARD_MAX_DEPTH):
+		"""
+		Scores every valid column for the AI, instead of only finding the best one
+		Returns a dictionary mapping each valid column to a tuple of
+		(score, principal variation), where the principal variation is the list of
+		columns both players are expected to play, starting with the column itself
+		"""
+		bitboard = Connect4Bitboard(board)
+		if len(self.TRANSPOSITION_TABLE) > TRANSPOSITION_TABLE_MAX_SIZE:
+			self.TRANSPOSITION_TABLE.clear()
+		self.numNodesSearched = 0
+		self.resetMoveOrderingTables(maxDepth)
+		self.evaluator = Connect4Evaluator(bitboard, self.AI_COLOR)
+		scores = {}
+		searchDepths = {}
+		for i in range(1, maxDepth + 1):  # iterative deepening
+			for col in CENTER_OUT_COLUMNS:
+				if not bitboard.isValidMove(col) or abs(scores.get(col, 0)) == WIN_SCORE:
+					continue  # the game has already been decided after this column
+				self.performBitboardMove(bitboard, col, self.AI_COLOR)
+				scores[col] = self.aspirationSearch(bitboard, i, scores.get(col))
+				searchDepths[col] = i
+				self.undoBitboardMove(bitboard, col, self.AI_COLOR)
+
+		columnScores = {}
+		for col, score in scores.items():
+			columnScores[col] = (score, self.getPrincipalVariation(bitboard, col, searchDepths[col]))
+		return columnScores
+
+	def aspirationSearch(self, bitboard, localMaxDepth, previousScore):
+		"""
+		Searches the position after the AI's move with a narrow window around the score from the
+		previous depth, and only widens the window if the true score turns out to be outside of it
+		"""
+		if previousScore is None:
+			alpha, beta = -math.inf, math.inf
+		else:
+			alpha, beta = previousScore - ASPIRATION_WINDOW, previousScore + ASPIRATION_WINDOW
+		while True:
+			_, score = self.bitboardMinimax(bitboard, 1, MIN, alpha, beta, localMaxDepth)
+			if score <= alpha:
+				alpha = -math.inf
+			elif score >= beta:
+				beta = math.inf
+			else:
+				return score
+
+	def getPrincipalVariation(self, bitboard, col, maxLength):
+		"""Follows the best moves stored in the transposition table from the position after the given column"""
+		variation = [col]
+		color = self.AI_COLOR
+		bitboard.performMove(col, color)
+		while len(variation) < maxLength and not bitboard.isWinner(color) and not bitboard.isFull():
+			key, isMirrored = bitboard.canonicalKey()
+			if key not in self.TRANSPOSITION_TABLE:
+				break
+			move = self.TRANSPOSITION_TABLE[key][3]
+			if isMirrored:
+				move = NUM_COLS - 1 - move
+			color = opponentOf(color)
+			bitboard.performMove(move, color)
+			variation.append(move)
+		for move in reversed(variation):
+			bitboard.undoMove(move, color)
+			color = opponentOf(color)
+		return variation
+
+	def bitboardMinimax(self, bitboard, depth, maxOrMin, alpha, beta, localMaxDepth):
+		"""
+		Same as minimax, but plays and undoes moves in place on a Connect4Bitboard
+		Returns the column in [0] and score of the board in [1]
+		"""
+		self.numNodesSearched += 1
+		# only the player who just moved can have won
+		if maxOrMin == MAX and bitboard.isWinner(self.HUMAN_COLOR):
+			return None, -1 * WIN_SCORE
+		elif maxOrMin == MIN and bitboard.isWinner(self.AI_COLOR):
+			return None, WIN_SCORE
+		elif bitboard.isFull():
+			# no winner
+			return None, 0
+		if depth == localMaxDepth:
+			return None, self.evaluator.score
+
+		remainingDepth = localMaxDepth - depth
+		key, isMirrored = bitboard.canonicalKey()
+		tableMove = None
+		if key in self.TRANSPOSITION_TABLE:
+			tableDepth, boundType, tableScore, tableMove = self.TRANSPOSITION_TABLE[key]
+			if isMirrored:
+				tableMove = NUM_COLS - 1 - tableMove
+			if tableDepth >= remainingDepth:
+				# the stored search went at least as deep as this one would
+				if boundType == EXACT:
+					return tableMove, tableScore
+				elif boundType == LOWER_BOUND:
+					alpha = max(alpha, tableScore)
+				else:
+					beta = min(beta, tableScore)
+				if alpha >= beta:
+					return tableMove, tableScore
+		originalAlpha, originalBeta = alpha, beta
+
+		if maxOrMin == MAX:
+			# want to maximize this move
+			validMoves = self.orderBitboardMoves(bitboard, depth, self.AI_COLOR, tableMove)
+			score = -math.inf
+			bestMove = validMoves[0]  # default best move
+			for move in validMoves:
+				self.performBitboardMove(bitboard, move, self.AI_COLOR)
+				_, updatedScore = self.bitboardMinimax(bitboard, depth + 1, MIN, alpha, beta, localMaxDepth)
+				self.undoBitboardMove(bitboard, move, self.AI_COLOR)
+				if updatedScore > score:
+					score = updatedScore
+					bestMove = move
+				alpha = max(alpha, score)
+				if alpha >= beta:
+					self.recordCutoff(bitboard, depth, self.AI_COLOR, move, remainingDepth)
+					break  # pruning
+			self.storeInTranspositionTable(key, isMirrored, remainingDepth, score, originalAlpha, originalBeta, bestMove)
+			return bestMove, score
+		else:
+			# want to minimize this move
+			validMoves = self.orderBitboardMoves(bitboard, depth, self.HUMAN_COLOR, tableMove)
+			score = math.inf
+			bestMoveForHuman = validMoves[0]
+			for move in validMoves:
+				self.performBitboardMove(bitboard, move, self.HUMAN_COLOR)
+				_, updatedScore = self.bitboardMinimax(bitboard, depth + 1, MAX, alpha, beta, localMaxDepth)
+				self.undoBitboardMove(bitboard, move, self.HUMAN_COLOR)
+				if updatedScore < score:
+					score = updatedScore
+					bestMoveForHuman = move
+				beta = min(beta, score)
+				if beta <= alpha:
+					self.recordCutoff(bitboard, depth, self.HUMAN_COLOR, move, remainingDepth)
+					break  # pruning
+			self.storeInTranspositionTable(key, isMirrored, remainingDepth, score, originalAlpha, originalBeta, bestMoveForHuman)
+			return bestMoveForHuman, score
+
+	def performBitboardMove(self, bitboard, move, color):
+		"""Plays the move on the bitboard, and updates the evaluator to match"""
+		self.evaluator.addPiece(bitboard.heights[move], color)
+		bitboard.performMove(move, color)
+
+	def undoBitboardMove(self, bitboard, move, color):
+		"""Undoes the move on the bitboard, and updates the evaluator to match"""
+		bitboard.undoMove(move, color)
+		self.evaluator.removePiece(bitboard.heights[move], color)
+
+	def orderBitboardMoves(self, bitboard, depth, color, tableMove):
+		"""
+		Orders the valid moves so that the ones most likely to cause pruning are searched first:
+		the best move stored in the transposition table, then the killer moves for this depth,
+		then the rest by history score, with ties going to the columns closest to the center
+		"""
+		historyScores = self.HISTORY_SCORES[color]
+		heights = bitboard.heights
+		validMoves = [c for c in CENTER_OUT_COLUMNS if bitboard.isValidMove(c)]
+		validMoves.sort(key=lambda c: -historyScores[heights[c]])  # stable, so center-out order breaks ties
+		if depth == 0 and self.rootRandom is not None:
+			self.rootRandom.shuffle(validMoves)
+		for killerMove in reversed(self.KILLER_MOVES[depth]):
+			if killerMove in validMoves:
+				validMoves.remove(killerMove)
+				validMoves.insert(0, killerMove)
+		if tableMove is not None:
+			validMoves.remove(tableMove)
+			validMoves.insert(0, tableMove)
+		return validMoves
+
+	def recordCutoff(self, bitboard, depth, color, move, remainingDepth):
+		"""Updates the killer moves and history scores after the given move caused pruning"""
+		killerMoves = self.KILLER_MOVES[depth]
+		if move not in killerMoves:
+			killerMoves.insert(0, move)
+			del killerMoves[2:]
+		# the move has already been undone, so the column height is the spot the move was played in
+		self.HISTORY_SCORES[color][bitboard.heights[move]] += remainingDepth * remainingDepth
+
+	def storeInTranspositionTable(self, key, isMirrored, remainingDepth, score, alpha, beta, bestMove):
+		"""
+		Saves the result of searching a bitboard. alpha and beta are the bounds the search started with,
+		which determine whether the score is exact or only a bound on the true score
+		"""
+		if score <= alpha:
+			boundType = UPPER_BOUND
+		elif score >= beta:
+			boundType = LOWER_BOUND
+		else:
+			boundType = EXACT
+		if isMirrored:
+			bestMove = NUM_COLS - 1 - bestMove
+		self.TRANSPOSITION_TABLE[key] = (remainingDepth, boundType, score, bestMove)
+
+
+class Connect4Evaluator:
+	"""
+	Keeps the score that scoreBitboard would give a bitboard up to date as pieces are added and removed.
+	Stores the number of each color's pieces in every length 4 section, so a move only has to
+	rescore the (at most 16) sections that pass through the spot it was played in.
+	"""
+
+	def __init__(self, bitboard, color):
+		"""Builds the section counts for the given bitboard, scored from the point of view of the given color"""
+		self.color = color
+		self.myCounts = [0] * len(WINDOW_MASKS)
+		self.oppCounts = [0] * len(WINDOW_MASKS)
+		self.score = 0
+		for bitPos in range(NUM_COLS * (NUM_ROWS + 1)):
+			bit = 1 << bitPos
+			if bitboard.pieces[color] & bit:
+				self.addPiece(bitPos, color)
+			elif bitboard.pieces[opponentOf(color)] & bit:
+				self.addPiece(bitPos, opponentOf(color))
+
+	def addPiece(self, bitPos, color):
+		"""Updates the score for a piece of the given color being placed at the given bit index"""
+		myCounts, oppCounts = self.myCounts, self.oppCounts
+		score = self.score
+		if color == self.color:
+			if CENTER_COLUMN_MASK >> bitPos & 1:
+				score += 2
+			for w in WINDOWS_THROUGH_SPOT[bitPos]:
+				numMyColor, numOppColor = myCounts[w], oppCounts[w]
+				score += SECTION_SCORES[numMyColor + 1][numOppColor] - SECTION_SCORES[numMyColor][numOppColor]
+				myCounts[w] = numMyColor + 1
+		else:
+			for w in WINDOWS_THROUGH_SPOT[bitPos]:
+				numMyColor, numOppColor = myCounts[w], oppCounts[w]
+				score += SECTION_SCORES[numMyColor][numOppColor + 1] - SECTION_SCORES[numMyColor][numOppColor]
+				oppCounts[w] = numOppColor + 1
+		self.score = score
+
+	def removePiece(self, bitPos, color):
+		"""Updates the score for a piece of the given color being removed from the given bit index"""
+		myCounts, oppCounts = self.myCounts, self.oppCounts
+		score = self.score
+		if color == self.color:
+			if CENTER_COLUMN_MASK >> bitPos & 1:
+				score -= 2
+			for w in WINDOWS_THROUGH_SPOT[bitPos]:
+				numMyColor, numOppColor = myCounts[w], oppCounts[w]
+				score += SECTION_SCORES[numMyColor - 1][numOppColor] - SECTION_SCORES[numMyColor][numOppColor]
+				myCounts[w] = numMyColor - 1
+		else:
+			for w in WINDOWS_THROUGH_SPOT[bitPos]:
+				numMyColor, numOppColor = myCounts[w], oppCounts[w]
+				score += SECTION_SCORES[numMyColor][numOppColor - 1] - SECTION_SCORES[numMyColor][numOppColor]
+				oppCounts[w] = numOppColor - 1
+		self.score = score
+
 
 def scoreBoard(board, color):
 	"""Scores the entire board"""
@@ -124,13 +466,33 @@ def scoreBoard(board, color):
 	return score
 
 
+def scoreBitboard(bitboard, color):
+	"""Scores the entire bitboard, giving the same result as scoreBoard does for the list board"""
+	myPieces = bitboard.pieces[color]
+	oppPieces = bitboard.pieces[opponentOf(color)]
+
+	# Give a slight bonus to pieces in the center column
+	score = 2 * (myPieces & CENTER_COLUMN_MASK).bit_count()
+
+	for mask in WINDOW_MASKS:
+		numMyColor = (myPieces & mask).bit_count()
+		numOppColor = (oppPieces & mask).bit_count()
+		score += scoreSectionCounts(numMyColor, numOppColor, 4 - numMyColor - numOppColor)
+
+	return score
+
+
 def scoreSection(section, color):
 	"""Looks at the given length 4 section and scores it"""
 	opponentColor = opponentOf(color)
 	numMyColor = section.count(color)
 	numOppColor = section.count(opponentColor)
 	numEmpty = section.count(EMPTY)
+	return scoreSectionCounts(numMyColor, numOppColor, numEmpty)
+
 
+def scoreSectionCounts(numMyColor, numOppColor, numEmpty):
+	"""Scores a length 4 section given the number of each type of piece in it"""
 	if numMyColor == 4:
 		return WIN_SCORE
 	elif numMyColor == 3 and numEmpty == 1:
@@ -145,6 +507,11 @@ def scoreSection(section, color):
 		return 0
 
 
+# SECTION_SCORES[numMyColor][numOppColor] is the score of a length 4 section with that many of each piece
+SECTION_SCORES = [[scoreSectionCounts(mine, opp, 4 - mine - opp) if mine + opp <= 4 else 0 for opp in range(5)]
+				  for mine in range(5)]
+
+
 def findWinner(board):
 	"""
     Checks if there is a winner
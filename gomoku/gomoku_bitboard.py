@@ -0,0 +1,137 @@
+# Per-line bitboards for the Gomoku A.I.
+# Every line of the board (rows, columns and both diagonals) is stored as one integer per color, with a bit
+# set for every spot of the line that has a piece of that color. A spot is on one line in each direction, so
+# playing a piece only sets 4 bits per color, and questions about the spots near a move (is there five in a
+# row, what is within 4 spots in each direction) are answered with a few shifts and masks of those 4 lines.
+# None of this depends on the size of the board, so bigger boards cost no more per move than small ones.
+from gomoku.gomoku_patterns import PIECE_CODES
+
+EMPTY, BLACK, WHITE = '.', 'X', 'O'
+# same order as GomokuStrategy.createRayTables, with the bits of each line going in the direction of the vector
+DIRECTION_VECTORS = [[1, -1], [1, 0], [1, 1], [0, 1]]
+WINDOW_REACH = 4  # spots on each side of a spot in its windows
+WINDOW_MASK = (1 << (2 * WINDOW_REACH + 1)) - 1
+
+
+def hasFiveInARow(bits):
+	"""Checks if a line's bits have 5 set in a row"""
+	pairs = bits & (bits >> 1)
+	return pairs & (pairs >> 2) & (bits >> 4) != 0
+
+
+def createLineTables(dimension):
+	"""
+	Finds every line of a board of the given dimension, in every direction
+	Returns the length of each line in [0], and for each spot, a (line index, bit of the spot in the line,
+	on board mask of the spot's window) tuple for each direction in [1]. The window is the spots
+	up to WINDOW_REACH away in the direction
+	"""
+	lineLengths = []
+	linesThroughSpot = [[None] * 4 for _ in range(dimension * dimension)]
+	for direction, (rowStep, colStep) in enumerate(DIRECTION_VECTORS):
+		for row in range(dimension):
+			for col in range(dimension):
+				if 0 <= row - rowStep < dimension and 0 <= col - colStep < dimension:
+					continue  # not the first spot of a line
+				lineIndex = len(lineLengths)
+				length = 0
+				while 0 <= row + length * rowStep < dimension and 0 <= col + length * colStep < dimension:
+					length += 1
+				for bit in range(length):
+					onBoardWindow = (((1 << length) - 1) << WINDOW_REACH >> bit) & WINDOW_MASK
+					spot = (row + bit * rowStep) * dimension + col + bit * colStep
+					linesThroughSpot[spot][direction] = (lineIndex, bit, onBoardWindow)
+				lineLengths.append(length)
+	return lineLengths, linesThroughSpot
+
+
+class GomokuBitboard:
+	"""
+	Keeps the line bits of each color up to date as pieces are played and removed.
+	Spots are stored by index (row * dimension + col), and colors by their piece code (see gomoku_patterns.py)
+	"""
+	lineTablesByDimension = {}  # the tables from createLineTables, shared by every bitboard of the same size
+
+	def __init__(self, board):
+		"""Sets up the lines for the given board"""
+		dimension = len(board)
+		self.dimension = dimension
+		if dimension not in GomokuBitboard.lineTablesByDimension:
+			GomokuBitboard.lineTablesByDimension[dimension] = createLineTables(dimension)
+		self.lineLengths, self.linesThroughSpot = GomokuBitboard.lineTablesByDimension[dimension]
+		# lines[code][line index] is the bits of that color's pieces in the line
+		self.lines = [None, [0] * len(self.lineLengths), [0] * len(self.lineLengths)]
+		self.numPieces = 0
+		for row in range(dimension):
+			for col in range(dimension):
+				if board[row][col] != EMPTY:
+					self.play(row * dimension + col, PIECE_CODES[board[row][col]])
+
+	def play(self, spot, code):
+		"""Sets the spot's bit in each of its lines for the color"""
+		colorLines = self.lines[code]
+		for lineIndex, bit, _ in self.linesThroughSpot[spot]:
+			colorLines[lineIndex] |= 1 << bit
+		self.numPieces += 1
+
+	def undo(self, spot, code):
+		"""Clears the spot's bit in each of its lines for the color"""
+		colorLines = self.lines[code]
+		for lineIndex, bit, _ in self.linesThroughSpot[spot]:
+			colorLines[lineIndex] &= ~(1 << bit)
+		self.numPieces -= 1
+
+	def isFive(self, spot, code):
+		"""Checks if the color has five in a row through the spot"""
+		colorLines = self.lines[code]
+		for lineIndex, _, __ in self.linesThroughSpot[spot]:
+			if hasFiveInARow(colorLines[lineIndex]):
+				return True
+		return False
+
+	def isFull(self):
+		"""Checks if every spot on the board has a piece"""
+		return self.numPieces == self.dimension * self.dimension
+
+	def windowKeys(self, spot):
+		"""
+		Gets a key for the contents of the spots up to WINDOW_REACH away from the spot, in each direction.
+		Bit i of each part of the key is the spot i - WINDOW_REACH steps along the direction from it.
+		The key is the black bits, then the white bits, then the bits of the window that are on the board
+		"""
+		blackLines, whiteLines = self.lines[PIECE_CODES[BLACK]], self.lines[PIECE_CODES[WHITE]]
+		keys = []
+		for lineIndex, bit, onBoardWindow in self.linesThroughSpot[spot]:
+			blackWindow = (blackLines[lineIndex] << WINDOW_REACH >> bit) & WINDOW_MASK
+			whiteWindow = (whiteLines[lineIndex] << WINDOW_REACH >> bit) & WINDOW_MASK
+			keys.append(blackWindow | (whiteWindow << 9) | (onBoardWindow << 18))
+		return keys
+
+
+def windowSpots(windowKey):
+	"""
+	Turns a key from GomokuBitboard.windowKeys back into the pieces in each direction from the spot
+	Returns the forward pieces in [0] and the backward pieces in [1], each going outward and stopping at the edge of the board
+	"""
+	blackWindow, whiteWindow, onBoardWindow = windowKey & WINDOW_MASK, (windowKey >> 9) & WINDOW_MASK, windowKey >> 18
+
+	def pieceAt(i):
+		"""Gets the piece in bit i of the window, or None if it is off the board"""
+		if not (onBoardWindow >> i) & 1:
+			return None
+		if (blackWindow >> i) & 1:
+			return BLACK
+		return WHITE if (whiteWindow >> i) & 1 else EMPTY
+
+	forwardSpots, backwardSpots = [], []
+	for distance in range(1, WINDOW_REACH + 1):
+		piece = pieceAt(WINDOW_REACH + distance)
+		if piece is None:
+			break
+		forwardSpots.append(piece)
+	for distance in range(1, WINDOW_REACH + 1):
+		piece = pieceAt(WINDOW_REACH - distance)
+		if piece is None:
+			break
+		backwardSpots.append(piece)
+	return forwardSpots, backwardSpots
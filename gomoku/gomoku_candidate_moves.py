@@ -0,0 +1,123 @@
+# Incrementally maintained set of candidate moves for the Gomoku A.I.
+# GomokuStrategy.getValidMoves only considers the empty spots within MAX_NEIGHBOR_DIST of a piece.
+# Instead of scanning the whole board for pieces at every node of the search, this keeps, for every
+# spot, how many pieces are at each distance from it, and updates only the spots around a move when
+# it is played or undone. It also caches the heuristic priority of each candidate (see
+# GomokuStrategy.scoreMovePotential), which only changes when a piece is played on one of the lines
+# through the candidate, close enough for the heuristic to see it.
+
+DIRECTION_VECTORS = [[1, -1], [1, 0], [1, 1], [0, 1]]
+PRIORITY_REACH = 4  # how far along each line scoreMovePotential looks from a move
+
+
+def createSpotTables(dimension, maxNeighborDist):
+	"""
+	Finds the spots around every spot of a board of the given dimension
+	Returns, for each spot, the (index, distance - 1) of every spot within maxNeighborDist of it in [0],
+	and the indices of the spots whose priority can change when a piece is played there in [1]
+	"""
+	neighborsOfSpot = []
+	spotsInReachOf = []
+	for row in range(dimension):
+		for col in range(dimension):
+			neighbors = []
+			for i in range(-maxNeighborDist, maxNeighborDist + 1):
+				for j in range(-maxNeighborDist, maxNeighborDist + 1):
+					if (i != 0 or j != 0) and 0 <= row + i < dimension and 0 <= col + j < dimension:
+						neighbors.append(((row + i) * dimension + col + j, max(abs(i), abs(j)) - 1))
+			neighborsOfSpot.append(neighbors)
+			inReach = []
+			for rowStep, colStep in DIRECTION_VECTORS:
+				for distance in range(-PRIORITY_REACH, PRIORITY_REACH + 1):
+					r, c = row + rowStep * distance, col + colStep * distance
+					if 0 <= r < dimension and 0 <= c < dimension:
+						inReach.append(r * dimension + c)  # includes the spot itself
+			spotsInReachOf.append(inReach)
+	return neighborsOfSpot, spotsInReachOf
+
+
+class GomokuCandidateMoves:
+	"""
+	Keeps the empty spots near pieces up to date as moves are played and undone on the board.
+	Spots are stored by index (row * dimension + col)
+	"""
+	spotTablesBySize = {}  # the tables from createSpotTables, shared by every instance with the same sizes
+
+	def __init__(self, board, maxNeighborDist):
+		"""Finds the candidates for the given board"""
+		dimension = len(board)
+		self.dimension = dimension
+		self.maxNeighborDist = maxNeighborDist
+		numSpots = dimension * dimension
+		# neighborCounts[d - 1][index] is the number of pieces at distance d from the spot
+		self.neighborCounts = [[0] * numSpots for _ in range(maxNeighborDist)]
+		self.totalNeighborCounts = [0] * numSpots
+		self.filled = [False] * numSpots
+		self.candidates = set()  # indices of the empty spots with at least one piece nearby
+		self.priorities = [None] * numSpots  # cached priority of each spot, None if it has to be recalculated
+		self.priorityHistory = []  # the priorities that each move cleared, so undoing the move can restore them
+
+		if (dimension, maxNeighborDist) not in GomokuCandidateMoves.spotTablesBySize:
+			GomokuCandidateMoves.spotTablesBySize[(dimension, maxNeighborDist)] = createSpotTables(dimension, maxNeighborDist)
+		self.neighborsOfSpot, self.spotsInReachOf = GomokuCandidateMoves.spotTablesBySize[(dimension, maxNeighborDist)]
+
+		for row in range(dimension):
+			for col in range(dimension):
+				if board[row][col] != '.':
+					self.addPiece(row * dimension + col)
+
+	def addPiece(self, index):
+		"""Updates the neighbor counts for a piece being played at the given index"""
+		self.filled[index] = True
+		self.candidates.discard(index)
+		neighborCounts, totalNeighborCounts = self.neighborCounts, self.totalNeighborCounts
+		for neighbor, distanceIndex in self.neighborsOfSpot[index]:
+			neighborCounts[distanceIndex][neighbor] += 1
+			totalNeighborCounts[neighbor] += 1
+			if not self.filled[neighbor]:
+				self.candidates.add(neighbor)
+
+	def removePiece(self, index):
+		"""Updates the neighbor counts for the piece at the given index being removed"""
+		self.filled[index] = False
+		neighborCounts, totalNeighborCounts = self.neighborCounts, self.totalNeighborCounts
+		for neighbor, distanceIndex in self.neighborsOfSpot[index]:
+			neighborCounts[distanceIndex][neighbor] -= 1
+			totalNeighborCounts[neighbor] -= 1
+			if totalNeighborCounts[neighbor] == 0:
+				self.candidates.discard(neighbor)
+		if totalNeighborCounts[index] > 0:
+			self.candidates.add(index)
+
+	def performMove(self, row, col):
+		"""Updates the candidates and clears the priorities that the move could change"""
+		index = row * self.dimension + col
+		priorities = self.priorities
+		clearedPriorities = []
+		for spot in self.spotsInReachOf[index]:
+			if priorities[spot] is not None:
+				clearedPriorities.append((spot, priorities[spot]))
+				priorities[spot] = None
+		self.priorityHistory.append(clearedPriorities)
+		self.addPiece(index)
+
+	def undoMove(self, row, col):
+		"""Updates the candidates, and restores the priorities from before the move was played"""
+		index = row * self.dimension + col
+		self.removePiece(index)
+		priorities = self.priorities
+		for spot in self.spotsInReachOf[index]:
+			priorities[spot] = None  # calculated while the move was on the board
+		for spot, priority in self.priorityHistory.pop():
+			priorities[spot] = priority
+
+	def getCandidatesByDistance(self):
+		"""Gets a list of candidate moves for each distance from the nearest piece, as [row, col] lists"""
+		candidatesByDistance = [[] for _ in range(self.maxNeighborDist)]
+		neighborCounts = self.neighborCounts
+		for index in self.candidates:
+			for distanceIndex in range(self.maxNeighborDist):
+				if neighborCounts[distanceIndex][index]:
+					candidatesByDistance[distanceIndex].append(list(divmod(index, self.dimension)))
+					break
+		return candidatesByDistance
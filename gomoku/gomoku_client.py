@@ -321,6 +321,9 @@ def run():
 	while not gameOver:
 		nameOfCurrentPlayer = playerNames[turn]
 		currentPlayer = players[turn]
+		if not AI_DUEL_MODE:
+			# the A.I. keeps searching while it waits for the user
+			players[opponentPiece].startPondering(gameBoard, turn)
 		if currentPlayer.isAI:
 			userInput = input(f"{nameOfCurrentPlayer}'s turn, press enter for it to play.\t").strip().upper()
 			erasePreviousLines(1)
@@ -352,6 +355,8 @@ def run():
 		print("%s played in spot %s%s\n" % (nameOfCurrentPlayer, moveFormatted, timeTakenOutputStr))
 		turn = opponentOf(turn)
 		gameOver, winner = players[opponentPiece].isTerminal(gameBoard)
+	if not AI_DUEL_MODE:
+		players[opponentPiece].stopPondering()
 
 	if winner is None:
 		print("Nobody wins, it's a tie!")
@@ -0,0 +1,181 @@
+# Incremental section scoring for the Gomoku A.I.
+# GomokuStrategy.scoreSections scans every length 5 and length 6 section of the board, which is
+# slow to do at every leaf of the search. A move only changes the 4 lines (row, column and both
+# diagonals) that go through it, so this keeps the threat scores of every line cached, and only
+# rescores those 4 lines when a piece is played or removed. Leaf evaluation then just adds up
+# the cached totals. Lines are stored as integer codes (see gomoku_patterns.py), so playing a piece
+# is a single addition to each line's code.
+
+from gomoku.gomoku_patterns import PIECE_CODES, BITS_PER_SPOT, SECTION_5_MASK, SECTION_6_MASK
+
+EMPTY, BLACK, WHITE = '.', 'X', 'O'
+# directions of the lines, in the same order as the trap indicators in GomokuStrategy.scoreSections
+HORIZONTAL, VERTICAL, DIAGONAL_DOWN, DIAGONAL_UP = 0, 1, 2, 3
+# which sections of a line are scored
+FULL_LINE = 0  # every length 6 and length 5 section
+NO_LAST_SECTION = 1  # every section except the last length 5 one (scoreSections skips these on some diagonals)
+CORNER_LINE = 2  # the length 5 diagonals in the corners, where 3 piece traps count for half
+
+
+def createLines(dimension):
+	"""
+	Finds every line on the board that scoreSections looks at
+	Returns a list of (list of [row, col] spots, direction, line type) tuples
+	"""
+	lines = []
+	for r in range(dimension):
+		lines.append(([[r, c] for c in range(dimension)], HORIZONTAL, FULL_LINE))
+	for c in range(dimension):
+		lines.append(([[r, c] for r in range(dimension)], VERTICAL, FULL_LINE))
+
+	# diagonals from top left to bottom right, where row - col is the same for every spot
+	for difference in range(-(dimension - 5), dimension - 4):
+		startRow, startCol = max(difference, 0), max(-difference, 0)
+		spots = [[startRow + i, startCol + i] for i in range(dimension - abs(difference))]
+		lineType = CORNER_LINE if len(spots) == 5 else FULL_LINE
+		lines.append((spots, DIAGONAL_DOWN, lineType))
+
+	# diagonals from bottom left to top right, where row + col is the same for every spot
+	for total in range(4, 2 * dimension - 5):
+		startRow = min(total, dimension - 1)
+		startCol = total - startRow
+		spots = [[startRow - i, startCol + i] for i in range(min(startRow, dimension - 1 - startCol) + 1)]
+		if len(spots) == 5:
+			lineType = CORNER_LINE
+		elif total < dimension - 1:
+			lineType = NO_LAST_SECTION
+		else:
+			lineType = FULL_LINE
+		lines.append((spots, DIAGONAL_UP, lineType))
+	return lines
+
+
+def scoreLine(lineCode, lineLength, lineType, threatTables):
+	"""
+	Scores the sections of a single line (see gomoku_patterns.py for how it is encoded) the same way
+	scoreSections does. threatTables maps each color to its tables from createThreatTables
+	Returns a list of [black score, white score, black threats found, white threats found]
+	"""
+	blackTable5, blackTable6, blackCornerTable = threatTables[BLACK]
+	whiteTable5, whiteTable6, whiteCornerTable = threatTables[WHITE]
+	blackScore, whiteScore, numBlackThreats, numWhiteThreats = 0, 0, 0, 0
+
+	if lineType == CORNER_LINE:
+		blackEntry, whiteEntry = blackCornerTable[lineCode], whiteCornerTable[lineCode]
+		if blackEntry is not None:
+			blackScore += blackEntry[0]
+			numBlackThreats += blackEntry[1]
+		elif whiteEntry is not None:
+			whiteScore += whiteEntry[0]
+			numWhiteThreats += whiteEntry[1]
+		return [blackScore, whiteScore, numBlackThreats, numWhiteThreats]
+
+	numSections = lineLength - 4 if lineType == FULL_LINE else lineLength - 5
+	for i in range(numSections):
+		section = lineCode >> (BITS_PER_SPOT * i)
+		if i < lineLength - 5:
+			# the length 6 section starting here
+			sectionCode = section & SECTION_6_MASK
+			score = blackTable6[sectionCode]
+			if score is not None:
+				blackScore += score
+				numBlackThreats += 1
+			else:
+				score = whiteTable6[sectionCode]
+				if score is not None:
+					whiteScore += score
+					numWhiteThreats += 1
+		# the length 5 section starting here
+		sectionCode = section & SECTION_5_MASK
+		score = blackTable5[sectionCode]
+		if score is not None:
+			blackScore += score
+			numBlackThreats += 1
+		else:
+			score = whiteTable5[sectionCode]
+			if score is not None:
+				whiteScore += score
+				numWhiteThreats += 1
+	return [blackScore, whiteScore, numBlackThreats, numWhiteThreats]
+
+
+class GomokuLineCache:
+	"""
+	Keeps the code and score of every line on the board up to date as moves are played and undone.
+	Line scores are also remembered by the contents of the line, since most lines
+	look the same as many others (mostly empty) during a search
+	"""
+
+	def __init__(self, board, threatTables, positionWeightsMatrix):
+		"""Scores every line of the given board"""
+		self.threatTables = threatTables
+		self.positionWeightsMatrix = positionWeightsMatrix
+		self.scoresByLineContents = {}  # line key (see updateLineScore) -> scoreLine result
+		dimension = len(board)
+		self.lineTypes = []
+		self.lineDirections = []
+		self.lineLengths = []
+		self.lineCodes = []
+		self.lineScores = []
+		# for each spot, the (line index, shift of the spot in the line code) of the lines that go through it
+		self.linesThroughSpot = [[[] for _ in range(dimension)] for _ in range(dimension)]
+		# running totals of the line scores
+		self.sectionScores = {BLACK: 0, WHITE: 0}
+		self.numThreatsPerDirection = {BLACK: [0, 0, 0, 0], WHITE: [0, 0, 0, 0]}
+		self.positionScores = {BLACK: 0, WHITE: 0}
+
+		for spots, direction, lineType in createLines(dimension):
+			lineIndex = len(self.lineCodes)
+			lineCode = 0
+			for indexInLine, (row, col) in enumerate(spots):
+				# stored as the amount to shift a piece code by to put it in this spot of the line
+				self.linesThroughSpot[row][col].append((lineIndex, BITS_PER_SPOT * indexInLine))
+				lineCode |= PIECE_CODES[board[row][col]] << (BITS_PER_SPOT * indexInLine)
+			self.lineTypes.append(lineType)
+			self.lineDirections.append(direction)
+			self.lineLengths.append(len(spots))
+			self.lineCodes.append(lineCode)
+			self.lineScores.append([0, 0, 0, 0])
+			self.updateLineScore(lineIndex)
+
+		for row in range(dimension):
+			for col in range(dimension):
+				if board[row][col] != EMPTY:
+					self.positionScores[board[row][col]] += positionWeightsMatrix[row][col]
+
+	def updateLineScore(self, lineIndex):
+		"""Rescores a line after it has changed, and updates the totals"""
+		lineCode, lineLength, lineType = self.lineCodes[lineIndex], self.lineLengths[lineIndex], self.lineTypes[lineIndex]
+		key = (lineCode << 9) | (lineLength << 2) | lineType  # lines are at most 127 spots long
+		newScore = self.scoresByLineContents.get(key)
+		if newScore is None:
+			newScore = scoreLine(lineCode, lineLength, lineType, self.threatTables)
+			self.scoresByLineContents[key] = newScore
+		oldScore = self.lineScores[lineIndex]
+		direction = self.lineDirections[lineIndex]
+		self.sectionScores[BLACK] += newScore[0] - oldScore[0]
+		self.sectionScores[WHITE] += newScore[1] - oldScore[1]
+		self.numThreatsPerDirection[BLACK][direction] += newScore[2] - oldScore[2]
+		self.numThreatsPerDirection[WHITE][direction] += newScore[3] - oldScore[3]
+		self.lineScores[lineIndex] = newScore
+
+	def changeSpot(self, row, col, codeChange):
+		"""Adds codeChange to the piece code of a single spot, and rescores the lines through it"""
+		lineCodes = self.lineCodes
+		for lineIndex, shift in self.linesThroughSpot[row][col]:
+			lineCodes[lineIndex] += codeChange << shift
+			self.updateLineScore(lineIndex)
+
+	def performMove(self, row, col, color):
+		"""Updates the cached scores for a piece being played"""
+		self.changeSpot(row, col, PIECE_CODES[color])
+		self.positionScores[color] += self.positionWeightsMatrix[row][col]
+
+	def undoMove(self, row, col, color):
+		"""Updates the cached scores for a piece of the given color being removed"""
+		self.changeSpot(row, col, -PIECE_CODES[color])
+		self.positionScores[color] -= self.positionWeightsMatrix[row][col]
+
+	def trapIndicators(self, color):
+		"""Gets the trap indicators for the color, as scoreSections finds them"""
+		return [1 if numThreats > 0 else 0 for numThreats in self.numThreatsPerDirection[color]]
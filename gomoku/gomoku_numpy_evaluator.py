@@ -0,0 +1,163 @@
+# NumPy board evaluation for the Gomoku A.I.
+# Scores boards the same way as GomokuStrategy.scoreBoard, but for many boards at once. Every board is
+# an int8 array of piece codes (see gomoku_patterns.py), and every line that scoreSections looks at is
+# pulled out of it with one gather, padded at the end with a code that never matches a threat. The codes
+# of every length 5 and length 6 section then come from sliding window views, and are looked up in the
+# threat tables in a single step. The last ply of the search uses this to score all the children of a
+# node in one batch, instead of one at a time.
+try:
+	import numpy as np
+except ImportError:  # NumPy is optional, the search scores leaves one at a time without it
+	np = None
+
+from gomoku.gomoku_line_cache import createLines, FULL_LINE, CORNER_LINE
+from gomoku.gomoku_patterns import PIECE_CODES, BITS_PER_SPOT
+
+EMPTY, BLACK, WHITE = '.', 'X', 'O'
+NUMPY_AVAILABLE = np is not None
+OFF_BOARD_CODE = 3  # code of the padding after the end of a line, which no threat contains
+
+
+class GomokuNumpyEvaluator:
+	"""
+	Scores stacks of boards with NumPy. Boards are stored flattened (row * dimension + col),
+	with one extra spot at the end that always holds OFF_BOARD_CODE
+	"""
+
+	def __init__(self, dimension, threatTables, positionWeightsMatrix):
+		"""Creates the gather indices and lookup arrays for boards of the given dimension"""
+		self.dimension = dimension
+		offBoardIndex = dimension * dimension
+		lines = createLines(dimension)
+		# the last line is made up only of padding, and stands in for the missing
+		# line in a direction for spots that aren't on a line in that direction
+		emptyLineIndex = len(lines)
+		self.lineSpots = np.full((len(lines) + 1, dimension), offBoardIndex, dtype=np.intp)
+		# which sections of each line are scored, by the index of their first spot
+		self.scored6 = np.zeros((len(lines) + 1, dimension - 5), dtype=bool)
+		self.scored5 = np.zeros((len(lines) + 1, dimension - 4), dtype=bool)
+		self.isCornerLine = np.zeros(len(lines) + 1, dtype=bool)
+		lineDirections = np.full(len(lines) + 1, -1, dtype=np.intp)
+		# the line in each direction that goes through each spot
+		self.linesThroughSpot = np.full((offBoardIndex, 4), emptyLineIndex, dtype=np.intp)
+		for lineIndex, (spots, direction, lineType) in enumerate(lines):
+			length = len(spots)
+			self.lineSpots[lineIndex, :length] = [row * dimension + col for row, col in spots]
+			for row, col in spots:
+				self.linesThroughSpot[row * dimension + col, direction] = lineIndex
+			lineDirections[lineIndex] = direction
+			if lineType == CORNER_LINE:
+				self.isCornerLine[lineIndex] = True
+			else:
+				self.scored6[lineIndex, :length - 5] = True
+				self.scored5[lineIndex, :length - 4 if lineType == FULL_LINE else length - 5] = True
+		self.linesInDirection = [lineDirections == direction for direction in range(4)]
+		self.shifts6 = np.arange(6, dtype=np.int32) * BITS_PER_SPOT
+		self.shifts5 = np.arange(5, dtype=np.int32) * BITS_PER_SPOT
+
+		# the threat tables as arrays: the score of each section code, and whether it is a threat
+		self.lookupArrays = {}
+		for color in [BLACK, WHITE]:
+			table5, table6, cornerTable = threatTables[color]
+			self.lookupArrays[color] = (
+				np.array([score or 0 for score in table5], dtype=np.int64),
+				np.array([score is not None for score in table5], dtype=bool),
+				np.array([score or 0 for score in table6], dtype=np.int64),
+				np.array([score is not None for score in table6], dtype=bool),
+				np.array([entry[0] if entry else 0 for entry in cornerTable], dtype=np.int64),
+				np.array([entry[1] if entry else False for entry in cornerTable], dtype=bool)
+			)
+		self.positionWeights = np.zeros(offBoardIndex + 1, dtype=np.int64)
+		self.positionWeights[:offBoardIndex] = np.array(positionWeightsMatrix, dtype=np.int64).ravel()
+
+		self.board = np.zeros(offBoardIndex + 1, dtype=np.int8)
+		self.board[offBoardIndex] = OFF_BOARD_CODE
+
+	def encodeBoard(self, board):
+		"""Gets the flattened int8 array for a board"""
+		encodedBoard = np.full(self.dimension * self.dimension + 1, OFF_BOARD_CODE, dtype=np.int8)
+		encodedBoard[:-1] = [PIECE_CODES[spot] for row in board for spot in row]
+		return encodedBoard
+
+	def setBoard(self, board):
+		"""Sets the board that moves are played on and children are scored from"""
+		self.board = self.encodeBoard(board)
+
+	def performMove(self, row, col, color):
+		"""Plays a piece on the evaluator's board"""
+		self.board[row * self.dimension + col] = PIECE_CODES[color]
+
+	def undoMove(self, row, col):
+		"""Removes a piece from the evaluator's board"""
+		self.board[row * self.dimension + col] = PIECE_CODES[EMPTY]
+
+	def scoreLines(self, lineCodes, scored6, scored5, isCornerLine):
+		"""
+		Scores lines given as piece codes, with shape (..., dimension). scored6, scored5 and isCornerLine
+		are the rows of the arrays with the same names for each line
+		Returns dictionaries from each color to the score of each line, and whether it has a threat in it
+		"""
+		lineCodes = lineCodes.astype(np.int32)
+		sectionCodes6 = (np.lib.stride_tricks.sliding_window_view(lineCodes, 6, axis=-1) << self.shifts6).sum(axis=-1)
+		sectionCodes5 = (np.lib.stride_tricks.sliding_window_view(lineCodes, 5, axis=-1) << self.shifts5).sum(axis=-1)
+		cornerCodes = sectionCodes5[..., 0]
+
+		lineScores, lineHasThreat = {}, {}
+		for color in [BLACK, WHITE]:
+			scores5, threats5, scores6, threats6, cornerScores, cornerTraps = self.lookupArrays[color]
+			lineScores[color] = (
+				(scores6[sectionCodes6] * scored6).sum(axis=-1) +
+				(scores5[sectionCodes5] * scored5).sum(axis=-1) +
+				cornerScores[cornerCodes] * isCornerLine
+			)
+			lineHasThreat[color] = (
+				(threats6[sectionCodes6] & scored6).any(axis=-1) |
+				(threats5[sectionCodes5] & scored5).any(axis=-1) |
+				(cornerTraps[cornerCodes] & isCornerLine)
+			)
+		return lineScores, lineHasThreat
+
+	def scoreBoards(self, boards):
+		"""
+		Scores a stack of flattened boards, with shape (number of boards, dimension * dimension + 1)
+		Returns dictionaries from each color to arrays with the section score, the number of directions
+		with a threat in them (the sum of scoreSections' trap indicators), and the position score of each board
+		"""
+		lineScores, lineHasThreat = self.scoreLines(boards[:, self.lineSpots], self.scored6, self.scored5, self.isCornerLine)
+		sectionScores, numTrapDirections, positionScores = {}, {}, {}
+		for color in [BLACK, WHITE]:
+			sectionScores[color] = lineScores[color].sum(axis=1)
+			numTrapDirections[color] = sum(lineHasThreat[color][:, inDirection].any(axis=1) for inDirection in self.linesInDirection)
+			positionScores[color] = (boards == PIECE_CODES[color]) @ self.positionWeights
+		return sectionScores, numTrapDirections, positionScores
+
+	def scoreChildren(self, moves, color):
+		"""
+		Scores every board that comes from playing one of the [row, col] moves for the color on the evaluator's board.
+		Only the 4 lines through each move change, so the board is scored once, and then only those lines are
+		rescored for each child. Returns the same as scoreBoards
+		"""
+		lineScores, lineHasThreat = self.scoreLines(self.board[self.lineSpots], self.scored6, self.scored5, self.isCornerLine)
+
+		moveIndices = np.array([row * self.dimension + col for row, col in moves], dtype=np.intp)
+		boards = np.repeat(self.board[np.newaxis], len(moves), axis=0)
+		boards[np.arange(len(moves)), moveIndices] = PIECE_CODES[color]
+		changedLines = self.linesThroughSpot[moveIndices]  # (children, 4 directions)
+		changedLineCodes = boards[np.arange(len(moves))[:, np.newaxis, np.newaxis], self.lineSpots[changedLines]]
+		newLineScores, newLineHasThreat = self.scoreLines(changedLineCodes, self.scored6[changedLines],
+														  self.scored5[changedLines], self.isCornerLine[changedLines])
+
+		sectionScores, numTrapDirections, positionScores = {}, {}, {}
+		for pieceColor in [BLACK, WHITE]:
+			sectionScores[pieceColor] = (lineScores[pieceColor].sum() - lineScores[pieceColor][changedLines].sum(axis=1) +
+										 newLineScores[pieceColor].sum(axis=1))
+			# number of lines with a threat in each direction, for each child
+			numThreatLines = (self.numLinesPerDirection(lineHasThreat[pieceColor]) -
+							  lineHasThreat[pieceColor][changedLines] + newLineHasThreat[pieceColor])
+			numTrapDirections[pieceColor] = (numThreatLines > 0).sum(axis=1)
+			positionScores[pieceColor] = (boards == PIECE_CODES[pieceColor]) @ self.positionWeights
+		return sectionScores, numTrapDirections, positionScores
+
+	def numLinesPerDirection(self, lineFlags):
+		"""Counts the lines that are flagged in each direction"""
+		return np.array([lineFlags[inDirection].sum() for inDirection in self.linesInDirection])
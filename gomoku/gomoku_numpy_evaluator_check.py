@@ -0,0 +1,150 @@
+# Checks that the NumPy evaluator scores boards exactly the same as GomokuStrategy.scoreBoard
+# The corpus is a list of random boards from 7x7 to 19x19, each with a color to move and some of its moves.
+# For every move, the corpus holds the score scoreBoard gave the board after it, as the leaf of a search with
+# an odd and with an even max depth. The check scores the same leaves with scoreBoard, with the batched
+# scoreLeavesInBatch (GomokuNumpyEvaluator.scoreChildren), and with GomokuNumpyEvaluator.scoreBoards, and
+# reports every leaf where they don't all match the corpus. NumPy is needed to run it.
+# To run the check, or to rebuild the corpus after the evaluation is changed on purpose, run this from the root of the project:
+#   > python3 -m gomoku.gomoku_numpy_evaluator_check
+#   > python3 -m gomoku.gomoku_numpy_evaluator_check --rebuild [numBoards]
+import json
+import os
+import random
+import sys
+import time
+import numpy as np
+from gomoku.gomoku_strategy import GomokuStrategy, THREAT_TABLES, performMove, copyOfBoard, EMPTY, BLACK, WHITE
+from gomoku.gomoku_numpy_evaluator import GomokuNumpyEvaluator
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gomoku_numpy_evaluator_corpus.json")
+DEFAULT_NUM_BOARDS = 240
+BOARD_DIMENSIONS = [7, 9, 11, 13, 15, 19]
+MOVES_PER_BOARD = 16
+MAX_DEPTHS = [1, 2]  # an odd and an even max depth, since the player to move after the leaf changes the score
+
+strategies = {}  # the strategy for each board dimension, with a NumPy evaluator
+
+
+def getStrategy(dimension):
+	"""Gets the strategy (as BLACK) that scores boards of the given dimension"""
+	if dimension not in strategies:
+		strategy = GomokuStrategy(BLACK, dimension)
+		strategy.numpyEvaluator = GomokuNumpyEvaluator(dimension, THREAT_TABLES, strategy.positionWeightsMatrix)
+		strategies[dimension] = strategy
+	return strategies[dimension]
+
+
+def childBoard(board, move, color):
+	"""Gets a copy of the board with the move played for the color"""
+	child = copyOfBoard(board)
+	performMove(child, move[0], move[1], color)
+	return child
+
+
+def scoreLeafWithScoreBoard(strategy, board, localMaxDepth):
+	"""Scores a board the way a leaf of minimax at localMaxDepth would be, with scoreBoard"""
+	playerWithTurnAfterMaxDepth = strategy.AI_COLOR if localMaxDepth % 2 == 0 else strategy.HUMAN_COLOR
+	humanScore, aiScore = strategy.scoreBoard(board, strategy.HUMAN_COLOR, strategy.AI_COLOR, playerWithTurnAfterMaxDepth)
+	return aiScore - humanScore
+
+
+def scoreLeavesWithScoreBoards(strategy, board, moves, color, localMaxDepth):
+	"""Scores the board after each move the way scoreLeavesInBatch does, but with every child scored whole by scoreBoards"""
+	evaluator = strategy.numpyEvaluator
+	playerWithTurnAfterMaxDepth = strategy.AI_COLOR if localMaxDepth % 2 == 0 else strategy.HUMAN_COLOR
+	children = np.repeat(evaluator.encodeBoard(board)[np.newaxis], len(moves), axis=0)
+	for i, move in enumerate(moves):
+		children[i] = evaluator.encodeBoard(childBoard(board, move, color))
+	sectionScores, numTrapDirections, positionScores = evaluator.scoreBoards(children)
+	leafScores = []
+	for i in range(len(moves)):
+		humanScore, aiScore = strategy.combineSectionScores(
+			int(sectionScores[strategy.HUMAN_COLOR][i]), int(sectionScores[strategy.AI_COLOR][i]),
+			int(numTrapDirections[strategy.HUMAN_COLOR][i]), int(numTrapDirections[strategy.AI_COLOR][i]),
+			strategy.HUMAN_COLOR, strategy.AI_COLOR, playerWithTurnAfterMaxDepth)
+		leafScores.append(aiScore + int(positionScores[strategy.AI_COLOR][i]) - (humanScore + int(positionScores[strategy.HUMAN_COLOR][i])))
+	return leafScores
+
+
+def createRandomBoard(generator, dimension):
+	"""Creates a board with a random number of pieces, mostly played near the pieces already on it"""
+	board = [[EMPTY] * dimension for _ in range(dimension)]
+	pieces = []
+	color = BLACK
+	for _ in range(generator.randint(0, dimension * dimension // 3)):
+		while True:
+			if pieces and generator.random() < 0.85:
+				row, col = generator.choice(pieces)
+				row, col = row + generator.randint(-2, 2), col + generator.randint(-2, 2)
+			else:
+				row, col = generator.randrange(dimension), generator.randrange(dimension)
+			if 0 <= row < dimension and 0 <= col < dimension and board[row][col] == EMPTY:
+				break
+		board[row][col] = color
+		pieces.append((row, col))
+		color = WHITE if color == BLACK else BLACK
+	return board
+
+
+def buildCorpus(numBoards=DEFAULT_NUM_BOARDS, path=CORPUS_PATH):
+	"""Creates the random boards and writes them to the corpus, along with the scores scoreBoard gives their leaves"""
+	generator = random.Random(0)
+	records = []
+	for boardNumber in range(numBoards):
+		dimension = BOARD_DIMENSIONS[boardNumber % len(BOARD_DIMENSIONS)]
+		board = createRandomBoard(generator, dimension)
+		emptySpots = [[row, col] for row in range(dimension) for col in range(dimension) if board[row][col] == EMPTY]
+		moves = generator.sample(emptySpots, min(MOVES_PER_BOARD, len(emptySpots)))
+		color = generator.choice([BLACK, WHITE])
+		strategy = getStrategy(dimension)
+		leafScores = {str(localMaxDepth): [scoreLeafWithScoreBoard(strategy, childBoard(board, move, color), localMaxDepth)
+										   for move in moves] for localMaxDepth in MAX_DEPTHS}
+		records.append({'board': [''.join(row) for row in board], 'color': color, 'moves': moves, 'leafScores': leafScores})
+	with open(path, 'w') as corpusFile:
+		for record in records:
+			corpusFile.write(json.dumps(record, separators=(',', ':')) + '\n')
+	print('%d boards written to %s' % (len(records), path))
+
+
+def checkCorpus(path=CORPUS_PATH):
+	"""
+	Scores every leaf of the corpus with scoreBoard and both NumPy paths, and prints the ones that don't match
+	Returns the number of leaves that didn't match
+	"""
+	with open(path) as corpusFile:
+		records = [json.loads(line) for line in corpusFile]
+	numLeaves, numMismatches = 0, 0
+	timings = {'scoreBoard': 0.0, 'scoreLeavesInBatch': 0.0, 'scoreBoards': 0.0}
+	for recordNumber, record in enumerate(records):
+		board = [list(row) for row in record['board']]
+		moves, color = record['moves'], record['color']
+		strategy = getStrategy(len(board))
+		strategy.numpyEvaluator.setBoard(board)
+		for localMaxDepth in MAX_DEPTHS:
+			expectedScores = record['leafScores'][str(localMaxDepth)]
+			startTime = time.time()
+			scoreBoardScores = [scoreLeafWithScoreBoard(strategy, childBoard(board, move, color), localMaxDepth)
+								for move in moves]
+			timings['scoreBoard'] += time.time() - startTime
+			startTime = time.time()
+			batchScores = strategy.scoreLeavesInBatch(moves, color, localMaxDepth)
+			timings['scoreLeavesInBatch'] += time.time() - startTime
+			startTime = time.time()
+			wholeBoardScores = scoreLeavesWithScoreBoards(strategy, board, moves, color, localMaxDepth)
+			timings['scoreBoards'] += time.time() - startTime
+			for i, move in enumerate(moves):
+				numLeaves += 1
+				if not expectedScores[i] == scoreBoardScores[i] == batchScores[i] == wholeBoardScores[i]:
+					numMismatches += 1
+					print('board %d, move %s, max depth %d: corpus %d, scoreBoard %d, scoreLeavesInBatch %d, scoreBoards %d' % (
+						recordNumber, move, localMaxDepth, expectedScores[i], scoreBoardScores[i], batchScores[i], wholeBoardScores[i]))
+	print('%d of %d leaves from %d boards matched (%s)' % (numLeaves - numMismatches, numLeaves, len(records),
+		', '.join('%s %.2fs' % timing for timing in timings.items())))
+	return numMismatches
+
+
+if __name__ == '__main__':
+	if len(sys.argv) > 1 and sys.argv[1] == '--rebuild':
+		buildCorpus(int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_NUM_BOARDS)
+	else:
+		sys.exit(1 if checkCorpus() > 0 else 0)
@@ -0,0 +1,108 @@
+# Opening book for the Gomoku A.I.
+# The book is a file of fixed-size records sorted by position key. A board looks the same after any of
+# its 8 symmetries (4 rotations, each with or without a mirror), so every position is stored once, under
+# the smallest Zobrist key of its 8 versions, with the best move for that version. Lookups transform the
+# board the same way, and map the stored move back onto the original board.
+# The file is memory-mapped and binary searched, so nothing has to be loaded when the A.I. starts up.
+# The book is built by gomoku_opening_book_generator.py
+import mmap
+import os
+import random
+import struct
+
+EMPTY, BLACK, WHITE = '.', 'X', 'O'
+RECORD_FORMAT = '<QHq'  # position key, best move (row * dimension + col), score for the player to move
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+NUM_SYMMETRIES = 8
+ZOBRIST_SEED = 13  # the keys have to be the same every time, so the book can be found again
+
+
+def openingBookPath(dimension):
+	"""Gets the path of the opening book for boards of the given dimension"""
+	return os.path.join(os.path.dirname(os.path.abspath(__file__)), "gomoku_opening_book_%d.bin" % dimension)
+
+
+def transformSpot(row, col, symmetry, dimension):
+	"""
+	Moves a spot to where it is after one of the 8 symmetries of the board. Bit 2 of the
+	symmetry swaps rows and columns, then bit 0 flips the rows and bit 1 flips the columns
+	"""
+	if symmetry & 4:
+		row, col = col, row
+	if symmetry & 1:
+		row = dimension - 1 - row
+	if symmetry & 2:
+		col = dimension - 1 - col
+	return row, col
+
+
+def untransformSpot(row, col, symmetry, dimension):
+	"""Moves a spot back to where it was before transformSpot"""
+	if symmetry & 1:
+		row = dimension - 1 - row
+	if symmetry & 2:
+		col = dimension - 1 - col
+	if symmetry & 4:
+		row, col = col, row
+	return row, col
+
+
+class GomokuOpeningBook:
+	"""Looks up positions in an opening book file. If the file doesn't exist, the book is just empty"""
+
+	def __init__(self, dimension, path=None):
+		self.dimension = dimension
+		generator = random.Random(ZOBRIST_SEED)
+		self.zobristTable = {color: [generator.getrandbits(64) for _ in range(dimension * dimension)] for color in [BLACK, WHITE]}
+		self.numRecords = 0
+		self.bookMap = None
+		path = path if path is not None else openingBookPath(dimension)
+		if os.path.exists(path) and os.path.getsize(path) >= RECORD_SIZE:
+			with open(path, 'rb') as bookFile:
+				# the mapping stays valid after the file is closed
+				self.bookMap = mmap.mmap(bookFile.fileno(), 0, access=mmap.ACCESS_READ)
+			self.numRecords = len(self.bookMap) // RECORD_SIZE
+
+	def canonicalKey(self, board):
+		"""
+		Gets the key shared by the board and all of its symmetries
+		Returns the key in [0] and the symmetry of the board that the key belongs to in [1]
+		"""
+		pieces = [(row, col, spot) for row, boardRow in enumerate(board) for col, spot in enumerate(boardRow) if spot != EMPTY]
+		bestKey, bestSymmetry = None, 0
+		for symmetry in range(NUM_SYMMETRIES):
+			key = 0
+			for row, col, color in pieces:
+				newRow, newCol = transformSpot(row, col, symmetry, self.dimension)
+				key ^= self.zobristTable[color][newRow * self.dimension + newCol]
+			if bestKey is None or key < bestKey:
+				bestKey, bestSymmetry = key, symmetry
+		return bestKey, bestSymmetry
+
+	def lookup(self, board):
+		"""
+		Finds the board (or any of its symmetries) in the book
+		Returns the best move's row in [0], column in [1] and score in [2], or None if the board isn't in the book
+		"""
+		if self.numRecords == 0:
+			return None
+		key, symmetry = self.canonicalKey(board)
+		low, high = 0, self.numRecords - 1
+		while low <= high:
+			middle = (low + high) // 2
+			recordKey, move, score = struct.unpack_from(RECORD_FORMAT, self.bookMap, middle * RECORD_SIZE)
+			if recordKey < key:
+				low = middle + 1
+			elif recordKey > key:
+				high = middle - 1
+			else:
+				row, col = untransformSpot(*divmod(move, self.dimension), symmetry, self.dimension)
+				return row, col, score
+		return None
+
+
+def writeOpeningBook(records, path):
+	"""Writes the given (key, move, score) records to an opening book file, sorted by key"""
+	with open(path, 'wb') as bookFile:
+		for key, move, score in sorted(records):
+			bookFile.write(struct.pack(RECORD_FORMAT, key, move, score))
@@ -0,0 +1,73 @@
+# Builds the opening book for the Gomoku A.I.
+# Starting from the empty board, every position is searched searchDepth moves ahead and the best move is
+# saved. Gomoku has far too many openings to search them all, so the book is built for each color that the
+# A.I. could be playing: on the A.I.'s turns only its best move is followed, and on the human's turns the
+# numReplies most promising replies are followed, up to maxPly pieces played. The human can start anywhere
+# when they play black, so every first move is followed. Positions that are symmetries of one that was
+# already searched are only searched once.
+# To rebuild the book, run this from the root of the project:
+#   > python3 -m gomoku.gomoku_opening_book_generator [maxPly] [searchDepth] [numReplies] [dimension]
+import random
+import sys
+import time
+from gomoku.gomoku_strategy import GomokuStrategy, opponentOf, performMove, copyOfBoard, MAX_DEPTH, EMPTY, BLACK
+from gomoku.gomoku_opening_book import GomokuOpeningBook, writeOpeningBook, openingBookPath, transformSpot, untransformSpot
+
+DEFAULT_MAX_PLY = 6
+DEFAULT_SEARCH_DEPTH = MAX_DEPTH
+DEFAULT_NUM_REPLIES = 4
+DEFAULT_DIMENSION = 13
+
+
+def generateOpeningBook(maxPly=DEFAULT_MAX_PLY, searchDepth=DEFAULT_SEARCH_DEPTH, numReplies=DEFAULT_NUM_REPLIES,
+						dimension=DEFAULT_DIMENSION, path=None):
+	"""Searches the book positions one ply at a time, and writes them to the opening book file"""
+	path = path if path is not None else openingBookPath(dimension)
+	random.seed(0)  # so that the same book is built every time
+	book = GomokuOpeningBook(dimension)  # only used for its position keys
+	# one A.I. per color, since scores are from the point of view of the A.I.
+	strategies = {color: GomokuStrategy(color, dimension) for color in [BLACK, opponentOf(BLACK)]}
+	records = {}  # position key -> (best move in the key's symmetry, score)
+	followed = set()  # (position key, color of the A.I.) of every position whose moves have been followed
+	emptyBoard = [[EMPTY] * dimension for _ in range(dimension)]
+	positions = [(emptyBoard, BLACK, aiColor) for aiColor in [BLACK, opponentOf(BLACK)]]  # black goes first
+	startTime = time.time()
+	for ply in range(maxPly + 1):
+		nextPositions = []
+		for board, colorToMove, aiColor in positions:
+			key, symmetry = book.canonicalKey(board)
+			if (key, aiColor) in followed:
+				continue
+			followed.add((key, aiColor))
+			strategy = strategies[colorToMove]
+			if key not in records:
+				print('\rply %d: %d positions searched (%ds)' % (ply, len(records), time.time() - startTime), end='')
+				strategy.TRANSPOSITION_TABLE.newSearch()
+				row, col, score = strategy.searchBoard(board, searchDepth)
+				bookRow, bookCol = transformSpot(row, col, symmetry, dimension)  # the book stores the move for the key's symmetry
+				records[key] = (bookRow * dimension + bookCol, score)
+			if ply == maxPly:
+				continue
+			if colorToMove == aiColor:
+				# the A.I. will play the book move, so only that move needs to be followed
+				moves = [list(untransformSpot(*divmod(records[key][0], dimension), symmetry, dimension))]
+			elif ply == 0:
+				moves = [[row, col] for row in range(dimension) for col in range(dimension)]
+			else:
+				moves = strategy.getLikelyReplies(board)[:numReplies]
+			for move in moves:
+				nextBoard = copyOfBoard(board)
+				performMove(nextBoard, move[0], move[1], colorToMove)
+				if not strategy.checkIfMoveCausedGameOver(nextBoard, move)[1]:
+					nextPositions.append((nextBoard, opponentOf(colorToMove), aiColor))
+		positions = nextPositions
+	writeOpeningBook([(key, move, score) for key, (move, score) in records.items()], path)
+	print('\r%d positions written to %s (%ds)' % (len(records), path, time.time() - startTime))
+
+
+if __name__ == '__main__':
+	maxPlyArg = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MAX_PLY
+	searchDepthArg = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SEARCH_DEPTH
+	numRepliesArg = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_NUM_REPLIES
+	dimensionArg = int(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_DIMENSION
+	generateOpeningBook(maxPlyArg, searchDepthArg, numRepliesArg, dimensionArg)
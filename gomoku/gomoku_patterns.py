@@ -0,0 +1,65 @@
+# Integer encodings of board sections for the Gomoku A.I.
+# Every spot takes up 2 bits (EMPTY = 0, BLACK = 1, WHITE = 2), with the first spot of a section in the
+# lowest bits. A whole line is encoded the same way, so the section of a line starting at spot i is just
+# (lineCode >> (2 * i)) masked down to the length of the section, and no strings have to be built.
+# The threat tables are generated from the threat sequence dictionaries in gomoku_strategy.py, which
+# are still where the threats and their scores are defined.
+
+EMPTY, BLACK, WHITE = '.', 'X', 'O'
+BITS_PER_SPOT = 2
+PIECE_CODES = {EMPTY: 0, BLACK: 1, WHITE: 2}
+SECTION_5_MASK = (1 << (5 * BITS_PER_SPOT)) - 1
+SECTION_6_MASK = (1 << (6 * BITS_PER_SPOT)) - 1
+
+
+def encodeSection(section):
+	"""Gets the code of a section of the board, given as a string or list of pieces"""
+	code = 0
+	for i, piece in enumerate(section):
+		code |= PIECE_CODES[piece] << (BITS_PER_SPOT * i)
+	return code
+
+
+def joinSections(*sections):
+	"""
+	Joins sections, given as (code, length) tuples, end to end
+	Returns the (code, length) of the joined section
+	"""
+	joinedCode, joinedLength = 0, 0
+	for code, length in sections:
+		joinedCode |= code << (BITS_PER_SPOT * joinedLength)
+		joinedLength += length
+	return joinedCode, joinedLength
+
+
+def createThreatTable(threatsScores, sectionLength):
+	"""
+	Creates a list with an entry for the code of every possible section of the given length.
+	The entry is the score of the section in threatsScores, or None if it isn't a threat
+	"""
+	table = [None] * (1 << (BITS_PER_SPOT * sectionLength))
+	for section, score in threatsScores.items():
+		if len(section) == sectionLength:
+			table[encodeSection(section)] = score
+	return table
+
+
+def createCornerThreatTable(threatsScores, color):
+	"""
+	Creates the table for the length 5 diagonals in the corners of the board, where a 3 piece 'trap'
+	isn't really a trap. Entries are (score, whether it counts as a trap), or None if it isn't a threat
+	"""
+	table = [None] * (1 << (BITS_PER_SPOT * 5))
+	for section, score in threatsScores.items():
+		if len(section) == 5:
+			if section.count(color) == 4:
+				table[encodeSection(section)] = (score, True)
+			else:
+				table[encodeSection(section)] = (score // 2, False)
+	return table
+
+
+def createThreatTables(threatsScores, color):
+	"""Creates the length 5, length 6 and corner threat tables for the given color's threat dictionary"""
+	return createThreatTable(threatsScores, 5), createThreatTable(threatsScores, 6), \
+		createCornerThreatTable(threatsScores, color)
@@ -1,9 +1,21 @@
 # Contains AI strategy and board manipulation methods
 
+import atexit  # for stopping the search processes
 import math  # for infinities
+import multiprocessing  # for searching with more than one process
 import random  # for randomizing valid moves list in minimax
+import signal  # for leaving keyboard interrupts to the main process
 import sys  # for better progress bar formatting
+import threading  # for searching in the background while the human plays
 from gomoku.gomoku_player import GomokuPlayer  # super class
+from gomoku.gomoku_line_cache import GomokuLineCache, createLines, scoreLine
+from gomoku.gomoku_patterns import PIECE_CODES, SECTION_5_MASK, SECTION_6_MASK, encodeSection, joinSections, createThreatTables
+from gomoku.gomoku_candidate_moves import GomokuCandidateMoves
+from gomoku.gomoku_bitboard import GomokuBitboard, windowSpots
+from gomoku.gomoku_threat_solver import GomokuThreatSolver
+from gomoku.gomoku_opening_book import GomokuOpeningBook
+from gomoku.gomoku_numpy_evaluator import GomokuNumpyEvaluator, NUMPY_AVAILABLE
+from gomoku.gomoku_transposition_table import GomokuTranspositionTable, GomokuSharedTranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND, NO_MOVE
 
 #### DO NOT MODIFY ####
 EMPTY, BLACK, WHITE = '.', 'X', 'O'
@@ -15,8 +27,54 @@ WIN_SCORE = 1000000000  # large enough to always be the preferred outcome
 MAX_NEIGHBOR_DIST = 2  # max distance from an already played piece that we want to check if open
 MAX_NUM_MOVES_TO_EVALUATE = 15  # most moves we want to evaluate at once for any given board
 MAX_DEPTH = 6  # max number of moves ahead to calculate
+TRANSPOSITION_TABLE_SIZE = 1 << 20  # number of positions the transposition table can hold, must be a power of 2
+USE_PVS = True  # search every move after the first with a null window, and only re-search the ones that beat it
+ASPIRATION_WINDOW = math.inf  # how far from the score two depths before each depth search is first searched for (math.inf searches with a full window)
+BATCH_LEAF_EVALUATION = False  # score all the leaves under a node in one batch with NumPy (if it is installed)
+NUM_SEARCH_PROCESSES = 1  # processes that search the top level moves at the same time, 1 searches without any extra processes
+STALE_TASK_CHECK_INTERVAL = 256  # boards a search process searches between checks that its move is still needed
+USE_OPENING_BOOK = True  # play the move stored in the opening book, if the board is in it
+PONDER = True  # keep searching in the background while waiting for the human's move
 #######################
 
+# scores of the threat sequences for each color
+BLACK_THREATS_SCORES = {
+	'.XXXX.' : 10000,	# 4 double open, next move guaranteed win
+	'.XXXX'  : 100,		# 4 single open
+	'XXXX.'	 : 100, 	# 4 single open
+	'X.XXX'	 : 90,		# 1-3 single open
+	'XX.XX'	 : 85,		# 2-2 single open
+	'XXX.X'	 : 90,		# 1-3 single open
+	'.XXX.'	 : 30,		# 3 double open
+	'OXXXX.' : 80,		# 4 single open
+	'.XXXXO' : 80,		# 4 single open
+	'.X.XX.' : 25,		# broken 3
+	'.XX.X.' : 25		# broken 3
+}
+WHITE_THREATS_SCORES = {
+	'.OOOO.' : 10000,	# 4 double open, next move guaranteed win
+	'.OOOO'  : 100,		# 4 single open
+	'OOOO.'	 : 100, 	# 4 single open
+	'O.OOO'	 : 90,		# 1-3 single open
+	'OO.OO'	 : 85,		# 2-2 single open
+	'OOO.O'	 : 90,		# 1-3 single open
+	'.OOO.'	 : 30,		# 3 double open
+	'XOOOO.' : 80,		# 4 single open
+	'.OOOOX' : 80,		# 4 single open
+	'.O.OO.' : 25,		# broken 3
+	'.OO.O.' : 25		# broken 3
+}
+# integer encoded versions of the threat sequences, used when scoring the board (see gomoku_patterns.py)
+THREAT_TABLES = {
+	BLACK: createThreatTables(BLACK_THREATS_SCORES, BLACK),
+	WHITE: createThreatTables(WHITE_THREATS_SCORES, WHITE)
+}
+EMPTY_SECTION = (PIECE_CODES[EMPTY], 1)  # (code, length) of a single empty spot
+
+
+class SearchStopped(Exception):
+	"""Raised inside the search to unwind it when pondering has to stop"""
+
 
 # class for the A.I.
 class GomokuStrategy(GomokuPlayer):
@@ -32,44 +90,47 @@ class GomokuStrategy(GomokuPlayer):
 		# represent a number for if a certain piece is played in a certain position 
 		# on the board. This will be used for XORing in the Zobrist Hashing.
 		self.RANDOM_HASH_TABLE = self.createHashTable(boardDimension)
-		# BOARD_STATE_DICT will be a map that maps board-state hashes to a list containing
-		# important information about the board at that board-state (the score)
-		# NOTE this transposition table will be cleared between different depth searches.
-		# Maintaining the transposition table between different depth searches could help prune
-		# even further, but it would require me to define some minimum score that determines whether
-		# or not it would be worth it to search this path at a deeper depth
-		self.BOARD_STATE_DICT = {} 
+		# TRANSPOSITION_TABLE maps the Zobrist value of a board to the depth it was searched to, whether
+		# the score found is exact or only a bound (because of pruning), the score, and the best move.
+		# Zobrist values are for the whole board rather than relative to the board being searched, and
+		# scores are always from the AI's point of view, so the table is kept between depth searches
+		# and between turns. The table has a fixed size, so older and shallower entries get replaced.
+		self.TRANSPOSITION_TABLE = GomokuTranspositionTable(TRANSPOSITION_TABLE_SIZE)
 		self.createThreatSequencesDictionary()
 		self.createBoardPositionWeights(boardDimension)
+		self.createRayTables(boardDimension)
+		self.boardLines = createLines(boardDimension)  # every line that scoreSections looks at
+		self.lineCache = None  # GomokuLineCache for the board being searched
+		self.candidateMoves = None  # GomokuCandidateMoves for the board being searched
+		self.bitboard = None  # GomokuBitboard for the board being searched
+		# scores of a single direction of scoreMovePotential, by the key of the spots in it (see GomokuBitboard.windowKeys)
+		self.directionScoresByWindow = {}
+		# THREAT_SOLVER looks for forced wins made up only of fours and threes, which are often
+		# too deep for minimax to see. It keeps its own cache of solved positions between turns.
+		self.THREAT_SOLVER = GomokuThreatSolver(boardDimension)
+		self.defensiveMoves = None  # if the human has a forced win, the moves that are proven to stop it
+		self.numNodesSearched = 0  # number of boards minimax was called on in the last search
+		# scores the last ply of the search in batches, kept in sync with the board being searched
+		self.numpyEvaluator = None
+		if BATCH_LEAF_EVALUATION and NUMPY_AVAILABLE:
+			self.numpyEvaluator = GomokuNumpyEvaluator(boardDimension, THREAT_TABLES, self.positionWeightsMatrix)
+		# processes that search the top level moves, started on the first search if NUM_SEARCH_PROCESSES > 1
+		self.searchPool = None
+		self.searchId = None  # id of the current search, so the search processes can skip moves from older searches
+		self.taskSearchId = None  # in a search process, the id of the search the move being searched is for
+		self.numSearches = 0
+		# background search (pondering) while the human is choosing a move. Moves found for
+		# boards the AI may have to play on next are kept by the board's Zobrist value
+		self.ponderThread = None
+		self.isPondering = False
+		self.stopSearchRequested = False
+		self.ponderedMoves = {}
+		self.openingBook = None  # GomokuOpeningBook, opened the first time it is needed
 
 	def createThreatSequencesDictionary(self):
-		"""Creates the dictionaries that will help score board sections"""
-		self.blackThreatsScores = {
-			'.XXXX.' : 10000,	# 4 double open, next move guaranteed win
-			'.XXXX'  : 100,		# 4 single open
-			'XXXX.'	 : 100, 	# 4 single open
-			'X.XXX'	 : 90,		# 1-3 single open
-			'XX.XX'	 : 85,		# 2-2 single open
-			'XXX.X'	 : 90,		# 1-3 single open
-			'.XXX.'	 : 30,		# 3 double open
-			'OXXXX.' : 80,		# 4 single open
-			'.XXXXO' : 80,		# 4 single open
-			'.X.XX.' : 25,		# broken 3
-			'.XX.X.' : 25		# broken 3
-		}
-		self.whiteThreatsScores = {
-			'.OOOO.' : 10000,	# 4 double open, next move guaranteed win
-			'.OOOO'  : 100,		# 4 single open
-			'OOOO.'	 : 100, 	# 4 single open
-			'O.OOO'	 : 90,		# 1-3 single open
-			'OO.OO'	 : 85,		# 2-2 single open
-			'OOO.O'	 : 90,		# 1-3 single open
-			'.OOO.'	 : 30,		# 3 double open
-			'XOOOO.' : 80,		# 4 single open
-			'.OOOOX' : 80,		# 4 single open
-			'.O.OO.' : 25,		# broken 3
-			'.OO.O.' : 25		# broken 3
-		}
+		"""Sets the dictionaries that will help score board sections"""
+		self.blackThreatsScores = BLACK_THREATS_SCORES
+		self.whiteThreatsScores = WHITE_THREATS_SCORES
 
 	def createBoardPositionWeights(self, dim):
 		"""
@@ -95,6 +156,15 @@ class GomokuStrategy(GomokuPlayer):
 			table.append(colorLocationList)
 		return table
 
+	def createZobristValueForBoard(self, board):
+		"""Gives the Zobrist value for a whole board"""
+		zobristValue = 0
+		for row in range(self.BOARD_DIMENSION):
+			for col in range(self.BOARD_DIMENSION):
+				if board[row][col] != EMPTY:
+					zobristValue = self.createZobristValueForNewMove([row, col], board[row][col], zobristValue)
+		return zobristValue
+
 	def createZobristValueForNewMove(self, move, color, prevZobristValue):
 		"""Gives an updated Zobrist value for a board after a new move is played"""
 		row, col = move
@@ -164,6 +234,27 @@ class GomokuStrategy(GomokuPlayer):
 		else:
 			return False
 
+	def createRayTables(self, dimension):
+		"""
+		For every spot, finds the spots up to 4 away from it in each direction, so that win checks
+		are just reads of the board. Rays are stored as [row][col] -> list of (forward ray, backward ray)
+		for each direction, where each ray is a tuple of (row, col) spots going outward
+		"""
+		self.RAYS = []
+		directionVectorsList = [[1, -1], [1, 0], [1, 1], [0, 1]]
+		for row in range(dimension):
+			raysOfRow = []
+			for col in range(dimension):
+				raysOfSpot = []
+				for rowStep, colStep in directionVectorsList:
+					forwardRay = tuple((row + i * rowStep, col + i * colStep) for i in range(1, 5)
+									   if self.isCoordinateInBoardRange([row + i * rowStep, col + i * colStep]))
+					backwardRay = tuple((row - i * rowStep, col - i * colStep) for i in range(1, 5)
+										if self.isCoordinateInBoardRange([row - i * rowStep, col - i * colStep]))
+					raysOfSpot.append((forwardRay, backwardRay))
+				raysOfRow.append(raysOfSpot)
+			self.RAYS.append(raysOfRow)
+
 	def checkIfMoveCausedGameOver(self, board, move):
 		"""
 		Checks the spaces in outward directions to see if the move given caused a win
@@ -172,42 +263,23 @@ class GomokuStrategy(GomokuPlayer):
 		"""
 		emptySpotSeen = False
 		color = board[move[0]][move[1]]
-		directionVectorsList = [[1, -1], [1, 0], [1, 1], [0, 1]]
-		for directionVector in directionVectorsList:
+		for forwardRay, backwardRay in self.RAYS[move[0]][move[1]]:
 			numInARow = 1
-			currCoordinatesForward = move.copy()
-			currCoordinatesBackward = move.copy()
-			forwardCheckStillValid = True
-			backwardCheckStillValid = True
-			outwardSpacesChecked = 0
-			while outwardSpacesChecked < 4 and numInARow < 5 and (forwardCheckStillValid or backwardCheckStillValid):
-				outwardSpacesChecked += 1
-				if forwardCheckStillValid:
-					# keep looking in the forward direction
-					currCoordinatesForward = [a + b for a, b in zip(currCoordinatesForward, directionVector)] # adds the direction vector
-					if self.isCoordinateInBoardRange(currCoordinatesForward):
-						currForwardSpot = board[currCoordinatesForward[0]][currCoordinatesForward[1]]
-						if currForwardSpot == color:
-							numInARow += 1
-						else:
-							if currForwardSpot == EMPTY:
-								emptySpotSeen = True
-							forwardCheckStillValid = False
-					else:
-						forwardCheckStillValid = False
-
-				if backwardCheckStillValid:
-					currCoordinatesBackward = [a - b for a, b in zip(currCoordinatesBackward, directionVector)] # subtracts the direction vector
-					if self.isCoordinateInBoardRange(currCoordinatesBackward):
-						currBackwardSpot = board[currCoordinatesBackward[0]][currCoordinatesBackward[1]]
-						if currBackwardSpot == color:
-							numInARow += 1
-						else:
-							if currBackwardSpot == EMPTY:
-								emptySpotSeen = True
-							backwardCheckStillValid = False
-					else:
-						backwardCheckStillValid = False
+			# rays stop at the edge of the board, and the checks stop at the first spot without the color
+			for row, col in forwardRay:
+				spot = board[row][col]
+				if spot != color:
+					if spot == EMPTY:
+						emptySpotSeen = True
+					break
+				numInARow += 1
+			for row, col in backwardRay:
+				spot = board[row][col]
+				if spot != color:
+					if spot == EMPTY:
+						emptySpotSeen = True
+					break
+				numInARow += 1
 			if numInARow >= 5:
 				return color, True
 		# if we reach here, the move did not cause a win
@@ -224,44 +296,10 @@ class GomokuStrategy(GomokuPlayer):
 		"""Returns a list of valid moves (moves in the center area or near other pieces)"""
 
 		# Will allow me to slightly prioritize checking the spots that are closer to 
-		# other pieces by placing them in separate lists
-		lists_of_valids = [] 
-		for l in range(MAX_NEIGHBOR_DIST):
-			lists_of_valids.append([]) 
-
-		emptiesFoundSoFar = set() # used to make sure we don't double-count empty spots
-
-		# locate all the spots with pieces
-		filledLocations = []
-		for r in range(self.BOARD_DIMENSION):
-			for c in range(self.BOARD_DIMENSION):
-				if board[r][c] != EMPTY:
-					filledLocations.append([r,c])
-
-
-		def locateEmptyNearSpots(filledCoord, distFromPiece):
-			"""Finds all the empty spots near this coordinate and adds them to the list of valid spots"""
-			row, col = filledCoord
-			for i in range(-distFromPiece, distFromPiece + 1): # e.g. -1, 0, 1
-				for j in range(-distFromPiece, distFromPiece + 1): # e.g. -1, 0, 1
-					if i != distFromPiece and i != -distFromPiece and j != distFromPiece and j != -distFromPiece: 
-						# if not in the right distance circle
-						continue
-					curr_row, curr_col = row + i, col + j
-					if not self.isCoordinateInBoardRange((curr_row, curr_col)):
-						# if outside the board range
-						continue
-					neighborSpot = board[curr_row][curr_col]
-					neighborCoordAsTuple = (curr_row, curr_col)
-					if neighborSpot == EMPTY and neighborCoordAsTuple not in emptiesFoundSoFar:
-						# if there is an empty spot here and we haven't validated it yet
-						emptiesFoundSoFar.add(neighborCoordAsTuple)
-						lists_of_valids[distFromPiece - 1].append([curr_row, curr_col])
-
-		# check each distance level around each filled piece
-		for distFromPiece in range(1, MAX_NEIGHBOR_DIST + 1):
-			for filledCoord in filledLocations:
-				locateEmptyNearSpots(filledCoord, distFromPiece)
+		# other pieces by placing them in separate lists.
+		# self.candidateMoves keeps track of the empty spots near pieces as moves are played,
+		# so the board doesn't have to be scanned for them
+		lists_of_valids = self.candidateMoves.getCandidatesByDistance()
 
 		# shuffle the moves in each distance level
 		# note this will not change the order of the distances, just the moves inside each distance level
@@ -285,487 +323,680 @@ class GomokuStrategy(GomokuPlayer):
 			# no need to decrease quantity
 			return validMoves
 
-		def sectionContainsThreats(pieceColor, sectionString):
-			"""
-			Evaluates each length 5 and length 6 section of spots in the board for threats
-			Returns True or False depending on whether a threat was found
-			"""
-			threatDictionary = self.blackThreatsScores if pieceColor == BLACK else self.whiteThreatsScores
-			if len(sectionString) == 5:
-				# if the section is only 5 spaces
-				if sectionString in threatDictionary:
-					return True
-				return False
-			for i in range(len(sectionString) - 5):
-				section6 = sectionString[i:i+6]
-				section5 = section6[:-1]
-				if section6 in threatDictionary:
-					return True
-				if section5 in threatDictionary:
-					return True
-				if i == len(sectionString) - 6:
-					# if at the last 6-piece section, we want to check the final 5 spots as well
-					section5 = section6[1:]
-					if section5 in threatDictionary:
-						threatMultiplier = 2
-						return True
-			return False
+		movesWithScores = [[move, self.getMovePriority(board, move)] for move in validMoves] # each element in the form:  [moveX, moveY], score
 
+		movesWithScores.sort(key = lambda x: -x[1]) # sort in descending order by evaluated score
+		highestEvaluatedMoves = []
+		for i in range(MAX_NUM_MOVES_TO_EVALUATE):
+			highestEvaluatedMoves.append(movesWithScores[i][0])
 
-		movesWithScores = [] # each element in the form:  [moveX, moveY], score 
+		return highestEvaluatedMoves
 
-		directionVectorsList = [[1, -1], [1, 0], [1, 1], [0, 1]]
-		for move in validMoves:
+	def sectionContainsThreats(self, pieceColor, sectionCode, sectionLength):
+		"""
+		Evaluates each length 5 and length 6 section of spots in the board for threats
+		The spots are given as an integer code (see gomoku_patterns.py)
+		Returns True or False depending on whether a threat was found
+		"""
+		table5, table6, _ = THREAT_TABLES[BLACK] if pieceColor == BLACK else THREAT_TABLES[WHITE]
+		if sectionLength == 5:
+			# if the section is only 5 spaces
+			return table5[sectionCode] is not None
+		for i in range(sectionLength - 5):
+			section6 = (sectionCode >> (2 * i)) & SECTION_6_MASK
+			if table6[section6] is not None:
+				return True
+			if table5[section6 & SECTION_5_MASK] is not None:
+				return True
+			if i == sectionLength - 6:
+				# if at the last 6-piece section, we want to check the final 5 spots as well
+				if table5[section6 >> 2] is not None:
+					return True
+		return False
+
+	def getMovePriority(self, board, move):
+		"""Gets the score from scoreMovePotential for the move, using the cached score if it is still valid"""
+		index = move[0] * self.BOARD_DIMENSION + move[1]
+		priority = self.candidateMoves.priorities[index]
+		if priority is None:
+			priority = self.scoreMovePotential(board, move)
+			self.candidateMoves.priorities[index] = priority
+		return priority
+
+	def scoreMovePotential(self, board, move):
+		"""
+		Scores how promising a move looks, based on the pieces within 4 spots
+		of it in each direction. Used to pick which valid moves are searched
+		"""
+		if self.bitboard is not None:
+			# the contents of each direction are looked up by their bits, and only scored the first time they are seen
 			moveScore = 0
-			for directionVector in directionVectorsList:
-				forwardScore, backwardScore = 0, 0
-				if self.isCoordinateInBoardRange([move[0] + directionVector[0], move[1] + directionVector[1]]):
-					forwardCheckStillValid = True
-					forwardPieceColor = board[move[0] + directionVector[0]][move[1] + directionVector[1]] # looks at first piece in forward direction
+			for windowKey in self.bitboard.windowKeys(move[0] * self.BOARD_DIMENSION + move[1]):
+				directionScore = self.directionScoresByWindow.get(windowKey)
+				if directionScore is None:
+					directionScore = self.scoreDirectionPotential(*windowSpots(windowKey))
+					self.directionScoresByWindow[windowKey] = directionScore
+				moveScore += directionScore
+			return moveScore
+		moveScore = 0
+		for forwardRay, backwardRay in self.RAYS[move[0]][move[1]]:
+			moveScore += self.scoreDirectionPotential([board[row][col] for row, col in forwardRay],
+													  [board[row][col] for row, col in backwardRay])
+		return moveScore
+
+	def scoreOutwardSpots(self, spots):
+		"""
+		Looks at the spots going outward from a move in one direction (up to 4, stopping at the edge of the board)
+		Returns the score of the direction in [0], the color of the first spot in [1] (None if there are no spots),
+		the (code, length) of the spots up to the first piece of the other color in [2], and the
+		number of empty spots before the first piece in [3]
+		"""
+		score, directionCode, distanceReached, numEmptiesBeforePiece, numPlayerPieces = 0, 0, 0, 0, 0
+		pieceColor = spots[0] if spots else None
+		for outwardSpacesChecked, currPiece in enumerate(spots, 1):
+			if pieceColor == EMPTY:
+				# if we have not found a player piece yet
+				directionCode |= PIECE_CODES[currPiece] << (2 * distanceReached)
+				distanceReached += 1
+				if currPiece == EMPTY:
+					numEmptiesBeforePiece += 1
 				else:
-					forwardCheckStillValid = False
-					forwardPieceColor = None
-
-				if self.isCoordinateInBoardRange([move[0] - directionVector[0], move[1] - directionVector[1]]):
-					backwardCheckStillValid = True
-					backwardPieceColor = board[move[0] - directionVector[0]][move[1] - directionVector[1]] # looks at first piece in backward direction
+					# if the current spot we are looking at is the first player piece we have seen
+					pieceColor = currPiece
+					numPlayerPieces += 1
+					score += (5 - outwardSpacesChecked)
+
+			elif pieceColor == currPiece:
+				# current piece is the player piece that we are searching for
+				directionCode |= PIECE_CODES[currPiece] << (2 * distanceReached)
+				distanceReached += 1
+				numPlayerPieces += 1
+				score += (5 - outwardSpacesChecked) * (2 ** (2 * (numPlayerPieces - 1)))
+
+			else:
+				# the current spot does not contain the piece we are searching for
+				if currPiece == EMPTY:
+					directionCode |= PIECE_CODES[currPiece] << (2 * distanceReached)
+					distanceReached += 1
+					score += (5 - outwardSpacesChecked)
 				else:
-					backwardCheckStillValid = False
-					backwardPieceColor = None
-
-				numForwardPlayerPieces, numBackwardPlayerPieces = 0, 0 # number of the piece we have seen in a direction
-				currCoordinatesForward, currCoordinatesBackward = move.copy(), move.copy()
-				outwardSpacesChecked = 0
-				forwardDistanceReached, backwardDistanceReached = 0, 0 # how many spots until a block
-				numForwardEmptiesBeforePiece, numBackwardEmptiesBeforePiece = 0, 0 # number of empty spots before seeing a player piece
-				forwardDirectionStr, backwardDirectionStr = '', '' # string representations of the board in each direction
-				
-				# now will look at most 4 spaces forward in the forward and backward direction and evaluate them
-				while outwardSpacesChecked < 4 and (forwardCheckStillValid or backwardCheckStillValid):
-					outwardSpacesChecked += 1
-					if forwardCheckStillValid:
-						# keep looking in the forward direction
-						currCoordinatesForward = [a + b for a, b in zip(currCoordinatesForward, directionVector)] # adds the direction vector
-						if self.isCoordinateInBoardRange(currCoordinatesForward):
-							currPiece = board[currCoordinatesForward[0]][currCoordinatesForward[1]]
-							
-							if forwardPieceColor == EMPTY:
-								# if we have not found a player piece yet
-								forwardDirectionStr += currPiece
-								forwardDistanceReached += 1
-								if currPiece == EMPTY:
-									numForwardEmptiesBeforePiece += 1
-								else:
-									# if the current spot we are looking at is the first player piece we have seen
-									forwardPieceColor = currPiece
-									numForwardPlayerPieces += 1
-									forwardScore += (5 - outwardSpacesChecked)
-
-							elif forwardPieceColor == currPiece:
-								# current piece is the player piece that we are searching for
-								forwardDirectionStr += currPiece
-								forwardDistanceReached += 1
-								numForwardPlayerPieces += 1
-								forwardScore += (5 - outwardSpacesChecked) * (2 ** (2 * (numForwardPlayerPieces - 1)))
-
-							else:
-								# the current spot does not contain the piece we are searching for
-								if currPiece == EMPTY:
-									forwardDirectionStr += currPiece
-									forwardDistanceReached += 1
-									forwardScore += (5 - outwardSpacesChecked)
-								else:
-									# if we have found the opposing color to the piece we are searching for
-									forwardCheckStillValid = False
-						else:
-							forwardCheckStillValid = False
-
-					if backwardCheckStillValid:
-						# keep looking in the backward direction
-						currCoordinatesBackward = [a - b for a, b in zip(currCoordinatesBackward, directionVector)] # subtracts the direction vector
-						if self.isCoordinateInBoardRange(currCoordinatesBackward):
-							currPiece = board[currCoordinatesBackward[0]][currCoordinatesBackward[1]]
-							
-							if backwardPieceColor == EMPTY:
-								# if we have not found a player piece yet
-								backwardDirectionStr += currPiece
-								backwardDistanceReached += 1
-								if currPiece == EMPTY:
-									numBackwardEmptiesBeforePiece += 1
-								else:
-									# if the current spot we are looking at is the first player piece we have seen
-									backwardPieceColor = currPiece
-									numBackwardPlayerPieces += 1
-									backwardScore += (5 - outwardSpacesChecked)
-
-							elif backwardPieceColor == currPiece:
-								# current piece is the player piece that we are searching for
-								backwardDirectionStr += currPiece
-								backwardDistanceReached += 1
-								numBackwardPlayerPieces += 1
-								backwardScore += (5 - outwardSpacesChecked) * (2 ** (2 * (numBackwardPlayerPieces - 1)))
-
-							else:
-								# the current spot does not contain the piece we are searching for
-								if currPiece == EMPTY:
-									backwardDirectionStr += currPiece
-									backwardDistanceReached += 1
-									backwardScore += (5 - outwardSpacesChecked)
-								else:
-									# if we have found the opposing color to the piece we are searching for
-									backwardCheckStillValid = False
-						else:
-							backwardCheckStillValid = False
-
-				directionVectorScore = forwardScore + backwardScore
-				if forwardPieceColor == backwardPieceColor:
-					# if the closest piece in each direction was the same color
-					if forwardDistanceReached + 1 + backwardDistanceReached < 5:
-						# if there is less than a 5 piece section here
-						directionVectorScore = 0
+					# if we have found the opposing color to the piece we are searching for
+					break
+		return score, pieceColor, (directionCode, distanceReached), numEmptiesBeforePiece
+
+	def scoreDirectionPotential(self, forwardSpots, backwardSpots):
+		"""
+		Scores one direction of scoreMovePotential, given the spots going outward
+		from the move on each side (up to 4, stopping at the edge of the board)
+		"""
+		forwardScore, forwardPieceColor, forwardSection, numForwardEmptiesBeforePiece = self.scoreOutwardSpots(forwardSpots)
+		backwardScore, backwardPieceColor, backwardSection, numBackwardEmptiesBeforePiece = self.scoreOutwardSpots(backwardSpots)
+		forwardDistanceReached, backwardDistanceReached = forwardSection[1], backwardSection[1]
+		directionVectorScore = forwardScore + backwardScore
+		if forwardPieceColor == backwardPieceColor:
+			# if the closest piece in each direction was the same color
+			if forwardDistanceReached + 1 + backwardDistanceReached < 5:
+				# if there is less than a 5 piece section here
+				directionVectorScore = 0
+			else:
+				threatMultiplier = 1
+				if forwardPieceColor != EMPTY and forwardPieceColor is not None:
+					# if we actually found a piece 
+					fullSection = joinSections(backwardSection, (PIECE_CODES[forwardPieceColor], 1), forwardSection) # add in the imaginary piece to see if a threat is produced
+					if self.sectionContainsThreats(forwardPieceColor, *fullSection):
+						threatMultiplier = 2
+
+				directionVectorScore += max(forwardScore, backwardScore) * threatMultiplier
+		else:
+			# if the closest piece in each direction were different colors
+			if forwardDistanceReached + 1 + numBackwardEmptiesBeforePiece < 5 and backwardDistanceReached + 1 + numForwardEmptiesBeforePiece < 5:
+				# if there is less than a 5 piece section here
+				directionVectorScore = 0
+			else:
+				threatMultiplier = 1
+
+				if opponentOf(forwardPieceColor) == backwardPieceColor and forwardPieceColor is not None and backwardPieceColor is not None:
+					# if the pieces in each direction are opposing colors (i.e. neither are empty or out of bounds)
+					if numBackwardEmptiesBeforePiece == 0:
+						# if the first spot in the backward direction is a player piece
+					 	forwardSectionCode = joinSections((PIECE_CODES[forwardPieceColor], 1), forwardSection)
 					else:
-						threatMultiplier = 1
-						if forwardPieceColor != EMPTY and forwardPieceColor is not None:
-							# if we actually found a piece 
-							fullSectionString = backwardDirectionStr + forwardPieceColor + forwardDirectionStr # add in the imaginary piece to see if a threat is produced
-							if sectionContainsThreats(forwardPieceColor, fullSectionString):
-								threatMultiplier = 2
-
-						directionVectorScore += max(forwardScore, backwardScore) * threatMultiplier
-				else:
-					# if the closest piece in each direction were different colors
-					if forwardDistanceReached + 1 + numBackwardEmptiesBeforePiece < 5 and backwardDistanceReached + 1 + numForwardEmptiesBeforePiece < 5:
-						# if there is less than a 5 piece section here
-						directionVectorScore = 0
+						# if the first spot in the backward direction is empty, we want to add an empty
+						# spot to the front of this, since threats may have 0 or 1 spaces at the start/end
+						forwardSectionCode = joinSections(EMPTY_SECTION, (PIECE_CODES[forwardPieceColor], 1), forwardSection)
+					if numForwardEmptiesBeforePiece == 0:
+						# if the first spot in the forward direction is a player piece
+					 	backwardSectionCode = joinSections((PIECE_CODES[backwardPieceColor], 1), backwardSection)
 					else:
-						threatMultiplier = 1
-
-						if opponentOf(forwardPieceColor) == backwardPieceColor and forwardPieceColor is not None and backwardPieceColor is not None:
-							# if the pieces in each direction are opposing colors (i.e. neither are empty or out of bounds)
-							if numBackwardEmptiesBeforePiece == 0:
-								# if the first spot in the backward direction is a player piece
-							 	forwardSectionStr = forwardPieceColor + forwardDirectionStr
-							else:
-								# if the first spot in the backward direction is empty, we want to add an empty
-								# spot to the front of this, since threats may have 0 or 1 spaces at the start/end
-								forwardSectionStr = "." + forwardPieceColor + forwardDirectionStr
-							if numForwardEmptiesBeforePiece == 0:
-								# if the first spot in the forward direction is a player piece
-							 	backwardSectionStr = backwardPieceColor + backwardDirectionStr
-							else:
-								# if the first spot in the forward direction is empty, we want to add an empty
-								# spot to the front of this, since threats may have 0 or 1 spaces at the start/end
-								backwardSectionStr = "." + backwardPieceColor + backwardDirectionStr
-
-							if sectionContainsThreats(forwardPieceColor, forwardSectionStr) or sectionContainsThreats(backwardPieceColor, backwardSectionStr):
-								threatMultiplier = 2
+						# if the first spot in the forward direction is empty, we want to add an empty
+						# spot to the front of this, since threats may have 0 or 1 spaces at the start/end
+						backwardSectionCode = joinSections(EMPTY_SECTION, (PIECE_CODES[backwardPieceColor], 1), backwardSection)
+
+					if self.sectionContainsThreats(forwardPieceColor, *forwardSectionCode) or self.sectionContainsThreats(backwardPieceColor, *backwardSectionCode):
+						threatMultiplier = 2
 
 
+				else:
+					# one of the directions is all empty spaces, and the other contains at least one player piece
+					# OR one of the directions is out of bounds
+					if forwardPieceColor is None:
+						# if the forward direction is out of bounds
+						totalSectionCode = joinSections((PIECE_CODES[backwardPieceColor], 1), backwardSection)
+						evaluatingPieceColor = backwardPieceColor
+					elif backwardPieceColor is None:
+						# if the backward direction is out of bounds
+						totalSectionCode = joinSections((PIECE_CODES[forwardPieceColor], 1), forwardSection)
+						evaluatingPieceColor = forwardPieceColor
+					else:
+						if forwardPieceColor == EMPTY:
+							# if the forward direction is all the empties
+							totalSectionCode = joinSections(EMPTY_SECTION, (PIECE_CODES[backwardPieceColor], 1), backwardSection)
+							evaluatingPieceColor = backwardPieceColor
 						else:
-							# one of the directions is all empty spaces, and the other contains at least one player piece
-							# OR one of the directions is out of bounds
-							if forwardPieceColor is None:
-								# if the forward direction is out of bounds
-								totalSectionStr = backwardPieceColor + backwardDirectionStr
-								evaluatingPieceColor = backwardPieceColor
-							elif backwardPieceColor is None:
-								# if the backward direction is out of bounds
-								totalSectionStr = forwardPieceColor + forwardDirectionStr
-								evaluatingPieceColor = forwardPieceColor
-							else:
-								if forwardPieceColor == EMPTY:
-									# if the forward direction is all the empties
-									totalSectionStr = "." + backwardPieceColor + backwardDirectionStr
-									evaluatingPieceColor = backwardPieceColor
-								else:
-									# if the backward direction is all the empties
-									totalSectionStr = "." + forwardPieceColor + forwardDirectionStr
-									evaluatingPieceColor = forwardPieceColor
-							
-							if sectionContainsThreats(evaluatingPieceColor, totalSectionStr):
-								threatMultiplier = 2
-
-						directionVectorScore += max(forwardScore, backwardScore) * threatMultiplier
-
-				moveScore += directionVectorScore
-			movesWithScores.append([move, moveScore])
+							# if the backward direction is all the empties
+							totalSectionCode = joinSections(EMPTY_SECTION, (PIECE_CODES[forwardPieceColor], 1), forwardSection)
+							evaluatingPieceColor = forwardPieceColor
+					
+					if self.sectionContainsThreats(evaluatingPieceColor, *totalSectionCode):
+						threatMultiplier = 2
 
-		movesWithScores.sort(key = lambda x: -x[1]) # sort in descending order by evaluated score
-		highestEvaluatedMoves = []
-		for i in range(MAX_NUM_MOVES_TO_EVALUATE):
-			highestEvaluatedMoves.append(movesWithScores[i][0])
+				directionVectorScore += max(forwardScore, backwardScore) * threatMultiplier
 
-		return highestEvaluatedMoves
+		return directionVectorScore
 
 	def getMove(self, board):
 		"""Calculates the best move for the AI for the given board"""
+		self.stopPondering()
+		if USE_OPENING_BOOK:
+			bookMove = self.getOpeningBookMove(board)
+			if bookMove is not None:
+				self.numNodesSearched = 0
+				return bookMove
+		ponderedMove = self.ponderedMoves.get(self.createZobristValueForBoard(board))
+		self.ponderedMoves = {}
+		if ponderedMove is not None:
+			# this board was already searched all the way while the human was thinking
+			self.numNodesSearched = 0
+			return ponderedMove
+		if NUM_SEARCH_PROCESSES > 1 and self.searchPool is None:
+			self.startSearchProcesses()
+		self.TRANSPOSITION_TABLE.newSearch()
+		moveRow, moveCol, _ = self.searchBoard(board)
+		return moveRow, moveCol
+
+	def getOpeningBookMove(self, board):
+		"""Gets the move stored in the opening book for the given board, or None if it isn't in the book"""
+		if self.openingBook is None:
+			self.openingBook = GomokuOpeningBook(self.BOARD_DIMENSION)
+		bookEntry = self.openingBook.lookup(board)
+		if bookEntry is None or board[bookEntry[0]][bookEntry[1]] != EMPTY:
+			return None
+		return bookEntry[0], bookEntry[1]
+
+	def searchBoard(self, board, maxDepth=None):
+		"""
+		Runs the threat search and then iterative deepening on the board, to maxDepth (MAX_DEPTH by default)
+		Returns the row in [0], column in [1], and score of the best move in [2]
+		"""
+		maxDepth = MAX_DEPTH if maxDepth is None else maxDepth
 		moveRow, moveCol, score = -123, -123, -123 # placeholders
-		for i in range(1, MAX_DEPTH + 1): # iterative deepening
+		self.numNodesSearched = 0
+		winningMove = self.THREAT_SOLVER.findWinningMove(board, self.AI_COLOR)
+		if winningMove is not None:
+			# the AI can win by playing threats that the human is forced to answer
+			return winningMove[0], winningMove[1], WIN_SCORE
+		# if the human could win the same way, only search the moves that stop it
+		self.defensiveMoves = self.THREAT_SOLVER.findDefensiveMoves(board, self.AI_COLOR)
+		self.setSearchBoard(board)
+		board = copyOfBoard(board)  # the search plays and takes back moves on the board, so leave the game's board alone
+		zobristValue = self.createZobristValueForBoard(board)
+		scoresByDepth = {}
+		for i in range(1, maxDepth + 1): # iterative deepening
 			# this will prioritize game winning move sets that occur with less total moves
-			moveRow, moveCol, score = self.minimax(board, 0, MAX, -math.inf, math.inf, i, 0)
-			self.BOARD_STATE_DICT.clear() # clear the dict after every depth increase
+			# the window is centered on the score from two depths ago, since which player moves last changes the score a lot
+			moveRow, moveCol, score = self.aspirationSearch(board, i, zobristValue, scoresByDepth.get(i - 2))
+			scoresByDepth[i] = score
 			if score >= WIN_SCORE:
 				break
-		return moveRow, moveCol
+		return moveRow, moveCol, score
+
+	def startPondering(self, board, colorToMove):
+		"""
+		Starts searching in the background while the AI waits for the human. If it is the human's move,
+		the boards after their most likely replies are searched, and if it is the AI's move, the board itself is.
+		The search is stopped as soon as getMove is called, and whatever it finished is reused there
+		"""
+		if not PONDER:
+			return
+		self.stopPondering()
+		self.ponderThread = threading.Thread(target=self.ponder, args=(copyOfBoard(board), colorToMove), daemon=True)
+		self.ponderThread.start()
+
+	def stopPondering(self):
+		"""Stops the background search, and waits for it to finish"""
+		if self.ponderThread is not None:
+			self.stopSearchRequested = True
+			self.THREAT_SOLVER.stop()
+			self.ponderThread.join()
+			self.ponderThread = None
+			self.stopSearchRequested = False
+			self.THREAT_SOLVER.resume()
+
+	def ponder(self, board, colorToMove):
+		"""
+		Searches the boards the AI is likely to have to play on next, and saves the move found for each.
+		Every board searched also fills the transposition table, so even boards that don't get finished
+		are faster to search again. Runs in the background thread until it is done or told to stop
+		"""
+		self.isPondering = True
+		try:
+			self.TRANSPOSITION_TABLE.newSearch()
+			if colorToMove == self.AI_COLOR:
+				boardsToSearch = [board]
+			else:
+				boardsToSearch = []
+				for move in self.getLikelyReplies(board):
+					performMove(board, move[0], move[1], self.HUMAN_COLOR)
+					if not self.checkIfMoveCausedGameOver(board, move)[1]:
+						boardsToSearch.append(copyOfBoard(board))
+					performMove(board, move[0], move[1], EMPTY)
+			for boardToSearch in boardsToSearch:
+				if USE_OPENING_BOOK and self.getOpeningBookMove(boardToSearch) is not None:
+					continue  # getMove won't need to search this board
+				self.ponderedMoves[self.createZobristValueForBoard(boardToSearch)] = self.searchBoard(boardToSearch)[:2]
+		except SearchStopped:
+			pass
+		finally:
+			self.isPondering = False
+
+	def getLikelyReplies(self, board):
+		"""
+		Gets the human's most likely moves on the board, best first. The reply that the last search
+		expected is first, since that search stored it in the transposition table
+		"""
+		self.setSearchBoard(board)
+		replies = self.getValidMoves(board)
+		tableEntry = self.TRANSPOSITION_TABLE.lookup(self.createZobristValueForBoard(board))
+		if tableEntry is not None and tableEntry[3] != NO_MOVE:
+			self.putTableMoveFirst(board, replies, 1, list(divmod(tableEntry[3], self.BOARD_DIMENSION)))
+		return replies
+
+	def aspirationSearch(self, board, localMaxDepth, zobristValue, previousScore):
+		"""
+		Searches the board with a narrow window around the score from two depths before, and
+		only widens the window if the true score turns out to be outside of it
+		Returns the row in [0], column in [1], and score of the board in [2]
+		"""
+		if previousScore is None or abs(previousScore) >= WIN_SCORE:
+			alpha, beta = -math.inf, math.inf
+		else:
+			alpha, beta = previousScore - ASPIRATION_WINDOW, previousScore + ASPIRATION_WINDOW
+		while True:
+			if self.searchPool is not None and not self.isPondering:
+				moveRow, moveCol, score = self.parallelMinimax(board, alpha, beta, localMaxDepth, zobristValue)
+			else:
+				moveRow, moveCol, score = self.minimax(board, 0, MAX, alpha, beta, localMaxDepth, zobristValue)
+			if score <= alpha:
+				alpha = -math.inf
+			elif score >= beta:
+				beta = math.inf
+			else:
+				return moveRow, moveCol, score
 
 	def minimax(self, board, depth, maxOrMin, alpha, beta, localMaxDepth, zobristValueForBoard):
 		"""
 		Recursively finds the best move for a given board
 		Returns the row in [0], column in [1], and score of the board in [2]
 		"""
+		self.numNodesSearched += 1
+		if self.stopSearchRequested:
+			raise SearchStopped()
+		if self.taskSearchId is not None and self.numNodesSearched % STALE_TASK_CHECK_INTERVAL == 0 and self.taskSearchId != self.searchId.value:
+			raise SearchStopped()  # in a search process, the search this move is for has already finished
 		if depth == localMaxDepth:
 			playerWithTurnAfterMaxDepth = self.AI_COLOR if localMaxDepth % 2 == 0 else self.HUMAN_COLOR
-			boardScores = self.scoreBoard(board, self.HUMAN_COLOR, self.AI_COLOR, playerWithTurnAfterMaxDepth)
+			boardScores = self.scoreBoardFromLineCache(self.HUMAN_COLOR, self.AI_COLOR, playerWithTurnAfterMaxDepth)
 			humanScore = boardScores[0]
 			aiScore = boardScores[1]
 			return None, None, aiScore - humanScore
-		
-		validMoves = self.getValidMoves(board)
+
+		remainingDepth = localMaxDepth - depth
+		tableMove = None
+		tableEntry = self.TRANSPOSITION_TABLE.lookup(zobristValueForBoard)
+		if tableEntry is not None:
+			tableDepth, boundType, tableScore, tableMoveIndex = tableEntry
+			if tableMoveIndex != NO_MOVE:
+				tableMove = list(divmod(tableMoveIndex, self.BOARD_DIMENSION))
+			if depth > 0 and tableDepth >= remainingDepth and tableMove is not None:
+				# the stored search went at least as deep as this one would
+				if boundType == EXACT:
+					return tableMove[0], tableMove[1], tableScore
+				elif boundType == LOWER_BOUND:
+					alpha = max(alpha, tableScore)
+				else:
+					beta = min(beta, tableScore)
+				if alpha >= beta:
+					return tableMove[0], tableMove[1], tableScore
+		originalAlpha, originalBeta = alpha, beta
+
+		if depth == 0 and self.defensiveMoves is not None:
+			validMoves = [move.copy() for move in self.defensiveMoves]
+		else:
+			validMoves = self.getValidMoves(board)
 		if len(validMoves) == 0:
 			return -1, -1, 0
 		if depth == 0 and len(validMoves) == 1:
 			return validMoves[0][0], validMoves[0][1], 0
+		self.putTableMoveFirst(board, validMoves, depth, tableMove)
+		leafScores = None
+		if self.numpyEvaluator is not None and depth == localMaxDepth - 1:
+			# every child of this board is a leaf, so score them all at once
+			leafScores = self.scoreLeavesInBatch(validMoves, self.AI_COLOR if maxOrMin == MAX else self.HUMAN_COLOR, localMaxDepth)
 		if maxOrMin == MAX:
 			# want to maximize this move
 			score = -math.inf
 			bestMove = validMoves[0] # default best move
-			if depth == 0:
+			if depth == 0 and not self.isPondering:
 				# on the top level of search, printing progress bar
-				percentComplete = 0
-				movesChecked = 0
-				barCompleteMultiplier = 0
-				print('\r[%s%s] %d%% (%d/%d moves checked) @ maxDepth = %d' % ("="*barCompleteMultiplier, "-"*(25-barCompleteMultiplier), percentComplete, movesChecked, len(validMoves), localMaxDepth), end = "")
+				printProgressBar(0, len(validMoves), localMaxDepth)
 
-			for move in validMoves:
-				if depth == 0:
+			for moveIndex, move in enumerate(validMoves):
+				if depth == 0 and not self.isPondering:
 					# print progress bar
-					percentComplete = int((movesChecked/len(validMoves))*100)
-					barCompleteMultiplier = percentComplete // 4
-					print('\r[%s%s] %d%% (%d/%d moves checked) @ maxDepth = %d' % ("="*barCompleteMultiplier, "-"*(25-barCompleteMultiplier), percentComplete, movesChecked, len(validMoves), localMaxDepth), end = "")
-					movesChecked += 1
+					printProgressBar(moveIndex, len(validMoves), localMaxDepth)
 
-				boardCopy = copyOfBoard(board)#list(map(list, board)) # copies board
-				performMove(boardCopy, move[0], move[1], self.AI_COLOR)
+				# the move is played on the board itself, and taken back once it has been searched
+				performMove(board, move[0], move[1], self.AI_COLOR)
+				self.performSearchMove(move, self.AI_COLOR)
 				newZobristValue = self.createZobristValueForNewMove(move, self.AI_COLOR, zobristValueForBoard)
-				if depth >= 2 and newZobristValue in self.BOARD_STATE_DICT:
-					# if we've already evaluated the score of this board state
-					# no chance of repeat boards until at least depth = 2
-					updatedScore = self.BOARD_STATE_DICT[newZobristValue]
+				winner, gameOver = self.checkIfSearchMoveCausedGameOver(move, self.AI_COLOR)
+				if winner == self.AI_COLOR:
+					updatedScore = WIN_SCORE
+				elif winner == self.HUMAN_COLOR:
+					updatedScore = -1 * WIN_SCORE
 				else:
-					winner, gameOver = self.checkIfMoveCausedGameOver(boardCopy, move)
-					if winner == self.AI_COLOR:
-						updatedScore = WIN_SCORE
-					elif winner == self.HUMAN_COLOR:
-						updatedScore = -1 * WIN_SCORE
+					# no winner
+					if gameOver:
+						# if board filled
+						updatedScore = 0
+					elif leafScores is not None:
+						updatedScore = leafScores[moveIndex]
+					elif USE_PVS and moveIndex > 0:
+						# only check if this move is better than the best one so far
+						_, __, updatedScore = self.minimax(board, depth + 1, MIN, alpha, alpha + 1, localMaxDepth, newZobristValue)
+						if alpha < updatedScore < beta:
+							# it is, so find its actual score
+							_, __, updatedScore = self.minimax(board, depth + 1, MIN, alpha, beta, localMaxDepth, newZobristValue)
 					else:
-						# no winner
-						if gameOver:
-							# if board filled
-							updatedScore = 0
-						else:
-							_, __, updatedScore = self.minimax(boardCopy, depth + 1, MIN, alpha, beta, localMaxDepth, newZobristValue)
-					if depth >= 2:
-						self.BOARD_STATE_DICT[newZobristValue] = updatedScore
+						_, __, updatedScore = self.minimax(board, depth + 1, MIN, alpha, beta, localMaxDepth, newZobristValue)
+				self.undoSearchMove(move, self.AI_COLOR)
+				performMove(board, move[0], move[1], EMPTY)
 				if updatedScore > score:
 					score = updatedScore
 					bestMove = move
 				alpha = max(alpha, score)
 				if alpha >= beta:
 					break # pruning
-			if depth == 0:
+			if depth == 0 and not self.isPondering:
 				# clear progress bar print-out
 				sys.stdout.write('\033[2K\033[1G')
+			self.storeInTranspositionTable(zobristValueForBoard, remainingDepth, score, originalAlpha, originalBeta, bestMove)
 			return bestMove[0], bestMove[1], score
 		else: 
 			# maxOrMin == MIN
 			# want to minimize this move
 			score = math.inf
 			bestMoveForHuman = validMoves[0]
-			for move in validMoves:
-				boardCopy = copyOfBoard(board) # copies board
-				performMove(boardCopy, move[0], move[1], self.HUMAN_COLOR)
+			for moveIndex, move in enumerate(validMoves):
+				# the move is played on the board itself, and taken back once it has been searched
+				performMove(board, move[0], move[1], self.HUMAN_COLOR)
+				self.performSearchMove(move, self.HUMAN_COLOR)
 				newZobristValue = self.createZobristValueForNewMove(move, self.HUMAN_COLOR, zobristValueForBoard)
-				if depth >= 2 and newZobristValue in self.BOARD_STATE_DICT:
-					updatedScore = self.BOARD_STATE_DICT[newZobristValue]
+				winner, gameOver = self.checkIfSearchMoveCausedGameOver(move, self.HUMAN_COLOR)
+				if winner == self.AI_COLOR:
+					updatedScore = WIN_SCORE
+				elif winner == self.HUMAN_COLOR:
+					updatedScore = -1 * WIN_SCORE
 				else:
-					winner, gameOver = self.checkIfMoveCausedGameOver(boardCopy, move)
-					if winner == self.AI_COLOR:
-						updatedScore = WIN_SCORE
-					elif winner == self.HUMAN_COLOR:
-						updatedScore = -1 * WIN_SCORE
+					# no winner
+					if gameOver:
+						# if board filled
+						updatedScore = 0
+					elif leafScores is not None:
+						updatedScore = leafScores[moveIndex]
+					elif USE_PVS and moveIndex > 0:
+						# only check if this move is better for the human than the best one so far
+						_, __, updatedScore = self.minimax(board, depth + 1, MAX, beta - 1, beta, localMaxDepth, newZobristValue)
+						if alpha < updatedScore < beta:
+							# it is, so find its actual score
+							_, __, updatedScore = self.minimax(board, depth + 1, MAX, alpha, beta, localMaxDepth, newZobristValue)
 					else:
-						# no winner
-						if gameOver:
-							# if board filled
-							updatedScore = 0
-						else:
-							_, __, updatedScore = self.minimax(boardCopy, depth + 1, MAX, alpha, beta, localMaxDepth, newZobristValue)
-					if depth >= 2:
-						self.BOARD_STATE_DICT[newZobristValue] = updatedScore
+						_, __, updatedScore = self.minimax(board, depth + 1, MAX, alpha, beta, localMaxDepth, newZobristValue)
+				self.undoSearchMove(move, self.HUMAN_COLOR)
+				performMove(board, move[0], move[1], EMPTY)
 				if updatedScore < score:
 					score = updatedScore
 					bestMoveForHuman = move
 				beta = min(beta, score)
 				if beta <= alpha:
 					break # pruning
+			self.storeInTranspositionTable(zobristValueForBoard, remainingDepth, score, originalAlpha, originalBeta, bestMoveForHuman)
 			return bestMoveForHuman[0], bestMoveForHuman[1], score
 
-	def scoreSections(self, board, colorOfEvaluator, colorOfEnemy, playerWithTurnAfterMaxDepth):
-		"""Scores all the different horizontal/vertical/diagonal sections on the board"""
-		evaluatorScore = 0
-		enemyScore = 0
-		evaluatorTrapIndicators = [0, 0, 0, 0]
-		enemyTrapIndicators = [0, 0, 0, 0]
-		if colorOfEvaluator == BLACK:
-			evaluatorScoresDict = self.blackThreatsScores
-			enemyScoresDict = self.whiteThreatsScores
-		else:
-			evaluatorScoresDict = self.whiteThreatsScores
-			enemyScoresDict = self.blackThreatsScores
-
-		# Check horizontal
-		for c in range(self.BOARD_DIMENSION - 5):
-			for r in range(self.BOARD_DIMENSION):
-				section6 = "".join(board[r][c:c + 6])
-				section5 = section6[:-1] # first 5 spaces of section 6
-				if section6 in evaluatorScoresDict:
-					evaluatorScore += evaluatorScoresDict[section6]
-					evaluatorTrapIndicators[0] = 1
-				elif section6 in enemyScoresDict:
-					enemyScore += enemyScoresDict[section6]
-					enemyTrapIndicators[0] = 1
-				if section5 in evaluatorScoresDict:
-					evaluatorScore += evaluatorScoresDict[section5]
-					evaluatorTrapIndicators[0] = 1
-				elif section5 in enemyScoresDict:
-					enemyScore += enemyScoresDict[section5]
-					enemyTrapIndicators[0] = 1
-				if c == self.BOARD_DIMENSION - 6:
-					# if in last section of row
-					section5 = section6[1:] # check the rightmost 5 section of the row
-					if section5 in evaluatorScoresDict:
-						evaluatorScore += evaluatorScoresDict[section5]
-						evaluatorTrapIndicators[0] = 1
-					elif section5 in enemyScoresDict:
-						enemyScore += enemyScoresDict[section5]
-						enemyTrapIndicators[0] = 1
-
-		# Check vertical
-		for c in range(self.BOARD_DIMENSION):
-			for r in range(self.BOARD_DIMENSION - 5):
-				section6 = ''
-				for i in range(6):
-					section6 += board[r + i][c]
-				section5 = section6[:-1] # first 5 spaces of section 6
-				if section6 in evaluatorScoresDict:
-					evaluatorScore += evaluatorScoresDict[section6]
-					evaluatorTrapIndicators[1] = 1
-				elif section6 in enemyScoresDict:
-					enemyScore += enemyScoresDict[section6]
-					enemyTrapIndicators[1] = 1
-				if section5 in evaluatorScoresDict:
-					evaluatorScore += evaluatorScoresDict[section5]
-					evaluatorTrapIndicators[1] = 1
-				elif section5 in enemyScoresDict:
-					enemyScore += enemyScoresDict[section5]
-					enemyTrapIndicators[1] = 1
-				if r == self.BOARD_DIMENSION - 6:
-					# if in last section of col
-					section5 = section6[1:] # check the bottom 5 section of the col
-					if section5 in evaluatorScoresDict:
-						evaluatorScore += evaluatorScoresDict[section5]
-						evaluatorTrapIndicators[1] = 1
-					elif section5 in enemyScoresDict:
-						enemyScore += enemyScoresDict[section5]
-						enemyTrapIndicators[1] = 1
+	def putTableMoveFirst(self, board, validMoves, depth, tableMove):
+		"""Moves the best move from the last time this board was searched to the front of validMoves"""
+		if tableMove is not None and board[tableMove[0]][tableMove[1]] == EMPTY:
+			if tableMove in validMoves:
+				validMoves.remove(tableMove)
+				validMoves.insert(0, tableMove)
+			elif depth > 0 or self.defensiveMoves is None:
+				validMoves.insert(0, tableMove)
 
-		# Check diagonal from top left to bottom right
-		for c in range(self.BOARD_DIMENSION - 5):
-			for r in range(self.BOARD_DIMENSION - 5):
-				section6 = ''
-				for i in range(6):
-					section6 += board[r + i][c + i]
-				section5 = section6[:-1]
-				if section6 in evaluatorScoresDict:
-					evaluatorScore += evaluatorScoresDict[section6]
-					evaluatorTrapIndicators[2] = 1
-				elif section6 in enemyScoresDict:
-					enemyScore += enemyScoresDict[section6]
-					enemyTrapIndicators[2] = 1
-				if section5 in evaluatorScoresDict:
-					evaluatorScore += evaluatorScoresDict[section5]
-					evaluatorTrapIndicators[2] = 1
-				elif section5 in enemyScoresDict:
-					enemyScore += enemyScoresDict[section5]
-					enemyTrapIndicators[2] = 1
-				if c == self.BOARD_DIMENSION - 6 or r == self.BOARD_DIMENSION - 6:
-					# if in last section of this diagonal path
-					section5 = section6[1:] # check the border section
-					if section5 in evaluatorScoresDict:
-						evaluatorScore += evaluatorScoresDict[section5]
-						evaluatorTrapIndicators[2] = 1
-					elif section5 in enemyScoresDict:
-						enemyScore += enemyScoresDict[section5]
-						enemyTrapIndicators[2] = 1
-		
-		# Check diagonal from top right to bottom left
-		for c in range(self.BOARD_DIMENSION - 5):
-			for r in range(5, self.BOARD_DIMENSION):
-				section6 = ''
-				for i in range(6):
-					section6 += board[r - i][c + i]
-				section5 = section6[:-1]
-				if section6 in evaluatorScoresDict:
-					evaluatorScore += evaluatorScoresDict[section6]
-					evaluatorTrapIndicators[3] = 1
-				elif section6 in enemyScoresDict:
-					enemyScore += enemyScoresDict[section6]
-					enemyTrapIndicators[3] = 1
-				if section5 in evaluatorScoresDict:
-					evaluatorScore += evaluatorScoresDict[section5]
-					evaluatorTrapIndicators[3] = 1
-				elif section5 in enemyScoresDict:
-					enemyScore += enemyScoresDict[section5]
-					enemyTrapIndicators[3] = 1
-				if c == self.BOARD_DIMENSION - 6 or r == 0:
-					# if in last section of this diagonal path
-					section5 = section6[1:] # check the border section
-					if section5 in evaluatorScoresDict:
-						evaluatorScore += evaluatorScoresDict[section5]
-						evaluatorTrapIndicators[3] = 1
-					elif section5 in enemyScoresDict:
-						enemyScore += enemyScoresDict[section5]
-						enemyTrapIndicators[3] = 1
-
-		# manually check the remaining unchecked length-5 corner sections 
-		topLeft, topRight, bottomRight, bottomLeft = '', '', '', ''
-		for i in range(5):
-			topLeft += board[4-i][i]
-			topRight += board[i][self.BOARD_DIMENSION - (5-i)]
-			bottomRight += board[self.BOARD_DIMENSION - i - 1][self.BOARD_DIMENSION - (5-i)]
-			bottomLeft += board[self.BOARD_DIMENSION - (5-i)][i]
-		cornerCounter = 1
-		for section in [topLeft, topRight, bottomRight, bottomLeft]:
-			if section in evaluatorScoresDict:
-				if section.count(colorOfEvaluator) == 4:
-					# since a 3-piece-trap is not actually a trap in this section
-					evaluatorScore += evaluatorScoresDict[section]
-					evaluatorTrapIndicators[cornerCounter%2 + 2] = 1
-				else:
-					evaluatorScore += (evaluatorScoresDict[section] // 2) # 3 piece 'traps' aren't as valuable here
-			elif section in enemyScoresDict:
-				if section.count(colorOfEnemy) == 4:
-					# since a 3-piece-trap is not actually a trap in this section
-					enemyScore += enemyScoresDict[section]
-					enemyTrapIndicators[cornerCounter%2 + 2] = 1
-				else:
-					enemyScore += (enemyScoresDict[section] // 2) # 3 piece 'traps' aren't as valuable here
-			cornerCounter += 1
+	def startSearchProcesses(self):
+		"""
+		Starts the processes that search the top level moves in parallel. The transposition table is
+		moved to shared memory so they can all use it, and they are given the same Zobrist keys
+		"""
+		self.TRANSPOSITION_TABLE = GomokuSharedTranspositionTable(TRANSPOSITION_TABLE_SIZE)
+		self.searchId = multiprocessing.Value('q', 0, lock=False)
+		self.searchPool = multiprocessing.Pool(NUM_SEARCH_PROCESSES, initializer=startSearchProcess,
+											   initargs=(self.AI_COLOR, self.BOARD_DIMENSION, self.RANDOM_HASH_TABLE,
+														 self.TRANSPOSITION_TABLE.name, self.searchId))
+		atexit.register(self.stopSearchProcesses)
+
+	def stopSearchProcesses(self):
+		"""Stops the search processes and frees the shared transposition table"""
+		if self.searchPool is not None:
+			self.searchPool.terminate()
+			self.searchPool.join()
+			self.searchPool = None
+			self.TRANSPOSITION_TABLE.close()
+			self.TRANSPOSITION_TABLE = GomokuTranspositionTable(TRANSPOSITION_TABLE_SIZE)
+
+	def parallelMinimax(self, board, alpha, beta, localMaxDepth, zobristValueForBoard):
+		"""
+		Finds the best move for the board like minimax does at depth 0, but has the search processes search
+		the moves. The first move is searched by itself to get a score to beat, then the rest are all searched
+		at once with a null window, and only the ones that beat it are searched again for their actual score
+		Returns the row in [0], column in [1], and score of the board in [2]
+		"""
+		self.numNodesSearched += 1
+		self.numSearches += 1
+		self.searchId.value = self.numSearches
+		tableMove = None
+		tableEntry = self.TRANSPOSITION_TABLE.lookup(zobristValueForBoard)
+		if tableEntry is not None and tableEntry[3] != NO_MOVE:
+			tableMove = list(divmod(tableEntry[3], self.BOARD_DIMENSION))
+		originalAlpha, originalBeta = alpha, beta
+
+		if self.defensiveMoves is not None:
+			validMoves = [move.copy() for move in self.defensiveMoves]
+		else:
+			validMoves = self.getValidMoves(board)
+		if len(validMoves) == 0:
+			return -1, -1, 0
+		if len(validMoves) == 1:
+			return validMoves[0][0], validMoves[0][1], 0
+		self.putTableMoveFirst(board, validMoves, 0, tableMove)
+
+		printProgressBar(0, len(validMoves), localMaxDepth)
+		score, numNodes = self.searchPool.apply(searchRootMoveInProcess, ((self.numSearches, board, validMoves[0], localMaxDepth, alpha, beta),))
+		self.numNodesSearched += numNodes
+		bestMove = validMoves[0]
+		alpha = max(alpha, score)
+		printProgressBar(1, len(validMoves), localMaxDepth)
+
+		if alpha < beta:
+			nullWindowAlpha = alpha
+			tasks = [(self.numSearches, board, move, localMaxDepth, nullWindowAlpha, nullWindowAlpha + 1) for move in validMoves[1:]]
+			# every null window result comes in before any move is searched again, so that the moves that might
+			# be better than the first one can all be searched again at the same time, instead of one by one
+			# behind the null window searches that are still waiting for a process
+			movesToResearch = []
+			for moveIndex, (updatedScore, numNodes) in enumerate(self.searchPool.imap(searchRootMoveInProcess, tasks), 1):
+				move = validMoves[moveIndex]
+				self.numNodesSearched += numNodes
+				printProgressBar(moveIndex + 1, len(validMoves), localMaxDepth)
+				if updatedScore >= beta:
+					# the move is at least as good as the null window score, which is already enough to prune
+					score, bestMove = updatedScore, move
+					movesToResearch = []
+					self.skipRemainingRootMoves()
+					break # pruning
+				if updatedScore > nullWindowAlpha:
+					movesToResearch.append(move)
+			# results are used in the same order as the moves, so the best move doesn't depend on which process finishes first
+			researches = [(move, self.searchPool.apply_async(searchRootMoveInProcess, ((self.numSearches, board, move, localMaxDepth, alpha, beta),)))
+						  for move in movesToResearch]
+			for move, research in researches:
+				updatedScore, numNodes = research.get()
+				self.numNodesSearched += numNodes
+				if updatedScore is None:
+					continue  # stopped, since an earlier move already caused pruning
+				if updatedScore > score:
+					score = updatedScore
+					bestMove = move
+				alpha = max(alpha, score)
+				if alpha >= beta:
+					self.skipRemainingRootMoves()
+					break # pruning
+		# clear progress bar print-out
+		sys.stdout.write('\033[2K\033[1G')
+		self.storeInTranspositionTable(zobristValueForBoard, localMaxDepth, score, originalAlpha, originalBeta, bestMove)
+		return bestMove[0], bestMove[1], score
 
+	def skipRemainingRootMoves(self):
+		"""Starts a new search id, so the search processes skip or stop every move from the current search"""
+		self.numSearches += 1
+		self.searchId.value = self.numSearches
 
-		numberOfEvaluatorTraps = sum(evaluatorTrapIndicators)
-		numberOfEnemyTraps = sum(enemyTrapIndicators)
+	def searchRootMove(self, board, move, localMaxDepth, alpha, beta):
+		"""
+		Searches the board after the AI plays the move, as part of a top level search. Used by the search processes
+		Returns the score of the move, and the number of boards searched
+		"""
+		self.numNodesSearched = 0
+		boardCopy = copyOfBoard(board)
+		performMove(boardCopy, move[0], move[1], self.AI_COLOR)
+		winner, gameOver = self.checkIfMoveCausedGameOver(boardCopy, move)
+		if winner == self.AI_COLOR:
+			return WIN_SCORE, 0
+		elif winner == self.HUMAN_COLOR:
+			return -1 * WIN_SCORE, 0
+		elif gameOver:
+			return 0, 0
+		self.setSearchBoard(boardCopy)
+		zobristValue = self.createZobristValueForBoard(boardCopy)
+		_, __, score = self.minimax(boardCopy, 1, MIN, alpha, beta, localMaxDepth, zobristValue)
+		return score, self.numNodesSearched
+
+	def setSearchBoard(self, board):
+		"""Sets up the caches kept for the board being searched"""
+		self.lineCache = GomokuLineCache(board, THREAT_TABLES, self.positionWeightsMatrix)
+		self.candidateMoves = GomokuCandidateMoves(board, MAX_NEIGHBOR_DIST)
+		self.bitboard = GomokuBitboard(board)
+		if self.numpyEvaluator is not None:
+			self.numpyEvaluator.setBoard(board)
+
+	def checkIfSearchMoveCausedGameOver(self, move, color):
+		"""
+		Does the same as checkIfMoveCausedGameOver for a move that was just played with performSearchMove,
+		using the bits of the lines through the move
+		"""
+		if self.bitboard.isFive(move[0] * self.BOARD_DIMENSION + move[1], PIECE_CODES[color]):
+			return color, True
+		return None, self.bitboard.isFull()
+
+	def performSearchMove(self, move, color):
+		"""Updates the caches kept for the board being searched after a move is played on it"""
+		self.lineCache.performMove(move[0], move[1], color)
+		self.candidateMoves.performMove(move[0], move[1])
+		self.bitboard.play(move[0] * self.BOARD_DIMENSION + move[1], PIECE_CODES[color])
+		if self.numpyEvaluator is not None:
+			self.numpyEvaluator.performMove(move[0], move[1], color)
+
+	def undoSearchMove(self, move, color):
+		"""Updates the caches kept for the board being searched after a move is undone"""
+		self.lineCache.undoMove(move[0], move[1], color)
+		self.candidateMoves.undoMove(move[0], move[1])
+		self.bitboard.undo(move[0] * self.BOARD_DIMENSION + move[1], PIECE_CODES[color])
+		if self.numpyEvaluator is not None:
+			self.numpyEvaluator.undoMove(move[0], move[1])
+
+	def scoreLeavesInBatch(self, moves, color, localMaxDepth):
+		"""
+		Scores the boards from playing each move for the color, the same way as a leaf of
+		minimax would, using self.numpyEvaluator. Returns a list with the score for each move
+		"""
+		playerWithTurnAfterMaxDepth = self.AI_COLOR if localMaxDepth % 2 == 0 else self.HUMAN_COLOR
+		sectionScores, numTrapDirections, positionScores = self.numpyEvaluator.scoreChildren(moves, color)
+		humanSectionScores, aiSectionScores = sectionScores[self.HUMAN_COLOR].tolist(), sectionScores[self.AI_COLOR].tolist()
+		humanTraps, aiTraps = numTrapDirections[self.HUMAN_COLOR].tolist(), numTrapDirections[self.AI_COLOR].tolist()
+		humanPositionScores, aiPositionScores = positionScores[self.HUMAN_COLOR].tolist(), positionScores[self.AI_COLOR].tolist()
+		leafScores = []
+		for i in range(len(moves)):
+			humanScore, aiScore = self.combineSectionScores(humanSectionScores[i], aiSectionScores[i], humanTraps[i], aiTraps[i],
+															self.HUMAN_COLOR, self.AI_COLOR, playerWithTurnAfterMaxDepth)
+			leafScores.append(aiScore + aiPositionScores[i] - (humanScore + humanPositionScores[i]))
+		return leafScores
+
+	def storeInTranspositionTable(self, zobristValue, remainingDepth, score, alpha, beta, bestMove):
+		"""
+		Saves the result of searching a board. alpha and beta are the bounds the search started with,
+		which determine whether the score is exact or only a bound on the true score
+		"""
+		if score <= alpha:
+			boundType = UPPER_BOUND
+		elif score >= beta:
+			boundType = LOWER_BOUND
+		else:
+			boundType = EXACT
+		self.TRANSPOSITION_TABLE.store(zobristValue, remainingDepth, boundType, score, bestMove[0] * self.BOARD_DIMENSION + bestMove[1])
 
+	def scoreSections(self, board, colorOfEvaluator, colorOfEnemy, playerWithTurnAfterMaxDepth):
+		"""Scores all the different horizontal/vertical/diagonal sections on the board"""
+		scores = {BLACK: 0, WHITE: 0}
+		trapIndicators = {BLACK: [0, 0, 0, 0], WHITE: [0, 0, 0, 0]}
+		for spots, direction, lineType in self.boardLines:
+			lineCode = encodeSection([board[row][col] for row, col in spots])
+			blackScore, whiteScore, numBlackThreats, numWhiteThreats = scoreLine(lineCode, len(spots), lineType, THREAT_TABLES)
+			scores[BLACK] += blackScore
+			scores[WHITE] += whiteScore
+			if numBlackThreats > 0:
+				trapIndicators[BLACK][direction] = 1
+			if numWhiteThreats > 0:
+				trapIndicators[WHITE][direction] = 1
+
+		return self.combineSectionScores(scores[colorOfEvaluator], scores[colorOfEnemy],
+										 sum(trapIndicators[colorOfEvaluator]), sum(trapIndicators[colorOfEnemy]),
+										 colorOfEvaluator, colorOfEnemy, playerWithTurnAfterMaxDepth)
+
+	def combineSectionScores(self, evaluatorScore, enemyScore, numberOfEvaluatorTraps, numberOfEnemyTraps,
+							 colorOfEvaluator, colorOfEnemy, playerWithTurnAfterMaxDepth):
+		"""
+		Weights the total section scores of each player by the traps they have,
+		and by who gets to play next
+		"""
 		# if traps found in multiple directions, weight this very heavily
 		if numberOfEvaluatorTraps > 1:
 			evaluatorScore *= 4
@@ -815,6 +1046,20 @@ class GomokuStrategy(GomokuPlayer):
 		enemyScore = sectionsScores[1] + positionWeightScores[1]
 		return evaluatorScore, enemyScore
 
+	def scoreBoardFromLineCache(self, colorOfEvaluator, colorOfEnemy, playerWithTurnAfterMaxDepth):
+		"""
+		Scores the board the same way as scoreBoard, but using the
+		line scores kept up to date by self.lineCache
+		"""
+		lineCache = self.lineCache
+		sectionsScores = self.combineSectionScores(
+			lineCache.sectionScores[colorOfEvaluator], lineCache.sectionScores[colorOfEnemy],
+			sum(lineCache.trapIndicators(colorOfEvaluator)), sum(lineCache.trapIndicators(colorOfEnemy)),
+			colorOfEvaluator, colorOfEnemy, playerWithTurnAfterMaxDepth)
+		evaluatorScore = sectionsScores[0] + lineCache.positionScores[colorOfEvaluator]
+		enemyScore = sectionsScores[1] + lineCache.positionScores[colorOfEnemy]
+		return evaluatorScore, enemyScore
+
 
 def opponentOf(color):
 	"""Get the opposing color"""
@@ -829,3 +1074,41 @@ def performMove(board, row, col, color):
 def copyOfBoard(board):
 	"""Returns a copy of the given board"""
 	return list(map(list, board))
+
+
+def printProgressBar(movesChecked, numMoves, localMaxDepth):
+	"""Prints the progress bar for the top level of the search"""
+	percentComplete = int((movesChecked/numMoves)*100)
+	barCompleteMultiplier = percentComplete // 4
+	print('\r[%s%s] %d%% (%d/%d moves checked) @ maxDepth = %d' % ("="*barCompleteMultiplier, "-"*(25-barCompleteMultiplier), percentComplete, movesChecked, numMoves, localMaxDepth), end = "")
+
+
+# the A.I. in each search process, set up by startSearchProcess
+SEARCH_PROCESS_STRATEGY = None
+SEARCH_PROCESS_SEARCH_ID = None
+
+
+def startSearchProcess(color, boardDimension, randomHashTable, tableName, searchId):
+	"""Sets up a search process with an A.I. that uses the main process' Zobrist keys and shared transposition table"""
+	global SEARCH_PROCESS_STRATEGY, SEARCH_PROCESS_SEARCH_ID
+	signal.signal(signal.SIGINT, signal.SIG_IGN)  # the main process handles quitting
+	SEARCH_PROCESS_STRATEGY = GomokuStrategy(color, boardDimension)
+	SEARCH_PROCESS_STRATEGY.RANDOM_HASH_TABLE = randomHashTable
+	SEARCH_PROCESS_STRATEGY.TRANSPOSITION_TABLE = GomokuSharedTranspositionTable(TRANSPOSITION_TABLE_SIZE, tableName)
+	SEARCH_PROCESS_STRATEGY.searchId = searchId
+	SEARCH_PROCESS_SEARCH_ID = searchId
+
+
+def searchRootMoveInProcess(task):
+	"""
+	Searches a single top level move in a search process. The task is (search id, board, move, max depth, alpha, beta)
+	Returns the score of the move, and the number of boards searched
+	"""
+	searchId, board, move, localMaxDepth, alpha, beta = task
+	if searchId != SEARCH_PROCESS_SEARCH_ID.value:
+		return None, 0  # the search this move was for has already finished
+	SEARCH_PROCESS_STRATEGY.taskSearchId = searchId
+	try:
+		return SEARCH_PROCESS_STRATEGY.searchRootMove(board, move, localMaxDepth, alpha, beta)
+	except SearchStopped:
+		return None, SEARCH_PROCESS_STRATEGY.numNodesSearched
@@ -0,0 +1,310 @@
+# Threat-space search for the Gomoku A.I.
+# Most games are decided by a forced sequence of threats: a four has to be blocked right away, and an
+# open three has to be blocked before it becomes an open four. Since every threat leaves the defender
+# only a few replies, a search that only plays threats can look much deeper than minimax can.
+# VCF (victory by continuous fours) only plays fours. VCT (victory by continuous threats) also plays
+# open threes, and lets the defender answer them with a block or with a four of their own.
+#
+# Every 5 spot window of the board keeps a count of each color's pieces in it, so the spots that make
+# a five, a four or a three for a color can be found from the windows the other color isn't in.
+import random
+from gomoku.gomoku_patterns import PIECE_CODES
+
+EMPTY, BLACK, WHITE = '.', 'X', 'O'
+VCF_MAX_DEPTH = 12  # most fours the attacker can play in a row (23 moves deep)
+VCT_MAX_DEPTH = 5  # most threats the attacker can play in a row when threes are allowed
+MAX_NODES_PER_SOLVE = 1000  # positions a single solve can look at before giving up
+MAX_NODES_FOR_DEFENSES = 10000  # positions all the checks of findDefensiveMoves can look at together
+MAX_NODES_PER_DEFENSE = 250  # positions first looked at to check whether a single move stops a win (MAX_NODES_PER_SOLVE if that isn't enough)
+THREAT_CACHE_SIZE = 1 << 18  # number of positions the cache holds before it is cleared
+DIRECTION_VECTORS = [[1, -1], [1, 0], [1, 1], [0, 1]]
+
+
+def opponentCode(code):
+	"""Gets the piece code of the opposing color"""
+	return 3 - code
+
+
+class GomokuThreatSolver:
+	"""
+	Searches for forced wins made up only of threats. Spots are stored by index (row * dimension + col)
+	and colors by their piece code (see gomoku_patterns.py). Results are cached between solves
+	"""
+
+	def __init__(self, dimension):
+		self.dimension = dimension
+		numSpots = dimension * dimension
+		self.spots = [PIECE_CODES[EMPTY]] * numSpots
+		# every 5 spot window on the board, and the windows that each spot is in
+		self.windows = []
+		self.windowsOfSpot = [[] for _ in range(numSpots)]
+		for row in range(dimension):
+			for col in range(dimension):
+				for rowStep, colStep in DIRECTION_VECTORS:
+					endRow, endCol = row + 4 * rowStep, col + 4 * colStep
+					if 0 <= endRow < dimension and 0 <= endCol < dimension:
+						window = tuple((row + i * rowStep) * dimension + col + i * colStep for i in range(5))
+						for spot in window:
+							self.windowsOfSpot[spot].append(len(self.windows))
+						self.windows.append(window)
+		# pieceCounts[code][window] is the number of pieces of that color in the window
+		self.pieceCounts = [None, [0] * len(self.windows), [0] * len(self.windows)]
+		# windowsWithCount[code][n] is the set of windows with n pieces of that color and none of the other
+		self.windowsWithCount = [None] + [[set() for _ in range(6)] for _ in range(2)]
+		self.zobristTable = [None] + [[random.getrandbits(64) for _ in range(numSpots)] for _ in range(2)]
+		self.zobristValue = 0
+		# (Zobrist value, attacker, threes allowed) -> (depth, winning spot or None if no win was found, proof spots)
+		self.cache = {}
+		self.nodesRemaining = 0
+		self.proofSpots = None  # spots of the last win found
+		self.ranOutOfNodes = False  # whether the last solve gave up before it could show that there is no win
+		self.numNodesSearched = 0  # positions looked at by every solve so far
+		self.isStopped = False  # set from another thread to make every solve give up right away
+
+	def setBoard(self, board):
+		"""Sets up the solver's board and window counts to match the given board"""
+		for code in [PIECE_CODES[BLACK], PIECE_CODES[WHITE]]:
+			self.pieceCounts[code] = [0] * len(self.windows)
+			self.windowsWithCount[code] = [set() for _ in range(6)]
+			self.windowsWithCount[code][0] = set(range(len(self.windows)))
+		self.spots = [PIECE_CODES[EMPTY]] * (self.dimension * self.dimension)
+		self.zobristValue = 0
+		for row in range(self.dimension):
+			for col in range(self.dimension):
+				if board[row][col] != EMPTY:
+					self.play(row * self.dimension + col, PIECE_CODES[board[row][col]])
+
+	def play(self, spot, code):
+		"""Plays a piece of the given color, and updates the window counts"""
+		self.spots[spot] = code
+		self.zobristValue ^= self.zobristTable[code][spot]
+		ownCounts, otherCounts = self.pieceCounts[code], self.pieceCounts[opponentCode(code)]
+		ownWindows, otherWindows = self.windowsWithCount[code], self.windowsWithCount[opponentCode(code)]
+		for window in self.windowsOfSpot[spot]:
+			if otherCounts[window] == 0:
+				ownWindows[ownCounts[window]].discard(window)
+				ownWindows[ownCounts[window] + 1].add(window)
+			if ownCounts[window] == 0:
+				# the window was open for the other color, and isn't anymore
+				otherWindows[otherCounts[window]].discard(window)
+			ownCounts[window] += 1
+
+	def undo(self, spot, code):
+		"""Removes the piece of the given color, and updates the window counts"""
+		self.spots[spot] = PIECE_CODES[EMPTY]
+		self.zobristValue ^= self.zobristTable[code][spot]
+		ownCounts, otherCounts = self.pieceCounts[code], self.pieceCounts[opponentCode(code)]
+		ownWindows, otherWindows = self.windowsWithCount[code], self.windowsWithCount[opponentCode(code)]
+		for window in self.windowsOfSpot[spot]:
+			ownCounts[window] -= 1
+			if otherCounts[window] == 0:
+				ownWindows[ownCounts[window] + 1].discard(window)
+				ownWindows[ownCounts[window]].add(window)
+			if ownCounts[window] == 0:
+				otherWindows[otherCounts[window]].add(window)
+
+	def emptySpotsOfWindows(self, windowIds):
+		"""Gets the sorted empty spots of the given windows"""
+		spots, windows = self.spots, self.windows
+		emptySpots = set()
+		for window in windowIds:
+			for spot in windows[window]:
+				if spots[spot] == 0:
+					emptySpots.add(spot)
+		return sorted(emptySpots)
+
+	def fiveSpots(self, code):
+		"""Gets the spots where the color would make five in a row"""
+		return self.emptySpotsOfWindows(self.windowsWithCount[code][4])
+
+	def fourSpots(self, code):
+		"""Gets the spots where the color would make a four"""
+		return self.emptySpotsOfWindows(self.windowsWithCount[code][3])
+
+	def fourWindowSpots(self, code):
+		"""Gets the two empty spots of every window with 3 pieces of the color and none of the other color"""
+		spots, windows = self.spots, self.windows
+		return [[spot for spot in windows[window] if spots[spot] == 0] for window in self.windowsWithCount[code][3]]
+
+	def doubleFiveSpots(self, fourWindowSpots, blockedSpot=None):
+		"""
+		Checks if a color has a spot that would make a four that can't be blocked, because it leaves
+		two different spots that make five. fourWindowSpots is from fourWindowSpots, and windows containing
+		blockedSpot are skipped, to see what the color could still do if the other color played there
+		"""
+		# each empty spot in a window with 3 pieces makes five with the other empty spot of that window
+		partners = {}
+		for first, second in fourWindowSpots:
+			if blockedSpot == first or blockedSpot == second:
+				continue
+			if first in partners and partners[first] != second:
+				return True
+			if second in partners and partners[second] != first:
+				return True
+			partners[first], partners[second] = second, first
+		return False
+
+	def threeDefenses(self, code):
+		"""Gets the spots the other color can play to stop the color from making a four that can't be blocked"""
+		fourWindowSpots = self.fourWindowSpots(code)
+		return [spot for spot in self.fourSpots(code) if not self.doubleFiveSpots(fourWindowSpots, spot)]
+
+	def attack(self, code, depth, allowThrees):
+		"""
+		Searches for a forced win for the color, which has the next move
+		Returns the spot that starts the win, or None if no win was found.
+		When a win is found, self.proofSpots is set to every spot that the win is played on
+		"""
+		fiveSpots = self.fiveSpots(code)
+		if fiveSpots:
+			self.proofSpots = {fiveSpots[0]}
+			return fiveSpots[0]
+		if depth == 0 or self.nodesRemaining <= 0:
+			return None
+		self.nodesRemaining -= 1
+
+		cacheKey = (self.zobristValue, code, allowThrees)
+		cacheEntry = self.cache.get(cacheKey)
+		if cacheEntry is not None and (cacheEntry[1] is not None or cacheEntry[0] >= depth):
+			self.proofSpots = cacheEntry[2]
+			return cacheEntry[1]
+
+		defenderCode = opponentCode(code)
+		defenderFiveSpots = self.fiveSpots(defenderCode)
+		if len(defenderFiveSpots) >= 2:
+			return None  # the defender wins next move no matter what
+
+		winningSpot, proofSpots = None, None
+		fourSpots = self.fourSpots(code)
+		if defenderFiveSpots:
+			# the attacker has to block the defender's four, so it only continues if the block is a threat too
+			fourSpots = [spot for spot in fourSpots if spot == defenderFiveSpots[0]]
+		for spot in fourSpots:
+			self.play(spot, code)
+			newFiveSpots = self.fiveSpots(code)
+			if len(newFiveSpots) >= 2:
+				# the defender can't block both
+				winningSpot, proofSpots = spot, {spot, *newFiveSpots}
+			else:
+				# the defender has to block the four
+				self.play(newFiveSpots[0], defenderCode)
+				if self.attack(code, depth - 1, allowThrees) is not None:
+					winningSpot, proofSpots = spot, {spot, newFiveSpots[0]} | self.proofSpots
+				self.undo(newFiveSpots[0], defenderCode)
+			self.undo(spot, code)
+			if winningSpot is not None:
+				break
+
+		if winningSpot is None and allowThrees:
+			fourSpotsTried = set(fourSpots)
+			threeSpots = [spot for spot in self.emptySpotsOfWindows(self.windowsWithCount[code][2]) if spot not in fourSpotsTried]
+			if defenderFiveSpots:
+				threeSpots = [spot for spot in threeSpots if spot == defenderFiveSpots[0]]
+			for spot in threeSpots:
+				if self.nodesRemaining <= 0:
+					break
+				self.play(spot, code)
+				if self.doubleFiveSpots(self.fourWindowSpots(code)):
+					# the defender can block the three, or play a four of their own
+					defenses = sorted(set(self.threeDefenses(code) + self.fourSpots(defenderCode)))
+					defensesProofSpots = {spot, *defenses}
+					for defense in defenses:
+						self.play(defense, defenderCode)
+						defenseFailed = self.attack(code, depth - 1, allowThrees) is not None
+						self.undo(defense, defenderCode)
+						if not defenseFailed:
+							break
+						defensesProofSpots |= self.proofSpots
+					else:
+						winningSpot, proofSpots = spot, defensesProofSpots
+				self.undo(spot, code)
+				if winningSpot is not None:
+					break
+
+		if winningSpot is not None or self.nodesRemaining > 0:
+			# a search that ran out of nodes didn't really show that there is no win
+			if len(self.cache) >= THREAT_CACHE_SIZE:
+				self.cache.clear()
+			self.cache[cacheKey] = (depth, winningSpot, proofSpots)
+		self.proofSpots = proofSpots
+		return winningSpot
+
+	def solve(self, code, maxNodes=MAX_NODES_PER_SOLVE):
+		"""
+		Searches for a forced win for the color on the solver's board, first with fours only, then with threes
+		Returns the spot that starts the win, or None if no win was found
+		"""
+		self.nodesRemaining = 0 if self.isStopped else maxNodes
+		winningSpot = self.attack(code, VCF_MAX_DEPTH, False)
+		self.numNodesSearched += maxNodes - max(self.nodesRemaining, 0)
+		self.ranOutOfNodes = self.nodesRemaining <= 0
+		if winningSpot is None:
+			self.nodesRemaining = 0 if self.isStopped else maxNodes
+			winningSpot = self.attack(code, VCT_MAX_DEPTH, True)
+			self.numNodesSearched += maxNodes - max(self.nodesRemaining, 0)
+			self.ranOutOfNodes = self.ranOutOfNodes or self.nodesRemaining <= 0
+		return winningSpot
+
+	def isProvenDefense(self, spot, code):
+		"""
+		Checks if the color playing the spot leaves the other color without a forced win. The first solve is
+		small, and only if it runs out of nodes is the spot checked again with a full solve. A spot is only
+		a defense if a solve looked at every threat without finding a win
+		"""
+		attackerCode = opponentCode(code)
+		self.play(spot, code)
+		isDefense = False
+		for maxNodes in [MAX_NODES_PER_DEFENSE, MAX_NODES_PER_SOLVE]:
+			if self.solve(attackerCode, maxNodes) is not None:
+				break
+			if not self.ranOutOfNodes:
+				isDefense = True
+				break
+		self.undo(spot, code)
+		return isDefense
+
+	def stop(self):
+		"""Makes the solve that is running, and any solves after it, give up without finding a win"""
+		self.isStopped = True
+		self.nodesRemaining = 0
+
+	def resume(self):
+		"""Lets solves run again after stop"""
+		self.isStopped = False
+
+	def findWinningMove(self, board, color):
+		"""
+		Searches for a forced win for the color, which has the next move on the board
+		Returns the [row, col] of the move that starts the win, or None if no win was found
+		"""
+		self.setBoard(board)
+		winningSpot = self.solve(PIECE_CODES[color])
+		if winningSpot is None:
+			return None
+		return list(divmod(winningSpot, self.dimension))
+
+	def findDefensiveMoves(self, board, color):
+		"""
+		Checks if the opponent of the color would have a forced win if it were their move on the board
+		Returns the [row, col] moves for the color that are proven to stop every win, or None if the opponent
+		has no forced win (or if the moves that stop it couldn't all be checked, so every move has to be searched)
+		"""
+		self.setBoard(board)
+		code, attackerCode = PIECE_CODES[color], opponentCode(PIECE_CODES[color])
+		if self.solve(attackerCode) is None:
+			return None
+		# a move can stop the win by being on one of the spots that the win is played on, by making a four or a
+		# three that gives the color fours to answer threats with, or by breaking up one of the opponent's threes and fours
+		candidates = set(self.proofSpots)
+		candidates.update(self.emptySpotsOfWindows(self.windowsWithCount[code][2]))
+		candidates.update(self.fourSpots(code))
+		candidates.update(self.fourSpots(attackerCode))
+		candidates.update(self.emptySpotsOfWindows(self.windowsWithCount[attackerCode][2]))
+		maxNodesSearched = self.numNodesSearched + MAX_NODES_FOR_DEFENSES
+		defensiveMoves = []
+		for spot in sorted(candidates):
+			if self.numNodesSearched >= maxNodesSearched:
+				return None  # a move that wasn't checked might be the only one that stops the win
+			if self.isProvenDefense(spot, code):
+				defensiveMoves.append(list(divmod(spot, self.dimension)))
+		return defensiveMoves if defensiveMoves else None
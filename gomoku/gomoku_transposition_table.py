@@ -0,0 +1,129 @@
+# Transposition table for the Gomoku A.I.
+# Entries are kept in fixed-size arrays instead of a dictionary, so the table never grows no matter
+# how long the game goes on. Each position's Zobrist key picks the slot it is stored in, and the full
+# key is stored with the entry so that positions that share a slot can be told apart.
+from array import array
+from multiprocessing import shared_memory
+
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2  # how a stored score relates to the true score
+NO_MOVE = -1
+DEFAULT_TABLE_SIZE = 1 << 20  # number of slots, must be a power of 2. Takes up about 26 MB
+WORDS_PER_SHARED_ENTRY = 3  # 64 bit words per entry of the shared table (check, score, depth/bound/move/age)
+WORD_MASK = (1 << 64) - 1
+
+
+class GomokuTranspositionTable:
+	"""
+	Stores (depth searched, bound type, score, best move) for positions, keyed by their Zobrist key.
+	When two positions want the same slot, the entry from an older search is always replaced, and
+	an entry from the current search is only replaced by one that was searched at least as deep.
+	"""
+
+	def __init__(self, size=DEFAULT_TABLE_SIZE):
+		self.indexMask = size - 1
+		self.keys = array('Q', [0]) * size
+		self.depths = array('b', [-1]) * size  # -1 marks an empty slot
+		self.boundTypes = array('b', [0]) * size
+		self.scores = array('q', [0]) * size
+		self.bestMoves = array('i', [NO_MOVE]) * size  # row * board dimension + col
+		self.ages = array('I', [0]) * size  # which search each entry was stored in
+		self.currentAge = 0
+
+	def newSearch(self):
+		"""Marks every stored entry as coming from an older search, so they can be replaced first"""
+		self.currentAge += 1
+
+	def lookup(self, key):
+		"""
+		Finds the entry for the given key
+		Returns (depth, bound type, score, best move) or None if the position isn't stored
+		"""
+		index = key & self.indexMask
+		if self.keys[index] != key or self.depths[index] < 0:
+			return None
+		return self.depths[index], self.boundTypes[index], self.scores[index], self.bestMoves[index]
+
+	def store(self, key, depth, boundType, score, bestMove):
+		"""Stores an entry for the given key, unless it would replace a more valuable one"""
+		index = key & self.indexMask
+		if self.keys[index] != key and self.ages[index] == self.currentAge and self.depths[index] > depth:
+			return  # keep the deeper result from this search
+		self.keys[index] = key
+		self.depths[index] = depth
+		self.boundTypes[index] = boundType
+		self.scores[index] = score
+		self.bestMoves[index] = bestMove
+		self.ages[index] = self.currentAge
+
+	def clear(self):
+		"""Removes every entry"""
+		for i in range(len(self.depths)):
+			self.depths[i] = -1
+
+
+class GomokuSharedTranspositionTable:
+	"""
+	The same table as GomokuTranspositionTable, kept in shared memory so that every search process
+	reads and writes the same entries. Entries are written without any locks: each one is stored as
+	the score, the other fields packed into a single word, and the key XORed with both of them. If a
+	process reads an entry while another process is partway through writing it, the key it gets back
+	won't match, and the entry is treated as missing. The first word of the memory holds the current age
+	"""
+
+	def __init__(self, size=DEFAULT_TABLE_SIZE, name=None):
+		"""Creates the shared memory for a new table, or attaches to an existing table by its name"""
+		self.indexMask = size - 1
+		self.isOwner = name is None
+		if self.isOwner:
+			# new shared memory is filled with zeros, which marks every slot as empty
+			self.sharedMemory = shared_memory.SharedMemory(create=True, size=8 * (1 + WORDS_PER_SHARED_ENTRY * size))
+		else:
+			self.sharedMemory = shared_memory.SharedMemory(name=name)
+		self.name = self.sharedMemory.name
+		self.words = self.sharedMemory.buf.cast('Q')
+
+	def newSearch(self):
+		"""Marks every stored entry as coming from an older search, so they can be replaced first"""
+		self.words[0] += 1
+
+	def lookup(self, key):
+		"""
+		Finds the entry for the given key
+		Returns (depth, bound type, score, best move) or None if the position isn't stored
+		"""
+		words = self.words
+		index = 1 + WORDS_PER_SHARED_ENTRY * (key & self.indexMask)
+		check, score, fields = words[index], words[index + 1], words[index + 2]
+		if fields == 0 or check ^ score ^ fields != key:
+			return None
+		if score >> 63:
+			score -= 1 << 64  # stored as an unsigned word
+		return (fields & 0xFF) - 1, (fields >> 8) & 0x3, score, ((fields >> 10) & 0xFFFFF) - 1
+
+	def store(self, key, depth, boundType, score, bestMove):
+		"""Stores an entry for the given key, unless it would replace a more valuable one"""
+		words = self.words
+		index = 1 + WORDS_PER_SHARED_ENTRY * (key & self.indexMask)
+		currentAge = words[0]
+		storedFields = words[index + 2]
+		if storedFields != 0 and (storedFields >> 30) == currentAge and (storedFields & 0xFF) - 1 > depth and \
+				words[index] ^ words[index + 1] ^ storedFields != key:
+			return  # keep the deeper result from this search
+		# depth and best move are stored plus 1, so that a slot of all zeros is empty
+		fields = (depth + 1) | (boundType << 8) | ((bestMove + 1) << 10) | (currentAge << 30)
+		score &= WORD_MASK
+		words[index + 1] = score
+		words[index + 2] = fields
+		words[index] = key ^ score ^ fields
+
+	def clear(self):
+		"""Removes every entry"""
+		for i in range(1, len(self.words)):
+			self.words[i] = 0
+
+	def close(self):
+		"""Detaches from the shared memory, and frees it if this is the table that created it"""
+		self.words.release()
+		self.sharedMemory.close()
+		if self.isOwner:
+			self.sharedMemory.unlink()
@@ -0,0 +1,194 @@
+# Bitboard representation of the 8x8 Othello board, used by the A.I. to search faster
+# than it can with the list of lists board that the client uses
+#
+# Each color's pieces are stored in a single 64 bit integer, with one bit per spot:
+#
+#     A  B  C  D  E  F  G  H
+# 1   0  1  2  3  4  5  6  7
+# 2   8  9 10 11 12 13 14 15
+# 3  16 17 18 19 20 21 22 23
+# ...
+# 8  56 57 58 59 60 61 62 63
+#
+# Moving one spot in a direction is a shift of the whole board. Shifting left or right
+# would wrap pieces around from one edge of the board to the other, so the column that
+# they would wrap into is masked out after every shift. Valid moves are then found for every
+# line at once, by repeatedly shifting the player's pieces along a direction through the
+# opponent's pieces (a flood fill). Captured pieces are found the same way, by shifting
+# the bit of the move along each direction until it leaves the opponent's pieces.
+#
+# The bitboard also keeps a Zobrist key of the position up to date. Flipping a piece changes the
+# key by the same amount whichever color it flips to, so the change from all the flipped pieces in
+# a row is looked up in one step, instead of looking at every flipped piece.
+import random
+
+EMPTY, BLACK, WHITE = '.', '0', 'O'
+BOARD_DIMENSION = 8  # bitboards only work for the 8x8 board
+FULL_BOARD_MASK = (1 << 64) - 1
+NOT_LEFT_COLUMN_MASK = FULL_BOARD_MASK ^ sum(1 << (row * 8) for row in range(8))
+NOT_RIGHT_COLUMN_MASK = FULL_BOARD_MASK ^ sum(1 << (row * 8 + 7) for row in range(8))
+
+# (shift, mask) for each direction, split into the directions that shift toward higher bits (left shifts)
+# and the ones that shift toward lower bits (right shifts). The mask removes pieces that wrapped around
+LEFT_SHIFT_DIRECTIONS = [
+    (1, NOT_LEFT_COLUMN_MASK),      # right
+    (8, FULL_BOARD_MASK),           # down
+    (9, NOT_LEFT_COLUMN_MASK),      # down and right
+    (7, NOT_RIGHT_COLUMN_MASK)      # down and left
+]
+RIGHT_SHIFT_DIRECTIONS = [
+    (1, NOT_RIGHT_COLUMN_MASK),     # left
+    (8, FULL_BOARD_MASK),           # up
+    (7, NOT_LEFT_COLUMN_MASK),      # up and right
+    (9, NOT_RIGHT_COLUMN_MASK)      # up and left
+]
+
+# random numbers for each color in each spot, and for when it is WHITE's turn
+ZOBRIST_KEYS = {BLACK: [random.getrandbits(64) for _ in range(64)], WHITE: [random.getrandbits(64) for _ in range(64)]}
+WHITE_TO_MOVE_KEY = random.getrandbits(64)
+# FLIP_KEYS[row][rowBits] is the change in the key from flipping the pieces of the row in the bits of rowBits
+FLIP_KEYS = [[0] * 256 for _ in range(8)]
+for flipRow in range(8):
+    for rowBits in range(1, 256):
+        lowestBit = rowBits & -rowBits
+        flipIndex = flipRow * 8 + lowestBit.bit_length() - 1
+        FLIP_KEYS[flipRow][rowBits] = FLIP_KEYS[flipRow][rowBits ^ lowestBit] ^ ZOBRIST_KEYS[BLACK][flipIndex] ^ ZOBRIST_KEYS[WHITE][flipIndex]
+
+
+def bitIndex(row, col):
+    """Gets the index of the bit that represents the given spot on the board"""
+    return row * BOARD_DIMENSION + col
+
+
+def getValidMovesMask(player, opponent):
+    """Gets the mask of all the spots that the player with the given pieces can play in"""
+    empty = FULL_BOARD_MASK ^ (player | opponent)
+    validMoves = 0
+    # opponent pieces that are in an unbroken line from one of the player's pieces are
+    # found 1 spot at a time, and a line can have at most 6 opponent pieces in it
+    for shift, mask in LEFT_SHIFT_DIRECTIONS:
+        shiftableOpponent = opponent & mask
+        captured = (player << shift) & shiftableOpponent
+        captured |= (captured << shift) & shiftableOpponent
+        captured |= (captured << shift) & shiftableOpponent
+        captured |= (captured << shift) & shiftableOpponent
+        captured |= (captured << shift) & shiftableOpponent
+        captured |= (captured << shift) & shiftableOpponent
+        validMoves |= (captured << shift) & mask & empty
+    for shift, mask in RIGHT_SHIFT_DIRECTIONS:
+        shiftableOpponent = opponent & mask
+        captured = (player >> shift) & shiftableOpponent
+        captured |= (captured >> shift) & shiftableOpponent
+        captured |= (captured >> shift) & shiftableOpponent
+        captured |= (captured >> shift) & shiftableOpponent
+        captured |= (captured >> shift) & shiftableOpponent
+        captured |= (captured >> shift) & shiftableOpponent
+        validMoves |= (captured >> shift) & mask & empty
+    return validMoves
+
+
+def getFlippedMask(index, player, opponent):
+    """Gets the mask of the opponent's pieces that are captured when the player plays at the given bit index"""
+    move = 1 << index
+    flipped = 0
+    for shift, mask in LEFT_SHIFT_DIRECTIONS:
+        spot = (move << shift) & mask
+        captured = 0
+        while spot & opponent:
+            captured |= spot
+            spot = (spot << shift) & mask
+        if spot & player:
+            # the line of opponent pieces ends at one of the player's pieces
+            flipped |= captured
+    for shift, mask in RIGHT_SHIFT_DIRECTIONS:
+        spot = (move >> shift) & mask
+        captured = 0
+        while spot & opponent:
+            captured |= spot
+            spot = (spot >> shift) & mask
+        if spot & player:
+            flipped |= captured
+    return flipped
+
+
+def getFlipKey(flipped):
+    """Gets the change in the Zobrist key from flipping the pieces in the mask"""
+    key = 0
+    for row in range(8):
+        rowBits = (flipped >> (8 * row)) & 0xFF
+        if rowBits:
+            key ^= FLIP_KEYS[row][rowBits]
+    return key
+
+
+def bitIndices(mask):
+    """Gets the index of every bit that is set in the mask, lowest first"""
+    indices = []
+    while mask:
+        lowestBit = mask & -mask
+        indices.append(lowestBit.bit_length() - 1)
+        mask ^= lowestBit
+    return indices
+
+
+class OthelloBitboard:
+    """
+    Stores the board as one integer per color. Moves are played and undone in place,
+    so no copying is needed during a search. Also keeps the Zobrist key of the pieces up to date
+    """
+
+    def __init__(self, board=None):
+        """Creates the bitboard from the list of lists board used by the client"""
+        self.pieces = {BLACK: 0, WHITE: 0}
+        self.key = 0
+        if board is not None:
+            for row in range(BOARD_DIMENSION):
+                for col in range(BOARD_DIMENSION):
+                    if board[row][col] != EMPTY:
+                        self.pieces[board[row][col]] |= 1 << bitIndex(row, col)
+                        self.key ^= ZOBRIST_KEYS[board[row][col]][bitIndex(row, col)]
+
+    def getKey(self, color):
+        """Gets the Zobrist key of the position, with the given color to move"""
+        return self.key ^ WHITE_TO_MOVE_KEY if color == WHITE else self.key
+
+    def getValidMovesMask(self, color):
+        """Gets the mask of all the spots that the given color can play in"""
+        return getValidMovesMask(self.pieces[color], self.pieces[opponentOf(color)])
+
+    def getFlippedMask(self, color, index):
+        """Gets the mask of the pieces that the given color captures by playing at the given bit index"""
+        return getFlippedMask(index, self.pieces[color], self.pieces[opponentOf(color)])
+
+    def performMove(self, color, index, flipped):
+        """Plays a piece at the given bit index, and flips the captured pieces (from getFlippedMask)"""
+        self.pieces[color] |= flipped | (1 << index)
+        self.pieces[opponentOf(color)] ^= flipped
+        self.key ^= ZOBRIST_KEYS[color][index] ^ getFlipKey(flipped)
+
+    def undoMove(self, color, index, flipped):
+        """Takes back a move made with performMove"""
+        self.pieces[color] ^= flipped | (1 << index)
+        self.pieces[opponentOf(color)] |= flipped
+        self.key ^= ZOBRIST_KEYS[color][index] ^ getFlipKey(flipped)
+
+    def toBoard(self):
+        """Converts the bitboard back into the list of lists board used by the client"""
+        board = []
+        for row in range(BOARD_DIMENSION):
+            boardRow = []
+            for col in range(BOARD_DIMENSION):
+                bit = 1 << bitIndex(row, col)
+                if self.pieces[BLACK] & bit:
+                    boardRow.append(BLACK)
+                elif self.pieces[WHITE] & bit:
+                    boardRow.append(WHITE)
+                else:
+                    boardRow.append(EMPTY)
+            board.append(boardRow)
+        return board
+
+
+def opponentOf(piece):
+    """Gets the string representation of the opposing piece"""
+    return WHITE if piece == BLACK else BLACK
@@ -0,0 +1,173 @@
+# Exact endgame solver for Othello
+# Once only a few empty spots are left, the game can be searched all the way to the end, so the A.I.
+# can find the move with the best possible final score instead of the one that looks best to evaluateBoard.
+# The search is a negamax over bitboards (see othello_bitboard.py), where every board is scored by
+# the final difference in discs from the point of view of the player to move. If the game ends with
+# empty spots left, they go to the winner.
+#
+# Most of the work is in choosing which move to search first:
+#   - fastest first: with many empty spots left, the moves that leave the opponent with the fewest
+#     replies are searched first, since they are usually best and their subtrees are the smallest
+#   - parity: the board is split into its 4 quadrants. Playing in a quadrant with an odd number of
+#     empty spots is usually good, since it lets the player make the last move in that quadrant, so
+#     those moves are searched first when moves are otherwise tied (or when there are few empty spots left)
+# Results are cached by position in their own table, separate from the heuristic search's table,
+# since their scores aren't comparable to evaluateBoard's.
+import time
+from othello.othello_bitboard import FULL_BOARD_MASK, getValidMovesMask, getFlippedMask, bitIndices
+
+FASTEST_FIRST_MIN_EMPTIES = 7  # fewest empty spots for which moves are ordered by the opponent's replies
+CACHE_MIN_EMPTIES = 6  # fewest empty spots for which positions are saved in the cache
+CACHE_MAX_SIZE = 2000000  # the cache is cleared if it grows past this many positions
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2  # how a score stored in the cache relates to the true score
+# solves look at about NODE_GROWTH_PER_EMPTY times as many positions for every extra empty spot
+EXPECTED_NODES_AT_10_EMPTIES = 4000
+NODE_GROWTH_PER_EMPTY = 2.35
+# (player, opponent) pieces of a position with 10 empty spots, which takes close to EXPECTED_NODES_AT_10_EMPTIES to solve
+CALIBRATION_POSITION = (0x29312a66eebe4032, 0x06ce95191001bf05)
+QUADRANT_MASKS = [
+    sum(1 << (row * 8 + col) for row in rows for col in cols)
+    for rows in [range(4), range(4, 8)] for cols in [range(4), range(4, 8)]
+]
+
+
+def finalScore(player, opponent):
+    """Gets the final disc difference for the player, with the empty spots going to the winner"""
+    playerCount, opponentCount = player.bit_count(), opponent.bit_count()
+    emptyCount = 64 - playerCount - opponentCount
+    if playerCount > opponentCount:
+        return playerCount - opponentCount + emptyCount
+    elif playerCount < opponentCount:
+        return playerCount - opponentCount - emptyCount
+    return 0
+
+
+def oddQuadrantsMask(empty):
+    """Gets the mask of the quadrants that have an odd number of empty spots"""
+    mask = 0
+    for quadrantMask in QUADRANT_MASKS:
+        if (empty & quadrantMask).bit_count() & 1:
+            mask |= quadrantMask
+    return mask
+
+
+class OthelloEndgameSolver:
+    """Solves Othello positions exactly. Positions are a pair of bitboards, for the player to move and their opponent"""
+
+    def __init__(self):
+        # cache maps (player pieces, opponent pieces) to a tuple of (bound type, score, best move)
+        self.cache = {}
+        self.numNodesSearched = 0
+        self.secondsPerNode = None  # how long the solver takes per position on this computer, set by calibrate
+
+    def calibrate(self):
+        """Times a solve of CALIBRATION_POSITION, to see how fast the solver runs on this computer"""
+        startTime = time.time()
+        self.solve(*CALIBRATION_POSITION)
+        self.secondsPerNode = (time.time() - startTime) / self.numNodesSearched
+        self.cache.clear()
+
+    def estimateSolveTime(self, numEmpties):
+        """Estimates how many seconds a solve with the given number of empty spots will take, once calibrated"""
+        return self.secondsPerNode * EXPECTED_NODES_AT_10_EMPTIES * NODE_GROWTH_PER_EMPTY ** (numEmpties - 10)
+
+    def solve(self, player, opponent):
+        """
+        Finds the best move for the player to move, who must have a valid move
+        Returns the bit index of the move in [0] and its final disc difference in [1]
+        """
+        if len(self.cache) > CACHE_MAX_SIZE:
+            self.cache.clear()
+        self.numNodesSearched = 0
+        bestIndex, score = self.negamax(player, opponent, -64, 64, False)
+        return bestIndex, score
+
+    def orderMoves(self, player, opponent, validMoves, empty, tableMove):
+        """
+        Orders the valid moves so that the ones most likely to be best are searched first
+        Returns a list of (bit index, flipped mask) for each move
+        """
+        oddQuadrants = oddQuadrantsMask(empty)
+        orderedMoves = []
+        for index in bitIndices(validMoves):
+            flipped = getFlippedMask(index, player, opponent)
+            isEvenQuadrant = 0 if oddQuadrants >> index & 1 else 1
+            if empty.bit_count() >= FASTEST_FIRST_MIN_EMPTIES:
+                # fastest first, then parity
+                newPlayer = player | flipped | (1 << index)
+                numReplies = getValidMovesMask(opponent ^ flipped, newPlayer).bit_count()
+                sortKey = 2 * numReplies + isEvenQuadrant
+            else:
+                sortKey = isEvenQuadrant
+            if index == tableMove:
+                sortKey = -1
+            orderedMoves.append((sortKey, index, flipped))
+        orderedMoves.sort()
+        return [(index, flipped) for _, index, flipped in orderedMoves]
+
+    def negamax(self, player, opponent, alpha, beta, opponentPassed):
+        """
+        Recursively finds the final disc difference for the player to move, if it is within (alpha, beta).
+        If the true score is <= alpha, returns an upper bound <= alpha.
+        If the true score is >= beta, returns a lower bound >= beta.
+        Returns the bit index of the best move in [0] (None if the player has to pass) and the score in [1]
+        """
+        self.numNodesSearched += 1
+        validMoves = getValidMovesMask(player, opponent)
+        if validMoves == 0:
+            if opponentPassed:
+                # neither player can move, so the game is over
+                return None, finalScore(player, opponent)
+            _, score = self.negamax(opponent, player, -beta, -alpha, True)
+            return None, -score
+
+        empty = FULL_BOARD_MASK ^ (player | opponent)
+        if empty & (empty - 1) == 0:
+            # only one empty spot left, and the player can play it
+            flipped = getFlippedMask(validMoves.bit_length() - 1, player, opponent)
+            return validMoves.bit_length() - 1, finalScore(player | flipped | validMoves, opponent ^ flipped)
+
+        useCache = empty.bit_count() >= CACHE_MIN_EMPTIES
+        key = (player, opponent)
+        tableMove = None
+        if useCache and key in self.cache:
+            boundType, tableScore, tableMove = self.cache[key]
+            if boundType == EXACT:
+                return tableMove, tableScore
+            elif boundType == LOWER_BOUND:
+                alpha = max(alpha, tableScore)
+            else:
+                beta = min(beta, tableScore)
+            if alpha >= beta:
+                return tableMove, tableScore
+        originalAlpha = alpha
+
+        bestIndex, bestScore = None, -65
+        for moveNumber, (index, flipped) in enumerate(self.orderMoves(player, opponent, validMoves, empty, tableMove)):
+            newPlayer, newOpponent = player | flipped | (1 << index), opponent ^ flipped
+            if moveNumber == 0:
+                _, score = self.negamax(newOpponent, newPlayer, -beta, -alpha, False)
+                score = -score
+            else:
+                # only check if this move is better than the best one so far, and find its actual score if it is
+                _, score = self.negamax(newOpponent, newPlayer, -alpha - 1, -alpha, False)
+                score = -score
+                if alpha < score < beta:
+                    _, score = self.negamax(newOpponent, newPlayer, -beta, -score, False)
+                    score = -score
+            if score > bestScore:
+                bestIndex, bestScore = index, score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if useCache:
+            if bestScore <= originalAlpha:
+                boundType = UPPER_BOUND
+            elif bestScore >= beta:
+                boundType = LOWER_BOUND
+            else:
+                boundType = EXACT
+            self.cache[key] = (boundType, bestScore, bestIndex)
+        return bestIndex, bestScore
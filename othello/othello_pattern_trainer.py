@@ -0,0 +1,181 @@
+# Trains the pattern weights for the Othello A.I. (see othello_patterns.py)
+# The A.I. plays games against itself in a pool of processes, starting each game with a few random moves
+# (and playing a random move now and then after that) so that the games are varied. Every position of every
+# game is labelled with BLACK's final disc difference, and is also used with the colors swapped (and the
+# label negated), so that the weights score both colors the same way. The weights of each stage of the game
+# are then fitted by least squares, with a small penalty on the size of the weights so that patterns that
+# are rarely seen stay close to 0. There are far too many weights to solve for directly, so the fit uses
+# the conjugate gradient method, which only needs to multiply by the (very sparse) matrix of pattern codes.
+# NumPy is needed to train the weights, but not to use them.
+# To retrain the weights, run this from the root of the project:
+#   > python3 -m othello.othello_pattern_trainer [numGames] [numProcesses] [searchDepth]
+import multiprocessing
+import os
+import random
+import sys
+import time
+import numpy as np
+import othello.othello_strategy as othello_strategy
+from othello.othello_strategy import OthelloStrategy, getValidMoves, hasValidMoves, playMove, opponentOf, \
+    numberOfPieceOnBoard, EMPTY, BLACK, WHITE
+from othello.othello_bitboard import OthelloBitboard
+from othello.othello_client import createNewBoard
+from othello.othello_endgame_solver import finalScore
+from othello.othello_patterns import PATTERN_INSTANCES, NUM_PATTERN_WEIGHTS, NUM_STAGES, NUM_STAGE_WEIGHTS, \
+    EMPTIES_PER_STAGE, WEIGHT_SCALE, PATTERN_WEIGHTS_PATH, writePatternWeights
+
+DEFAULT_NUM_GAMES = 10000
+DEFAULT_NUM_PROCESSES = os.cpu_count()
+DEFAULT_SEARCH_DEPTH = 2
+NUM_RANDOM_OPENING_MOVES = 8
+RANDOM_MOVE_CHANCE = 0.05  # chance of a random move after the opening, while there are more than RANDOM_MOVE_MIN_EMPTIES empty spots
+RANDOM_MOVE_MIN_EMPTIES = 20
+VALIDATION_GAMES_INTERVAL = 10  # every VALIDATION_GAMES_INTERVAL-th game is left out of the fit, to check the weights with
+REGULARIZATION = 5.0
+NUM_FIT_ITERATIONS = 200
+
+selfPlayStrategies = {}  # the A.I. for each color, created once per process of the pool
+
+
+def startSelfPlayProcess(searchDepth):
+    """Sets up a process of the pool to play games searched searchDepth moves ahead"""
+    othello_strategy.BITBOARD_MAX_DEPTH = searchDepth
+    for color in [BLACK, WHITE]:
+        selfPlayStrategies[color] = OthelloStrategy(color)
+
+
+def playSelfPlayGame(seed):
+    """
+    Plays one game of the A.I. against itself
+    Returns the (BLACK pieces, WHITE pieces) of every position in the game in [0], and BLACK's final disc difference in [1]
+    """
+    generator = random.Random(seed)
+    board = createNewBoard()
+    turn = BLACK
+    positions = []
+    numMovesPlayed = 0
+    while True:
+        if not hasValidMoves(turn, board):
+            turn = opponentOf(turn)
+            if not hasValidMoves(turn, board):
+                break
+        bitboard = OthelloBitboard(board)
+        positions.append((bitboard.pieces[BLACK], bitboard.pieces[WHITE]))
+        if numMovesPlayed < NUM_RANDOM_OPENING_MOVES or (numberOfPieceOnBoard(EMPTY, board) > RANDOM_MOVE_MIN_EMPTIES
+                                                         and generator.random() < RANDOM_MOVE_CHANCE):
+            row, col = generator.choice(getValidMoves(turn, board))
+        else:
+            row, col = selfPlayStrategies[turn].getMove(board)
+        playMove(turn, row, col, board)
+        turn = opponentOf(turn)
+        numMovesPlayed += 1
+    bitboard = OthelloBitboard(board)
+    return positions, finalScore(bitboard.pieces[BLACK], bitboard.pieces[WHITE])
+
+
+def getPatternFeatures(blackPieces, whitePieces):
+    """
+    Gets the index in its stage's weights of every pattern instance in each of the positions
+    Returns an array with a row for each position, and a column for each pattern instance
+    """
+    digits = np.empty((len(blackPieces), 64), dtype=np.uint8)
+    for index in range(64):
+        digits[:, index] = ((blackPieces >> np.uint64(index)) & np.uint64(1)) + 2 * ((whitePieces >> np.uint64(index)) & np.uint64(1))
+    patternOffsets = np.cumsum([0] + NUM_PATTERN_WEIGHTS)
+    features = np.empty((len(blackPieces), len(PATTERN_INSTANCES)), dtype=np.int32)
+    for instanceNumber, (patternNumber, spots) in enumerate(PATTERN_INSTANCES):
+        digitValues = 3 ** np.arange(len(spots), dtype=np.int32)
+        features[:, instanceNumber] = patternOffsets[patternNumber] + digits[:, spots].astype(np.int32) @ digitValues
+    return features
+
+
+def createSamples(games):
+    """
+    Turns the games into samples for the fit, once as they were played and once with the colors swapped
+    Returns the features (see getPatternFeatures) in [0], the stage of each sample in [1], and its label in [2]
+    """
+    blackPieces, whitePieces, labels = [], [], []
+    for positions, result in games:
+        for black, white in positions:
+            blackPieces += [black, white]
+            whitePieces += [white, black]
+            labels += [result, -result]
+    blackPieces = np.array(blackPieces, dtype=np.uint64)
+    whitePieces = np.array(whitePieces, dtype=np.uint64)
+    numEmpties = 64 - np.bitwise_count(blackPieces | whitePieces).astype(np.int32)
+    return getPatternFeatures(blackPieces, whitePieces), numEmpties // EMPTIES_PER_STAGE, np.array(labels, dtype=np.float64)
+
+
+def fitStageWeights(features, labels):
+    """
+    Fits the weights of one stage, minimizing the squared error of the predictions plus REGULARIZATION times
+    the sum of the squared weights. Solves the normal equations with NUM_FIT_ITERATIONS conjugate gradient steps
+    Returns the weights, in discs
+    """
+    numInstances = features.shape[1]
+    flatFeatures = features.ravel()
+
+    def multiplyTransposed(values):
+        """Multiplies the transpose of the sample matrix by the given value for each sample"""
+        return np.bincount(flatFeatures, weights=np.repeat(values, numInstances), minlength=NUM_STAGE_WEIGHTS)
+
+    def multiplyNormal(weights):
+        """Multiplies the weights by the matrix of the normal equations"""
+        return multiplyTransposed(weights[features].sum(axis=1)) + REGULARIZATION * weights
+
+    weights = np.zeros(NUM_STAGE_WEIGHTS)
+    residual = multiplyTransposed(labels)
+    direction = residual.copy()
+    residualNorm = residual @ residual
+    for _ in range(NUM_FIT_ITERATIONS):
+        if residualNorm == 0:
+            break
+        product = multiplyNormal(direction)
+        stepSize = residualNorm / (direction @ product)
+        weights += stepSize * direction
+        residual -= stepSize * product
+        newResidualNorm = residual @ residual
+        direction = residual + (newResidualNorm / residualNorm) * direction
+        residualNorm = newResidualNorm
+    return weights
+
+
+def rootMeanSquaredError(weights, features, labels):
+    """Gets how far, in discs, the weights' predictions are from the labels on average"""
+    if len(labels) == 0:
+        return 0.0
+    return float(np.sqrt(np.mean((weights[features].sum(axis=1) - labels) ** 2)))
+
+
+def trainPatternWeights(numGames=DEFAULT_NUM_GAMES, numProcesses=DEFAULT_NUM_PROCESSES, searchDepth=DEFAULT_SEARCH_DEPTH,
+                        path=PATTERN_WEIGHTS_PATH):
+    """Plays the self-play games, fits the weights of every stage to them, and writes them to the weight file"""
+    startTime = time.time()
+    games = []
+    with multiprocessing.Pool(numProcesses, initializer=startSelfPlayProcess, initargs=(searchDepth,)) as pool:
+        # games are seeded by their number, so the same games are played every time
+        for game in pool.imap(playSelfPlayGame, range(numGames), chunksize=4):
+            games.append(game)
+            print('\r%d/%d games played (%ds)' % (len(games), numGames, time.time() - startTime), end='')
+    print()
+    trainingFeatures, trainingStages, trainingLabels = createSamples(
+        [game for gameNumber, game in enumerate(games) if gameNumber % VALIDATION_GAMES_INTERVAL != 0])
+    validationFeatures, validationStages, validationLabels = createSamples(games[::VALIDATION_GAMES_INTERVAL])
+    allWeights = []
+    for stage in range(NUM_STAGES):
+        isTraining, isValidation = trainingStages == stage, validationStages == stage
+        weights = fitStageWeights(trainingFeatures[isTraining], trainingLabels[isTraining])
+        print('stage %d (%d-%d empty spots): %d samples, error %.2f discs (%.2f on validation games)' % (
+            stage, stage * EMPTIES_PER_STAGE, min((stage + 1) * EMPTIES_PER_STAGE - 1, 60), isTraining.sum(),
+            rootMeanSquaredError(weights, trainingFeatures[isTraining], trainingLabels[isTraining]),
+            rootMeanSquaredError(weights, validationFeatures[isValidation], validationLabels[isValidation])))
+        allWeights += np.clip(np.round(weights * WEIGHT_SCALE), -32768, 32767).astype(np.int16).tolist()
+    writePatternWeights(allWeights, path)
+    print('weights written to %s (%ds)' % (path, time.time() - startTime))
+
+
+if __name__ == '__main__':
+    numGamesArg = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUM_GAMES
+    numProcessesArg = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_NUM_PROCESSES
+    searchDepthArg = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_SEARCH_DEPTH
+    trainPatternWeights(numGamesArg, numProcessesArg, searchDepthArg)
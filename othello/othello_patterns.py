@@ -0,0 +1,169 @@
+# Pattern-table evaluation for the Othello A.I.
+# Instead of adding up hand-picked scores, a bitboard can be scored with weights that were fitted to the
+# results of self-play games (see othello_pattern_trainer.py). The board is covered by a few groups of
+# spots, called patterns: each edge along with the 2 spots diagonal to its corners, each 3x3 corner, each
+# 2x5 corner region, and every diagonal that is at least 4 spots long. The pieces in a pattern are read as
+# a base 3 number (0 for empty, 1 for BLACK, 2 for WHITE), which is the index of its weight in the pattern's
+# table. Every pattern is used in all of its rotations and mirror images, which share the same table, and
+# the tables are kept separately for each stage of the game (by the number of empty spots).
+# The score of a board is the sum of the weights of its patterns, which is the final disc difference that
+# BLACK can expect (in 1/WEIGHT_SCALE of a disc). The codes of the patterns are kept up to date as moves
+# are played and taken back, so scoring a board is just one lookup per pattern.
+import os
+import struct
+import zlib
+from array import array
+from operator import getitem
+from othello.othello_bitboard import bitIndices, opponentOf
+
+EMPTY, BLACK, WHITE = '.', '0', 'O'
+PIECE_DIGITS = {BLACK: 1, WHITE: 2}
+WEIGHT_SCALE = 64  # weights are stored as 16 bit integers, in 1/WEIGHT_SCALE of a disc
+EMPTIES_PER_STAGE = 16  # the weights are fitted separately for every EMPTIES_PER_STAGE empty spots
+NUM_STAGES = 60 // EMPTIES_PER_STAGE + 1
+HEADER_FORMAT = '<HI'  # number of stages, number of weights per stage
+PATTERN_WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "othello_pattern_weights.bin")
+
+# the (row, col) spots of one version of each pattern, in the order that their digits are read (lowest first)
+PATTERNS = [
+    [(0, col) for col in range(8)] + [(1, 1), (1, 6)],          # edge and the 2 spots diagonal to its corners
+    [(row, col) for row in range(3) for col in range(3)],       # 3x3 corner
+    [(row, col) for row in range(2) for col in range(5)],       # 2x5 corner region
+] + [
+    [(i, i + 8 - length) for i in range(length)]                # diagonals of length 8, 7, 6, 5 and 4
+    for length in range(8, 3, -1)
+]
+NUM_PATTERN_WEIGHTS = [3 ** len(pattern) for pattern in PATTERNS]
+NUM_STAGE_WEIGHTS = sum(NUM_PATTERN_WEIGHTS)
+
+
+def transformSpot(row, col, symmetry):
+    """
+    Moves a spot to where it is after one of the 8 symmetries of the board. Bit 2 of the
+    symmetry swaps rows and columns, then bit 0 flips the rows and bit 1 flips the columns
+    """
+    if symmetry & 4:
+        row, col = col, row
+    if symmetry & 1:
+        row = 7 - row
+    if symmetry & 2:
+        col = 7 - col
+    return row, col
+
+
+def createPatternInstances():
+    """
+    Finds every distinct version of every pattern on the board
+    Returns a list of (pattern number, bit index of each of its spots) for each version
+    """
+    instances = []
+    for patternNumber, pattern in enumerate(PATTERNS):
+        spotSets = set()
+        for symmetry in range(8):
+            spots = [transformSpot(row, col, symmetry) for row, col in pattern]
+            if frozenset(spots) not in spotSets:
+                # a symmetry that gives the same spots in a different order would just be the same pattern read backwards
+                spotSets.add(frozenset(spots))
+                instances.append((patternNumber, [row * 8 + col for row, col in spots]))
+    return instances
+
+
+PATTERN_INSTANCES = createPatternInstances()
+# for each bit index, a (pattern instance, value of a digit 1 in the spot) tuple for every pattern instance that it is in
+INSTANCES_THROUGH_SPOT = [[] for _ in range(64)]
+for instanceNumber, (_, instanceSpots) in enumerate(PATTERN_INSTANCES):
+    for digitNumber, spotIndex in enumerate(instanceSpots):
+        INSTANCES_THROUGH_SPOT[spotIndex].append((instanceNumber, 3 ** digitNumber))
+
+
+def loadPatternWeights(path=PATTERN_WEIGHTS_PATH):
+    """
+    Reads a weight file written by writePatternWeights
+    Returns the table of each pattern instance for each stage, or None if the file doesn't exist or doesn't match the patterns
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as weightsFile:
+        contents = weightsFile.read()
+    numStages, numStageWeights = struct.unpack_from(HEADER_FORMAT, contents)
+    if numStages != NUM_STAGES or numStageWeights != NUM_STAGE_WEIGHTS:
+        return None
+    weights = array('h')
+    weights.frombytes(zlib.decompress(contents[struct.calcsize(HEADER_FORMAT):]))
+    stageWeights = []
+    offset = 0
+    for _ in range(NUM_STAGES):
+        patternTables = []
+        for numWeights in NUM_PATTERN_WEIGHTS:
+            patternTables.append(weights[offset:offset + numWeights].tolist())
+            offset += numWeights
+        # the versions of a pattern all share its table
+        stageWeights.append([patternTables[patternNumber] for patternNumber, _ in PATTERN_INSTANCES])
+    return stageWeights
+
+
+def writePatternWeights(weights, path=PATTERN_WEIGHTS_PATH):
+    """Writes the given weights (NUM_STAGE_WEIGHTS for each stage, in the order of PATTERNS) to a weight file"""
+    with open(path, 'wb') as weightsFile:
+        weightsFile.write(struct.pack(HEADER_FORMAT, NUM_STAGES, NUM_STAGE_WEIGHTS))
+        weightsFile.write(zlib.compress(array('h', weights).tobytes(), 9))
+
+
+class OthelloPatternEvaluator:
+    """
+    Keeps the code of every pattern instance and the number of pieces of each color up to date as moves
+    are played and taken back on a bitboard. Has the same methods for updating as OthelloEvaluator
+    """
+
+    def __init__(self, bitboard, stageWeights):
+        """Finds the codes for the given bitboard. stageWeights comes from loadPatternWeights"""
+        self.stageWeights = stageWeights
+        self.codes = [0] * len(PATTERN_INSTANCES)
+        self.numPieces = {BLACK: 0, WHITE: 0}
+        for color in [BLACK, WHITE]:
+            for index in bitIndices(bitboard.pieces[color]):
+                self.addPiece(color, index)
+
+    def addPiece(self, color, index):
+        """Updates the codes for a piece of the given color being placed at the given bit index"""
+        codes = self.codes
+        digit = PIECE_DIGITS[color]
+        for instanceNumber, digitValue in INSTANCES_THROUGH_SPOT[index]:
+            codes[instanceNumber] += digit * digitValue
+        self.numPieces[color] += 1
+
+    def removePiece(self, color, index):
+        """Updates the codes for a piece of the given color being removed from the given bit index"""
+        codes = self.codes
+        digit = PIECE_DIGITS[color]
+        for instanceNumber, digitValue in INSTANCES_THROUGH_SPOT[index]:
+            codes[instanceNumber] -= digit * digitValue
+        self.numPieces[color] -= 1
+
+    def flipPiece(self, color, index):
+        """Updates the codes for the piece at the given bit index being flipped to the given color"""
+        codes = self.codes
+        enemy = opponentOf(color)
+        digitChange = PIECE_DIGITS[color] - PIECE_DIGITS[enemy]
+        for instanceNumber, digitValue in INSTANCES_THROUGH_SPOT[index]:
+            codes[instanceNumber] += digitChange * digitValue
+        self.numPieces[color] += 1
+        self.numPieces[enemy] -= 1
+
+    def performMove(self, color, index, flipped):
+        """Updates the codes for a move played with OthelloBitboard.performMove"""
+        self.addPiece(color, index)
+        for flippedIndex in bitIndices(flipped):
+            self.flipPiece(color, flippedIndex)
+
+    def undoMove(self, color, index, flipped):
+        """Updates the codes for a move taken back with OthelloBitboard.undoMove"""
+        enemy = opponentOf(color)
+        for flippedIndex in bitIndices(flipped):
+            self.flipPiece(enemy, flippedIndex)
+        self.removePiece(color, index)
+
+    def evaluate(self, color, numEmpties):
+        """Gets the final disc difference that the given color can expect, in 1/WEIGHT_SCALE of a disc"""
+        score = sum(map(getitem, self.stageWeights[numEmpties // EMPTIES_PER_STAGE], self.codes))
+        return score if color == BLACK else -score
@@ -2,7 +2,11 @@
 # Started 7.15.22
 # Contains AI strategy and board manipulation methods
 import math
+import time
 from othello.othello_player import OthelloPlayer
+from othello.othello_bitboard import OthelloBitboard, bitIndices, BOARD_DIMENSION as BITBOARD_DIMENSION
+from othello.othello_endgame_solver import OthelloEndgameSolver
+from othello.othello_patterns import OthelloPatternEvaluator, loadPatternWeights
 from functools import cmp_to_key
 from collections import defaultdict
 
@@ -15,9 +19,17 @@ EMPTY = "."
 BOARD_DIMENSION = 8                 # Range: 4 to 26
 MAX_DEPTH = 7                       # Recommended: 5 to 8
 MAX_VALID_MOVES_TO_EVALUATE = 20    # Recommended: 12 to 20
+USE_BITBOARD = True                 # search on a bitboard (only for the 8x8 board)
+BITBOARD_MAX_DEPTH = 7              # Recommended: 5 to 9
+TRANSPOSITION_TABLE_MAX_SIZE = 1000000  # the table is cleared if it grows past this many positions
+USE_ENDGAME_SOLVER = True           # play perfectly once there are few enough empty spots left (only for the 8x8 board)
+ENDGAME_SOLVER_MAX_EMPTIES = 18     # Recommended: 12 to 18
+ENDGAME_SOLVER_DEFAULT_TIME = 1.0   # seconds a solve can take, before any heuristic search has been timed
+USE_PATTERN_EVALUATION = False      # score bitboards with the trained pattern weights, if the weight file exists
 ######################
 
 WIN_SCORE = 1000000000
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2  # how a score stored in the transposition table relates to the true score
 CORNER_COORDINATES = {(0, 0), (0, BOARD_DIMENSION - 1), (BOARD_DIMENSION - 1, 0),
                       (BOARD_DIMENSION - 1, BOARD_DIMENSION - 1)}
 CORNER_ADJACENT_COORDINATES = {(0, 1), (1, 1), (1, 0),
@@ -39,6 +51,17 @@ class OthelloStrategy(OthelloPlayer):
         self.numBoardsEvaluated = 0
         self.positionsScores = {}
         self.buildPositionScoresDictionary()
+        # transpositionTable maps the key of a bitboard (see OthelloBitboard.getKey) to a tuple of (depth
+        # searched below it, bound type, score, best move). Scores are always from the AI's point of view,
+        # so the table is kept between depth searches and between turns of the same game
+        self.transpositionTable = {}
+        self.searchTimes = []  # how long each of this game's heuristic bitboard searches took
+        self.endgameSolver = None  # OthelloEndgameSolver, created and calibrated the first time it is needed
+        self.evaluator = None  # OthelloEvaluator (or OthelloPatternEvaluator) for the bitboard being searched
+        # the pattern tables for each stage of the game (see othello_patterns.py), or None to use the hand-tuned scores
+        self.patternWeights = None
+        if USE_BITBOARD and USE_PATTERN_EVALUATION and BOARD_DIMENSION == BITBOARD_DIMENSION:
+            self.patternWeights = loadPatternWeights()
 
     def buildPositionScoresDictionary(self):
         """Builds the dictionary that maps coordinate positions to scores"""
@@ -51,7 +74,21 @@ class OthelloStrategy(OthelloPlayer):
         """Gets the best move for the AI on the given board"""
         self.movesPlayed = BOARD_DIMENSION**2 - numberOfPieceOnBoard(EMPTY, board)
         self.numBoardsEvaluated = 0
-        row, col = self.minimax(self.aiColor, -math.inf, math.inf, 0, board)[:2]
+        if USE_BITBOARD and BOARD_DIMENSION == BITBOARD_DIMENSION:
+            bitboard = OthelloBitboard(board)
+            numEmpties = BOARD_DIMENSION**2 - self.movesPlayed
+            if USE_ENDGAME_SOLVER and numEmpties <= ENDGAME_SOLVER_MAX_EMPTIES and numEmpties <= self.getEndgameSolverMaxEmpties():
+                return self.getSolvedMove(bitboard)
+            # the bitboard finds the moves and captured pieces, and the evaluator keeps what the leaves are scored from up to date
+            if self.patternWeights is not None:
+                self.evaluator = OthelloPatternEvaluator(bitboard, self.patternWeights)
+            else:
+                self.evaluator = OthelloEvaluator(bitboard)
+            startTime = time.time()
+            row, col = self.searchBitboard(bitboard)[:2]
+            self.searchTimes.append(time.time() - startTime)
+        else:
+            row, col = self.minimax(self.aiColor, -math.inf, math.inf, 0, board)[:2]
         return  row, col
 
     def minimax(self, turn, alpha, beta, depth, board, noMoveForOpponent=False):
@@ -102,6 +139,127 @@ class OthelloStrategy(OthelloPlayer):
                     break
             return bestRow, bestCol, lowScore
 
+    def getEndgameSolverMaxEmpties(self):
+        """
+        Finds the most empty spots for which the endgame solver should take no longer than the average heuristic
+        search has this game (or ENDGAME_SOLVER_DEFAULT_TIME, if there haven't been any), up to ENDGAME_SOLVER_MAX_EMPTIES
+        """
+        if self.endgameSolver is None:
+            self.endgameSolver = OthelloEndgameSolver()
+            self.endgameSolver.calibrate()
+        timeLimit = sum(self.searchTimes) / len(self.searchTimes) if self.searchTimes else ENDGAME_SOLVER_DEFAULT_TIME
+        maxEmpties = 0
+        while maxEmpties < ENDGAME_SOLVER_MAX_EMPTIES and self.endgameSolver.estimateSolveTime(maxEmpties + 1) <= timeLimit:
+            maxEmpties += 1
+        return maxEmpties
+
+    def getSolvedMove(self, bitboard):
+        """Finds the move with the best final score, using the endgame solver"""
+        index, _ = self.endgameSolver.solve(bitboard.pieces[self.aiColor], bitboard.pieces[self.enemyColor])
+        self.numBoardsEvaluated = self.endgameSolver.numNodesSearched
+        return index // BOARD_DIMENSION, index % BOARD_DIMENSION
+
+    def searchBitboard(self, bitboard):
+        """
+        Searches the bitboard with iterative deepening, up to BITBOARD_MAX_DEPTH moves ahead. Each depth
+        searches the best moves that the depth before it found first, since they are stored in the transposition table
+        Returns the row in [0], column in [1], and score of the best move in [2]
+        """
+        if len(self.transpositionTable) > TRANSPOSITION_TABLE_MAX_SIZE:
+            self.transpositionTable.clear()
+        row, col, score = -1, -1, -math.inf
+        for localMaxDepth in range(1, BITBOARD_MAX_DEPTH + 1):
+            # the best move so far is known after every depth
+            row, col, score = self.bitboardMinimax(self.aiColor, -math.inf, math.inf, 0, bitboard, localMaxDepth)
+            if score == WIN_SCORE:
+                break
+        return row, col, score
+
+    def bitboardMinimax(self, turn, alpha, beta, depth, bitboard, localMaxDepth, noMoveForOpponent=False):
+        """
+        Does the same search as minimax to localMaxDepth, but finds the valid moves and captured pieces with the
+        bitboard. Moves are played on the bitboard and the evaluator, and taken back once they have been searched
+        """
+        if depth == localMaxDepth or depth + self.movesPlayed == BOARD_DIMENSION ** 2:
+            self.numBoardsEvaluated += 1
+            return -1, -1, self.evaluateBitboard(depth)
+
+        remainingDepth = localMaxDepth - depth
+        key = bitboard.getKey(turn)
+        tableMove = None
+        if key in self.transpositionTable:
+            tableDepth, boundType, tableScore, tableMove = self.transpositionTable[key]
+            if tableDepth >= remainingDepth:
+                # the stored search went at least as deep as this one would
+                if boundType == EXACT:
+                    return tableMove // BOARD_DIMENSION, tableMove % BOARD_DIMENSION, tableScore
+                elif boundType == LOWER_BOUND:
+                    alpha = max(alpha, tableScore)
+                else:
+                    beta = min(beta, tableScore)
+                if alpha >= beta:
+                    return tableMove // BOARD_DIMENSION, tableMove % BOARD_DIMENSION, tableScore
+        originalAlpha, originalBeta = alpha, beta
+
+        validMoves = getBitboardValidMoves(bitboard.getValidMovesMask(turn))
+        if tableMove in validMoves:
+            # the best move the last search of this board found is the most likely to cause pruning
+            validMoves.remove(tableMove)
+            validMoves.insert(0, tableMove)
+        if len(validMoves) > MAX_VALID_MOVES_TO_EVALUATE:
+            # check a maximum of MAX_VALID_MOVES_TO_EVALUATE moves per board state
+            validMoves = validMoves[:MAX_VALID_MOVES_TO_EVALUATE]
+        if len(validMoves) == 0:
+            if noMoveForOpponent:
+                self.numBoardsEvaluated += 1
+                return -1, -1, self.evaluateBitboard(BOARD_DIMENSION**2 - self.movesPlayed)
+            return self.bitboardMinimax(opponentOf(turn), alpha, beta, depth, bitboard, localMaxDepth, noMoveForOpponent=True)
+        if turn == self.aiColor:
+            # maximize
+            highScore = -math.inf
+            bestIndex = validMoves[0]
+            for index in validMoves:
+                flipped = playBitboardMove(turn, index, bitboard, self.evaluator)
+                _, __, score = self.bitboardMinimax(opponentOf(turn), alpha, beta, depth + 1, bitboard, localMaxDepth)
+                undoBitboardMove(turn, index, flipped, bitboard, self.evaluator)
+                if score > highScore:
+                    highScore = score
+                    bestIndex = index
+                alpha = max(alpha, highScore)
+                if alpha >= beta:
+                    break
+            self.storeInTranspositionTable(key, remainingDepth, highScore, originalAlpha, originalBeta, bestIndex)
+            return bestIndex // BOARD_DIMENSION, bestIndex % BOARD_DIMENSION, highScore
+        else:
+            # minimize
+            lowScore = math.inf
+            bestIndex = validMoves[0]
+            for index in validMoves:
+                flipped = playBitboardMove(turn, index, bitboard, self.evaluator)
+                _, __, score = self.bitboardMinimax(opponentOf(turn), alpha, beta, depth + 1, bitboard, localMaxDepth)
+                undoBitboardMove(turn, index, flipped, bitboard, self.evaluator)
+                if score < lowScore:
+                    lowScore = score
+                    bestIndex = index
+                beta = min(beta, lowScore)
+                if beta <= alpha:
+                    break
+            self.storeInTranspositionTable(key, remainingDepth, lowScore, originalAlpha, originalBeta, bestIndex)
+            return bestIndex // BOARD_DIMENSION, bestIndex % BOARD_DIMENSION, lowScore
+
+    def storeInTranspositionTable(self, key, remainingDepth, score, alpha, beta, bestIndex):
+        """
+        Saves the result of searching a bitboard. alpha and beta are the bounds the search started with,
+        which determine whether the score is exact or only a bound on the true score
+        """
+        if score <= alpha:
+            boundType = UPPER_BOUND
+        elif score >= beta:
+            boundType = LOWER_BOUND
+        else:
+            boundType = EXACT
+        self.transpositionTable[key] = (remainingDepth, boundType, score, bestIndex)
+
     def evaluateBoard(self, board, additionalPiecesPlayed):
         """Assigns a value to the board state based on how good it is for the AI"""
         spotsRemaining = BOARD_DIMENSION**2 - (additionalPiecesPlayed + self.movesPlayed)
@@ -131,6 +289,106 @@ class OthelloStrategy(OthelloPlayer):
             scores[self.enemyColor] *= (1 + (numOccurrences[self.enemyColor]/(spotsRemaining*25)))
         return scores[self.aiColor] - scores[self.enemyColor]
 
+    def evaluateBitboard(self, additionalPiecesPlayed):
+        """
+        Gives the bitboard being searched the same score as evaluateBoard, from the totals kept by the evaluator.
+        With pattern weights, boards that aren't over are scored by the patterns instead
+        """
+        evaluator = self.evaluator
+        spotsRemaining = BOARD_DIMENSION**2 - (additionalPiecesPlayed + self.movesPlayed)
+        if spotsRemaining == 0:
+            aiScore, humanScore = evaluator.numPieces[self.aiColor], evaluator.numPieces[self.enemyColor]
+            if aiScore > humanScore:
+                return WIN_SCORE
+            elif aiScore < humanScore:
+                return -WIN_SCORE
+            else:
+                return 0
+        if self.patternWeights is not None:
+            return evaluator.evaluate(self.aiColor, spotsRemaining)
+
+        aiScore = evaluator.positionScores[self.aiColor] + evaluator.filledLineScores[self.aiColor]
+        enemyScore = evaluator.positionScores[self.enemyColor] + evaluator.filledLineScores[self.enemyColor]
+        if spotsRemaining <= 15:
+            aiScore *= (1 + (evaluator.numPieces[self.aiColor]/(spotsRemaining*25)))
+            enemyScore *= (1 + (evaluator.numPieces[self.enemyColor]/(spotsRemaining*25)))
+        return aiScore - enemyScore
+
+
+class OthelloEvaluator:
+    """
+    Keeps the totals that evaluateBoard adds up (each color's position scores, filled line scores, and number of
+    pieces) up to date as moves are played and taken back on a bitboard. Stores how many of each color's pieces
+    are in every row, column and long diagonal, so a piece only changes the scores of the (at most 4) lines through it
+    """
+
+    def __init__(self, bitboard):
+        """Adds up the totals for the given bitboard"""
+        self.positionScores = {BLACK: 0, WHITE: 0}
+        self.filledLineScores = {BLACK: 0, WHITE: 0}
+        self.numPieces = {BLACK: 0, WHITE: 0}
+        # lineCounts[color][line index] is the number of that color's pieces in the line
+        self.lineCounts = {BLACK: [0] * NUM_BITBOARD_LINES, WHITE: [0] * NUM_BITBOARD_LINES}
+        for color in [BLACK, WHITE]:
+            for index in bitIndices(bitboard.pieces[color]):
+                self.addPiece(color, index)
+
+    def addPiece(self, color, index):
+        """Updates the totals for a piece of the given color being placed at the given bit index"""
+        self.positionScores[color] += BITBOARD_POSITION_SCORES[index]
+        self.numPieces[color] += 1
+        lineCounts = self.lineCounts[color]
+        filledLineScore = self.filledLineScores[color]
+        for lineIndex, lineScores in BITBOARD_LINES_THROUGH_SPOT[index]:
+            count = lineCounts[lineIndex]
+            filledLineScore += lineScores[count + 1] - lineScores[count]
+            lineCounts[lineIndex] = count + 1
+        self.filledLineScores[color] = filledLineScore
+
+    def removePiece(self, color, index):
+        """Updates the totals for a piece of the given color being removed from the given bit index"""
+        self.positionScores[color] -= BITBOARD_POSITION_SCORES[index]
+        self.numPieces[color] -= 1
+        lineCounts = self.lineCounts[color]
+        filledLineScore = self.filledLineScores[color]
+        for lineIndex, lineScores in BITBOARD_LINES_THROUGH_SPOT[index]:
+            count = lineCounts[lineIndex]
+            filledLineScore += lineScores[count - 1] - lineScores[count]
+            lineCounts[lineIndex] = count - 1
+        self.filledLineScores[color] = filledLineScore
+
+    def flipPiece(self, color, index):
+        """Updates the totals for the piece at the given bit index being flipped to the given color"""
+        enemy = opponentOf(color)
+        positionScore = BITBOARD_POSITION_SCORES[index]
+        self.positionScores[color] += positionScore
+        self.positionScores[enemy] -= positionScore
+        self.numPieces[color] += 1
+        self.numPieces[enemy] -= 1
+        friendlyCounts, enemyCounts = self.lineCounts[color], self.lineCounts[enemy]
+        friendlyScore, enemyScore = self.filledLineScores[color], self.filledLineScores[enemy]
+        for lineIndex, lineScores in BITBOARD_LINES_THROUGH_SPOT[index]:
+            count = friendlyCounts[lineIndex]
+            friendlyScore += lineScores[count + 1] - lineScores[count]
+            friendlyCounts[lineIndex] = count + 1
+            count = enemyCounts[lineIndex]
+            enemyScore += lineScores[count - 1] - lineScores[count]
+            enemyCounts[lineIndex] = count - 1
+        self.filledLineScores[color], self.filledLineScores[enemy] = friendlyScore, enemyScore
+
+    def performMove(self, color, index, flipped):
+        """Updates the totals for a move played with OthelloBitboard.performMove"""
+        self.addPiece(color, index)
+        for flippedIndex in bitIndices(flipped):
+            self.flipPiece(color, flippedIndex)
+
+    def undoMove(self, color, index, flipped):
+        """Updates the totals for a move taken back with OthelloBitboard.undoMove"""
+        enemy = opponentOf(color)
+        for flippedIndex in bitIndices(flipped):
+            self.flipPiece(enemy, flippedIndex)
+        self.removePiece(color, index)
+
 
 def copyOfBoard(board):
     """Returns a copy of the given board"""
@@ -224,6 +482,28 @@ def validMovesComparator(move1, move2):
         return 0
 
 
+def getBitboardValidMoves(validMovesMask):
+    """Gets the bit indices of the valid moves in the mask, in the same order that validMoveSortKey sorts them"""
+    validMoves = []
+    for positionMask in BITBOARD_MOVE_ORDER_MASKS:
+        validMoves += bitIndices(validMovesMask & positionMask)
+    return validMoves
+
+
+def playBitboardMove(piece, index, bitboard, evaluator):
+    """Plays a move on the bitboard and the evaluator. Returns the mask of the captured pieces"""
+    flipped = bitboard.getFlippedMask(piece, index)
+    bitboard.performMove(piece, index, flipped)
+    evaluator.performMove(piece, index, flipped)
+    return flipped
+
+
+def undoBitboardMove(piece, index, flipped, bitboard, evaluator):
+    """Takes back a move made with playBitboardMove"""
+    bitboard.undoMove(piece, index, flipped)
+    evaluator.undoMove(piece, index, flipped)
+
+
 def pieceAt(row, col, board):
     """Gets the piece at the given coordinate"""
     return board[row][col]
@@ -358,3 +638,24 @@ def checkGameOver(board):
 
 # sets the sorting key for valid move comparisons
 validMoveSortKey = cmp_to_key(validMovesComparator)
+# for the bitboard, a mask of the spots with each position score, from the highest score to the lowest
+BITBOARD_MOVE_ORDER_MASKS = [
+    sum(1 << (row * BOARD_DIMENSION + col) for row in range(BOARD_DIMENSION) for col in range(BOARD_DIMENSION)
+        if evaluatePosition(row, col) == positionScore)
+    for positionScore in sorted({evaluatePosition(row, col) for row in range(BOARD_DIMENSION) for col in range(BOARD_DIMENSION)}, reverse=True)
+]
+# for the evaluator, the position score of each bit index, and the lines (rows, then columns, then the two long diagonals)
+# that go through each bit index, as (line index, score from evaluateBoardByFilledRows for each number of friendly pieces)
+BITBOARD_POSITION_SCORES = [evaluatePosition(index // BOARD_DIMENSION, index % BOARD_DIMENSION) for index in range(BOARD_DIMENSION**2)]
+NUM_BITBOARD_LINES = 2 * BOARD_DIMENSION + 2
+BITBOARD_LINES_THROUGH_SPOT = []
+for spotIndex in range(BOARD_DIMENSION**2):
+    spotRow, spotCol = spotIndex // BOARD_DIMENSION, spotIndex % BOARD_DIMENSION
+    straightLineScores = [0] * (BOARD_DIMENSION - 1) + [8, 17]
+    diagonalLineScores = [0] * (BOARD_DIMENSION - 1) + [16, 25]
+    linesThroughSpot = [(spotRow, straightLineScores), (BOARD_DIMENSION + spotCol, straightLineScores)]
+    if spotRow == spotCol:
+        linesThroughSpot.append((2 * BOARD_DIMENSION, diagonalLineScores))
+    if spotRow + spotCol == BOARD_DIMENSION - 1:
+        linesThroughSpot.append((2 * BOARD_DIMENSION + 1, diagonalLineScores))
+    BITBOARD_LINES_THROUGH_SPOT.append(linesThroughSpot)